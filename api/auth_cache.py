@@ -0,0 +1,80 @@
+"""
+인증/권한 확인 캐시
+상태 조회처럼 자주 호출되는 API에서 매 요청마다 실행되는 사용자 조회와
+작업 소유자 확인 쿼리를 줄이기 위한 짧은 TTL 캐시
+
+- 사용자: JWT의 user_id → 사용자 존재 여부 (조회 성공한 경우만 저장)
+- 작업 소유자: job_id → user_id (job_id는 한 사용자에게만 속함)
+
+이력이 삭제되면 invalidate_job으로 즉시 제거합니다. 캐시는 프로세스마다 따로 있으므로
+다른 워커에서는 최대 TTL 동안 이전 값이 남을 수 있습니다.
+사용자 캐시는 사용자를 삭제/변경하는 API가 없어 TTL로만 만료됩니다.
+(사용자 삭제 API를 추가하면 그 자리에서 캐시도 제거해야 함)
+"""
+
+import os
+import threading
+from collections import namedtuple
+from typing import Callable, Optional
+
+from cachetools import TTLCache
+
+AUTH_CACHE_TTL_SEC = int(os.getenv('AUTH_CACHE_TTL_SEC', '30'))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_CACHE_MAX_ENTRIES', '10000'))
+
+# 캐시에서 꺼낸 사용자 (API에서는 user.id만 사용)
+CachedUser = namedtuple('CachedUser', ['id'])
+
+_lock = threading.Lock()
+_users = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SEC)
+_job_owners = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SEC)
+
+
+def get_user(user_id: int, lookup: Callable[[int], Optional[object]]) -> Optional[object]:
+    """캐시된 사용자를 반환하고, 없으면 lookup으로 조회해 저장합니다.
+
+    Args:
+        user_id: JWT에서 읽은 사용자 ID
+        lookup: 데이터베이스 조회 함수 (없으면 None 반환)
+
+    Returns:
+        캐시 적중 시 CachedUser, 미적중 시 lookup 결과
+    """
+    with _lock:
+        if user_id in _users:
+            return CachedUser(user_id)
+
+    user = lookup(user_id)
+    if user is not None:
+        with _lock:
+            _users[user_id] = True
+    return user
+
+
+def is_job_owner(job_id: str, user_id: int, lookup: Callable[[str, int], bool]) -> bool:
+    """사용자가 작업의 소유자인지 확인합니다. 확인된 소유자만 캐시합니다.
+
+    Args:
+        job_id: 작업 ID
+        user_id: 사용자 ID
+        lookup: 데이터베이스에서 소유 여부를 확인하는 함수
+
+    Returns:
+        소유자이면 True
+    """
+    with _lock:
+        owner = _job_owners.get(job_id)
+    if owner is not None:
+        return owner == user_id
+
+    if not lookup(job_id, user_id):
+        return False
+    with _lock:
+        _job_owners[job_id] = user_id
+    return True
+
+
+def invalidate_job(job_id: str):
+    """삭제된 작업의 소유자 정보를 캐시에서 제거합니다."""
+    with _lock:
+        _job_owners.pop(job_id, None)
@@ -0,0 +1,194 @@
+"""
+결과 내보내기 파일 생성
+result.json을 여러 형식으로 변환해 작업 디렉토리의 exports/ 아래에 저장하고,
+result.json이 바뀌지 않았으면 저장된 파일을 재사용하는 모듈
+
+생성된 파일은 send_file로 그대로 전송되므로 HTTP Range / 조건부 요청(ETag, If-Modified-Since)이 지원되며,
+변환 결과를 메모리에 한꺼번에 만들지 않고 슬라이드 단위로 파일에 씁니다.
+변환할 때는 result.json을 직접 파싱하고 캐시하지 않으므로, 내보내기가 끝나면 파싱한 문서는 메모리에서 해제됩니다.
+
+형식:
+    json     result.json 원본
+    ndjson   슬라이드마다 한 줄 ({"slide": "slide1", ...})
+    md       Markdown 노트
+    json.gz  gzip으로 압축한 result.json
+"""
+
+import gzip
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Any, Callable, Dict, IO, Tuple
+
+EXPORT_DIR_NAME = "exports"
+
+# 형식 → (파일 확장자, MIME 타입)
+EXPORT_FORMATS: Dict[str, Tuple[str, str]] = {
+    "json": ("json", "application/json"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "md": ("md", "text/markdown; charset=utf-8"),
+    "json.gz": ("json.gz", "application/gzip"),
+}
+
+# 같은 파일을 동시에 만들지 않도록 경로별 잠금 (작업 수와 관계없이 고정된 개수의 잠금을 나눠 씀)
+_LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+def _lock_for(path: str) -> threading.Lock:
+    return _locks[hash(path) % _LOCK_STRIPES]
+
+
+def _slide_sort_key(slide_key: str):
+    match = re.search(r"\d+", slide_key)
+    return (int(match.group()) if match else 0, slide_key)
+
+
+def _sorted_slides(result: Dict[str, Any]):
+    for slide_key in sorted(result, key=_slide_sort_key):
+        yield slide_key, result[slide_key]
+
+
+def write_ndjson(result: Dict[str, Any], f: IO[str]):
+    """슬라이드마다 한 줄씩 JSON으로 씁니다."""
+    for slide_key, slide in _sorted_slides(result):
+        if not isinstance(slide, dict):
+            continue
+        f.write(json.dumps({"slide": slide_key, **slide}, ensure_ascii=False))
+        f.write("\n")
+
+
+def _write_chart_summary(value: Any, f: IO[str], indent: str = ""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                f.write(f"{indent}- **{key}**\n")
+                _write_chart_summary(item, f, indent + "  ")
+            elif item:
+                f.write(f"{indent}- **{key}**: {item}\n")
+    elif isinstance(value, list):
+        for item in value:
+            _write_chart_summary(item, f, indent)
+    elif value:
+        f.write(f"{indent}- {value}\n")
+
+
+def write_markdown(result: Dict[str, Any], f: IO[str]):
+    """슬라이드별 노트와 강의 세그먼트를 Markdown으로 씁니다."""
+    for slide_key, slide in _sorted_slides(result):
+        if not isinstance(slide, dict):
+            continue
+        number = _slide_sort_key(slide_key)[0]
+        f.write(f"## 슬라이드 {number}\n\n")
+
+        if slide.get("Concise Summary Notes"):
+            f.write("### 요약\n\n")
+            f.write(f"{slide['Concise Summary Notes'].strip()}\n\n")
+        if slide.get("Bullet Point Notes"):
+            f.write("### 핵심 정리\n\n")
+            f.write(f"{slide['Bullet Point Notes'].strip()}\n\n")
+        if slide.get("Keyword Notes"):
+            f.write("### 키워드\n\n")
+            f.write(f"{slide['Keyword Notes'].strip()}\n\n")
+        if slide.get("Chart/Table Summary"):
+            f.write("### 도표 요약\n\n")
+            _write_chart_summary(slide["Chart/Table Summary"], f)
+            f.write("\n")
+
+        segments = slide.get("Segments") or {}
+        texts = [segment.get("text", "").strip() for segment in segments.values() if isinstance(segment, dict)]
+        texts = [text for text in texts if text]
+        if texts:
+            f.write("### 강의 내용\n\n")
+            for text in texts:
+                f.write(f"> {text}\n>\n")
+            f.write("\n")
+
+
+def _write_text_export(writer: Callable[[Dict[str, Any], IO[str]], None]) -> Callable[[str, str], None]:
+    def build(result_path: str, tmp_path: str):
+        # 캐시를 거치지 않고 직접 파싱 (내보내기가 끝나면 해제)
+        with open(result_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            writer(result, f)
+    return build
+
+
+def _write_gzip(result_path: str, tmp_path: str):
+    # 파일을 파싱하지 않고 블록 단위로 압축 (파일명/mtime을 고정해 같은 입력이면 같은 결과)
+    with open(result_path, "rb") as src, open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(filename="result.json", fileobj=raw, mode="wb", mtime=0) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+# 변환 중에 result.json이 계속 바뀔 때 다시 변환하는 최대 횟수
+_BUILD_ATTEMPTS = 3
+
+_BUILDERS = {
+    "ndjson": _write_text_export(write_ndjson),
+    "md": _write_text_export(write_markdown),
+    "json.gz": _write_gzip,
+}
+
+
+def get_export_file(job_dir: str, fmt: str) -> str:
+    """요청한 형식의 내보내기 파일 경로를 반환합니다. 없거나 현재 result.json으로 만든 파일이 아니면 새로 만듭니다.
+
+    내보내기 파일의 수정 시간은 변환에 사용한 result.json의 수정 시간으로 맞춰 두고, 두 값이 같을 때만 재사용합니다.
+    변환 중에 result.json이 다시 쓰이면 변환을 다시 하므로, 바뀌기 전 내용으로 만든 파일이 최신으로 남지 않습니다.
+
+    Args:
+        job_dir: 작업 디렉토리
+        fmt: EXPORT_FORMATS의 형식 이름
+
+    Returns:
+        내보내기 파일 경로
+
+    Raises:
+        ValueError: 지원하지 않는 형식
+        FileNotFoundError: result.json이 없을 때
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    result_path = os.path.join(job_dir, "result.json")
+    if fmt == "json":
+        os.stat(result_path)  # 없으면 FileNotFoundError
+        return result_path
+
+    export_dir = os.path.join(job_dir, EXPORT_DIR_NAME)
+    export_path = os.path.join(export_dir, f"result.{EXPORT_FORMATS[fmt][0]}")
+
+    with _lock_for(export_path):
+        for attempt in range(1, _BUILD_ATTEMPTS + 1):
+            source_mtime = os.stat(result_path).st_mtime_ns
+            try:
+                if os.stat(export_path).st_mtime_ns == source_mtime:
+                    return export_path
+            except FileNotFoundError:
+                pass
+
+            os.makedirs(export_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=export_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                _BUILDERS[fmt](result_path, tmp_path)
+                # 변환에 사용한 result.json의 수정 시간을 기록 (이후 result.json이 바뀌면 재사용하지 않음)
+                os.utime(tmp_path, ns=(source_mtime, source_mtime))
+                os.replace(tmp_path, export_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                # 다시 쓰는 중인 result.json을 읽어 파싱에 실패한 경우는 다시 시도
+                if attempt == _BUILD_ATTEMPTS or os.stat(result_path).st_mtime_ns == source_mtime:
+                    raise
+
+            if os.stat(result_path).st_mtime_ns == source_mtime:
+                break
+            # 변환 중에 result.json이 바뀜: 다시 변환 (마지막 시도의 파일은 이전 수정 시간이 기록되어 다음 요청에서 다시 만듦)
+            print(f"내보내기 중 result.json이 변경되어 다시 변환합니다 ({attempt}/{_BUILD_ATTEMPTS}): {export_path}")
+    return export_path
@@ -5,6 +5,8 @@
 
 import os
 import json
+import base64
+import threading
 from contextlib import nullcontext
 from datetime import datetime, timezone
 from dotenv import load_dotenv
@@ -12,6 +14,12 @@ from dotenv import load_dotenv
 import jwt
 from flask import Blueprint, request, jsonify, send_file
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_, or_
+
+from . import auth_cache
+from .result_cache import raw_json_response, read_result_bytes
+from .search_index import search_index, sync_index
+from .exporter import EXPORT_FORMATS, get_export_file
 
 # .env 파일 로드
 load_dotenv()
@@ -59,6 +67,25 @@ def init_db(app_db, user_model, conversion_history_model, flask_app=None):
     User = user_model
     ConversionHistory = conversion_history_model
     app = flask_app
+    
+    # 인덱스에 없거나 변경된 결과를 백그라운드에서 검색 인덱스에 반영
+    if flask_app is not None:
+        threading.Thread(target=sync_search_index, daemon=True).start()
+
+def sync_search_index():
+    """데이터베이스의 변환 이력을 기준으로 검색 인덱스를 동기화"""
+    try:
+        with app.app_context():
+            histories = db.session.query(
+                ConversionHistory.job_id,
+                ConversionHistory.user_id,
+                ConversionHistory.filename,
+                ConversionHistory.created_at
+            ).all()
+        count = sync_index(UPLOAD_FOLDER, histories)
+        print(f"검색 인덱스 동기화 완료: {count}개 작업 인덱싱")
+    except Exception as e:
+        print(f"검색 인덱스 동기화 오류: {e}")
 
 def verify_jwt_token(token):
     """JWT 토큰 검증"""
@@ -98,26 +125,105 @@ def require_auth(f):
 # 업로드 디렉토리 설정
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'file')
 
+# 이력 목록 페이지 크기
+HISTORY_PAGE_DEFAULT = 20
+HISTORY_PAGE_MAX = 100
+
+# 검색 결과 페이지 크기
+SEARCH_PAGE_DEFAULT = 20
+SEARCH_PAGE_MAX = 100
+
+def encode_history_cursor(created_at, history_id):
+    """다음 페이지 조회용 커서 생성 (마지막 항목의 created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), history_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_history_cursor(cursor):
+    """커서에서 (created_at, id)를 읽습니다. id는 만들 때의 타입(DB id는 int, 폴더 이력은 job_id 문자열) 그대로이며, 형식이 잘못되면 ValueError"""
+    try:
+        created_at, history_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(history_id, (int, str)):
+            raise TypeError(history_id)
+        return datetime.fromisoformat(created_at), history_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 @history_bp.route('/my', methods=['GET'])
 @require_auth
 def get_my_history(user):
-    """사용자 변환 이력 조회"""
+    """사용자 변환 이력 조회
+    
+    Query parameters:
+        view: full(기본값, notes_json 포함) 또는 summary(id/job_id/filename/status/created_at만)
+        limit: 페이지 크기 (지정하면 {"items": [...], "next_cursor": ...} 형식으로 응답)
+        cursor: 이전 응답의 next_cursor
+    
+    노트 내용은 /my/<job_id>/notes로 필요할 때 따로 조회할 수 있습니다.
+    """
     try:
+        summary_view = request.args.get('view', 'full') == 'summary'
+        paginate = 'limit' in request.args or 'cursor' in request.args
+        limit = None
+        cursor_key = None
+        if paginate:
+            limit = min(max(request.args.get('limit', HISTORY_PAGE_DEFAULT, type=int), 1), HISTORY_PAGE_MAX)
+            cursor = request.args.get('cursor')
+            if cursor:
+                try:
+                    cursor_key = decode_history_cursor(cursor)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+        
         # 데이터베이스에서 사용자의 이력 조회
         if db:
-            histories_db = ConversionHistory.query.filter_by(user_id=user.id).order_by(ConversionHistory.created_at.desc()).all()
+            columns = [
+                ConversionHistory.id,
+                ConversionHistory.job_id,
+                ConversionHistory.filename,
+                ConversionHistory.created_at,
+                ConversionHistory.status
+            ]
+            if not summary_view:
+                columns.append(ConversionHistory.notes_json)
+            
+            # (user_id, created_at) 인덱스를 타도록 최신순 + id로 정렬
+            query = db.session.query(*columns).filter(ConversionHistory.user_id == user.id).order_by(
+                ConversionHistory.created_at.desc(), ConversionHistory.id.desc()
+            )
+            
+            if paginate:
+                if cursor_key:
+                    cursor_created_at, cursor_id = cursor_key
+                    if not isinstance(cursor_id, int):
+                        return jsonify({"error": "Invalid cursor"}), 400
+                    query = query.filter(or_(
+                        ConversionHistory.created_at < cursor_created_at,
+                        and_(ConversionHistory.created_at == cursor_created_at, ConversionHistory.id < cursor_id)
+                    ))
+                # 다음 페이지가 있는지 확인하기 위해 하나 더 조회
+                query = query.limit(limit + 1)
+            
+            rows = query.all()
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_history_cursor(rows[-1].created_at, rows[-1].id)
             
             result = []
-            for history in histories_db:
-                result.append({
+            for history in rows:
+                item = {
                     "id": history.id,
                     "job_id": history.job_id,
                     "filename": history.filename,
                     "created_at": history.created_at.isoformat() + "Z",
-                    "notes_json": history.notes_json or {},
                     "status": history.status
-                })
+                }
+                if not summary_view:
+                    item["notes_json"] = history.notes_json or {}
+                result.append(item)
             
+            if paginate:
+                return jsonify({"items": result, "next_cursor": next_cursor}), 200
             return jsonify(result), 200
         else:
             # 데이터베이스가 없을 경우 기존 방식으로 폴백
@@ -128,37 +234,71 @@ def get_my_history(user):
                 for job_dir in os.listdir(UPLOAD_FOLDER):
                     job_path = os.path.join(UPLOAD_FOLDER, job_dir)
                     
-                    if os.path.isdir(job_path):
-                        # result.json 파일이 있는지 확인
-                        result_file = os.path.join(job_path, "result.json")
-                        
-                        if os.path.exists(result_file):
-                            # 폴더의 수정 시간을 생성 시간으로 사용
-                            created_at = datetime.fromtimestamp(os.path.getctime(job_path))
-                            
-                            # PDF 파일 찾기
-                            pdf_files = [f for f in os.listdir(job_path) if f.endswith('.pdf')]
-                            filename = pdf_files[0] if pdf_files else 'unknown.pdf'
-                            
-                            # 결과 데이터 로드
-                            try:
-                                with open(result_file, 'r', encoding='utf-8') as f:
-                                    notes_json = json.load(f)
-                            except:
-                                notes_json = {}
-                            
-                            histories.append({
-                                "id": job_dir,
-                                "job_id": job_dir,
-                                "filename": filename,
-                                "created_at": created_at.isoformat() + "Z",
-                                "notes_json": notes_json
-                            })
+                    # result.json 파일이 있는 폴더만 이력으로 사용
+                    if os.path.isdir(job_path) and os.path.exists(os.path.join(job_path, "result.json")):
+                        # 폴더의 수정 시간을 생성 시간으로 사용
+                        histories.append((datetime.fromtimestamp(os.path.getctime(job_path)), job_dir))
+            
+            # 생성 시간 역순으로 정렬 (같은 시간이면 job_id 역순)
+            histories.sort(reverse=True)
+            if cursor_key:
+                if not isinstance(cursor_key[1], str):
+                    return jsonify({"error": "Invalid cursor"}), 400
+                histories = [key for key in histories if key < cursor_key]
+            next_cursor = None
+            if limit is not None and len(histories) > limit:
+                histories = histories[:limit]
+                next_cursor = encode_history_cursor(*histories[-1])
             
-            # 생성 시간 역순으로 정렬
-            histories.sort(key=lambda x: x['created_at'], reverse=True)
+            # 현재 페이지의 항목만 파일을 읽음
+            result = []
+            for created_at, job_dir in histories:
+                job_path = os.path.join(UPLOAD_FOLDER, job_dir)
+                
+                # PDF 파일 찾기
+                pdf_files = [f for f in os.listdir(job_path) if f.endswith('.pdf')]
+                filename = pdf_files[0] if pdf_files else 'unknown.pdf'
+                
+                item = {
+                    "id": job_dir,
+                    "job_id": job_dir,
+                    "filename": filename,
+                    "created_at": created_at.isoformat() + "Z"
+                }
+                
+                # 결과 데이터 로드 (summary 보기에서는 생략)
+                if not summary_view:
+                    try:
+                        with open(os.path.join(job_path, "result.json"), 'r', encoding='utf-8') as f:
+                            item["notes_json"] = json.load(f)
+                    except:
+                        item["notes_json"] = {}
+                
+                result.append(item)
             
-            return jsonify(histories), 200
+            if paginate:
+                return jsonify({"items": result, "next_cursor": next_cursor}), 200
+            return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@history_bp.route('/my/<job_id>/notes', methods=['GET'])
+@require_auth
+def get_my_history_notes(user, job_id):
+    """사용자 이력의 노트 내용 조회 (목록을 summary 보기로 받은 경우 필요할 때 조회)"""
+    try:
+        if db:
+            history = db.session.query(ConversionHistory.notes_json).filter_by(job_id=job_id, user_id=user.id).first()
+            if not history:
+                return jsonify({"error": "History not found"}), 404
+            return jsonify({"job_id": job_id, "notes_json": history.notes_json or {}}), 200
+        
+        # 데이터베이스가 없을 경우 result.json에서 조회
+        result_file = os.path.join(UPLOAD_FOLDER, job_id, "result.json")
+        if not os.path.exists(result_file):
+            return jsonify({"error": "History not found"}), 404
+        return raw_json_response({"job_id": job_id}, "notes_json", read_result_bytes(result_file))
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -177,9 +317,8 @@ def get_history_detail(job_id):
         if not os.path.exists(result_file):
             return jsonify({"error": "Result file not found"}), 404
         
-        # 결과 데이터 로드
-        with open(result_file, 'r', encoding='utf-8') as f:
-            result_data = json.load(f)
+        # 결과 데이터 로드 (변경되지 않았으면 캐시된 원본 사용)
+        result_raw = read_result_bytes(result_file)
         
         # 메타 정보 수집
         created_at = datetime.fromtimestamp(os.path.getctime(job_path))
@@ -191,11 +330,11 @@ def get_history_detail(job_id):
             "job_id": job_id,
             "filename": filename,
             "created_at": created_at.isoformat() + "Z",
-            "notes_json": result_data,
-            "files": os.listdir(job_path)
+            # 작업 디렉토리의 내부 폴더(exports/, checkpoints/, pages/ 등)는 제외
+            "files": [f for f in os.listdir(job_path) if os.path.isfile(os.path.join(job_path, f))]
         }
         
-        return jsonify(history_detail), 200
+        return raw_json_response(history_detail, "notes_json", result_raw)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -241,6 +380,8 @@ def delete_my_history(user, job_id):
             # 데이터베이스에서 삭제
             db.session.delete(history)
             db.session.commit()
+            auth_cache.invalidate_job(job_id)
+            search_index.remove(job_id)
             print(f"데이터베이스에서 이력 삭제됨: job_id={job_id}, user_id={user.id}")
         
         # 2. file/<jobId> 디렉토리 삭제
@@ -282,6 +423,8 @@ def delete_history(user, job_id):
             # 데이터베이스에서 삭제
             db.session.delete(history)
             db.session.commit()
+            auth_cache.invalidate_job(job_id)
+            search_index.remove(job_id)
         
         job_path = os.path.join(UPLOAD_FOLDER, job_id)
         
@@ -298,7 +441,13 @@ def delete_history(user, job_id):
 
 @history_bp.route('/export/<job_id>', methods=['GET'])
 def export_result(job_id):
-    """결과를 JSON 파일로 내보내기"""
+    """결과 파일 내보내기
+    
+    Query parameters:
+        format: json(기본값), ndjson(슬라이드별 한 줄), md(Markdown), json.gz(압축 JSON)
+    
+    변환된 파일은 작업 디렉토리에 저장되어 재사용되며, Range / 조건부 요청을 지원합니다.
+    """
     try:
         job_path = os.path.join(UPLOAD_FOLDER, job_id)
         result_file = os.path.join(job_path, "result.json")
@@ -306,81 +455,58 @@ def export_result(job_id):
         if not os.path.exists(result_file):
             return jsonify({"error": "Result file not found"}), 404
         
+        export_format = request.args.get('format', 'json')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        export_file = get_export_file(job_path, export_format)
+        extension, mimetype = EXPORT_FORMATS[export_format]
+        
         # 파일명에 타임스탬프 추가
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        export_filename = f"notes_export_{timestamp}.json"
+        export_filename = f"notes_export_{timestamp}.{extension}"
         
         return send_file(
-            result_file, 
+            export_file, 
             as_attachment=True, 
             download_name=export_filename,
-            mimetype='application/json'
+            mimetype=mimetype,
+            conditional=True,
+            etag=True,
+            max_age=0
         )
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @history_bp.route('/search', methods=['GET'])
-def search_history():
-    """이력 검색"""
+@require_auth
+def search_history(user):
+    """이력 검색 (현재 사용자의 노트에서 전문 검색, 관련도 순)
+    
+    Query parameters:
+        q: 검색어 (공백으로 구분된 모든 단어를 포함하는 슬라이드를 찾음)
+        limit: 페이지 크기 (기본 20, 최대 100)
+        offset: 건너뛸 결과 수
+    """
     try:
-        query = request.args.get('q', '').lower()
+        query = request.args.get('q', '').strip()
         
         if not query:
             return jsonify({"error": "Search query is required"}), 400
         
-        histories = []
+        limit = min(max(request.args.get('limit', SEARCH_PAGE_DEFAULT, type=int), 1), SEARCH_PAGE_MAX)
+        offset = max(request.args.get('offset', 0, type=int), 0)
         
-        if os.path.exists(UPLOAD_FOLDER):
-            for job_dir in os.listdir(UPLOAD_FOLDER):
-                job_path = os.path.join(UPLOAD_FOLDER, job_dir)
-                
-                if os.path.isdir(job_path):
-                    result_file = os.path.join(job_path, "result.json")
-                    
-                    if os.path.exists(result_file):
-                        # PDF 파일 찾기
-                        pdf_files = [f for f in os.listdir(job_path) if f.endswith('.pdf')]
-                        filename = pdf_files[0] if pdf_files else 'unknown.pdf'
-                        
-                        # 파일명 또는 내용에서 검색
-                        match_filename = query in filename.lower()
-                        match_content = False
-                        
-                        # 결과 파일 내용에서 검색
-                        try:
-                            with open(result_file, 'r', encoding='utf-8') as f:
-                                content = f.read().lower()
-                                match_content = query in content
-                        except:
-                            pass
-                        
-                        if match_filename or match_content:
-                            created_at = datetime.fromtimestamp(os.path.getctime(job_path))
-                            
-                            try:
-                                with open(result_file, 'r', encoding='utf-8') as f:
-                                    notes_json = json.load(f)
-                            except:
-                                notes_json = {}
-                            
-                            histories.append({
-                                "id": job_dir,
-                                "job_id": job_dir,
-                                "filename": filename,
-                                "created_at": created_at.isoformat() + "Z",
-                                "notes_json": notes_json,
-                                "match_type": "filename" if match_filename else "content"
-                            })
-        
-        # 생성 시간 역순으로 정렬
-        histories.sort(key=lambda x: x['created_at'], reverse=True)
+        results, total = search_index.search(user.id, query, limit=limit, offset=offset)
         
         return jsonify({
             "query": query,
-            "results": histories,
-            "total": len(histories)
+            "results": results,
+            "total": total,
+            "limit": limit,
+            "offset": offset
         }), 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
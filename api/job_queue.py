@@ -0,0 +1,305 @@
+"""
+영속 작업 큐
+업로드된 비실시간 처리 작업을 SQLite에 저장하고, 고정 크기 워커 풀이 하나씩 꺼내 처리하는 모듈
+
+- 동시에 실행되는 파이프라인 수를 워커 수로 제한하여 CPU, 메모리, API 할당량 경쟁을 막습니다.
+- 대기 중인 작업이 max_pending개를 넘으면 새 작업을 받지 않습니다 (QueueFullError).
+- 서버가 재시작되면 중단된 작업(실행 중이던 프로세스가 종료된 작업)을 다시 대기열에 넣습니다.
+- 여러 프로세스(gunicorn 워커 등)가 같은 큐를 열어도 잠금 파일(<db_path>.lock)을 얻은 한 프로세스만 워커를 실행하므로
+  전체 동시 처리 수는 num_workers로 유지됩니다. 나머지 프로세스는 작업 등록만 하고, 잠금을 가진 프로세스가 종료되면 이어받습니다.
+- 파이프라인 단계는 동시에 실행되므로 큐는 단계를 기록하지 않으며, 완료된 단계는 핸들러가 체크포인트로 건너뜁니다.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 프로세스마다 워커 실행
+    fcntl = None
+
+# 작업 상태
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+# 새 작업이 없을 때 큐를 다시 확인하는 간격 (다른 프로세스가 넣은 작업 감지용)
+POLL_INTERVAL_SEC = 2.0
+
+
+class QueueFullError(Exception):
+    """대기 중인 작업이 너무 많아 새 작업을 받을 수 없을 때 발생하는 예외"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _pid_alive(pid: int) -> bool:
+    """같은 호스트에서 해당 프로세스가 살아있는지 확인합니다."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """SQLite 기반 작업 큐와 고정 크기 워커 풀"""
+
+    def __init__(self,
+                 db_path: str,
+                 handler: Callable[[str, Dict[str, Any]], bool],
+                 num_workers: int = 2,
+                 max_pending: int = 20,
+                 on_recover: Optional[Callable[[str], None]] = None):
+        """초기화 함수
+
+        Args:
+            db_path: 큐를 저장할 SQLite 파일 경로
+            handler: 작업 처리 함수 ``handler(job_id, payload)`` (성공 시 True 반환)
+            num_workers: 동시에 처리할 작업 수
+            max_pending: 대기 + 실행 중인 작업의 최대 개수 (admission control)
+            on_recover: 중단되었다가 다시 대기열에 들어간 작업마다 호출할 함수 ``on_recover(job_id)``
+        """
+        self.db_path = db_path
+        self.handler = handler
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.on_recover = on_recover
+        self.lock_path = db_path + '.lock'
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._lock_file = None
+
+    @contextmanager
+    def _connect(self):
+        """작업마다 새 연결을 열고 닫습니다. (sqlite3 연결은 스레드 간 공유 불가)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    owner TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)")
+
+    def start(self) -> bool:
+        """큐를 초기화하고, 소비자 잠금을 얻으면 워커를 시작합니다.
+
+        다른 프로세스가 잠금을 갖고 있으면 이 프로세스는 작업 등록만 처리하고,
+        백그라운드 스레드가 잠금을 기다렸다가 그 프로세스가 종료되면 워커를 시작합니다.
+
+        Returns:
+            이 프로세스에서 바로 워커를 시작했으면 True
+        """
+        self._init_schema()
+        if self._acquire_consumer_lock(blocking=False):
+            self._start_workers()
+            return True
+
+        print("작업 큐: 다른 프로세스가 워커를 실행 중이므로 작업 등록만 처리합니다")
+        threading.Thread(target=self._wait_for_consumer_lock, name="job-queue-lock", daemon=True).start()
+        return False
+
+    def _acquire_consumer_lock(self, blocking: bool) -> bool:
+        """워커를 실행할 프로세스를 하나로 정하는 잠금을 얻습니다. (프로세스가 종료되면 OS가 해제)"""
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+            self._lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+
+    def _wait_for_consumer_lock(self):
+        self._acquire_consumer_lock(blocking=True)
+        if not self._stopped.is_set():
+            print("작업 큐: 워커를 실행하던 프로세스가 종료되어 워커를 이어받습니다")
+            self._start_workers()
+
+    def _start_workers(self):
+        recovered = self._recover_interrupted()
+        if self.on_recover:
+            for job_id in recovered:
+                self.on_recover(job_id)
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        print(f"작업 큐 시작: 워커 {self.num_workers}개, 재개할 작업 {len(recovered)}개")
+
+    def stop(self):
+        """워커에게 종료를 알립니다. 실행 중인 작업은 끝날 때까지 기다리지 않습니다."""
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _recover_interrupted(self) -> List[str]:
+        """실행 중이던 프로세스가 종료된 작업을 다시 대기열에 넣습니다."""
+        hostname = socket.gethostname()
+        recovered = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("SELECT job_id, owner FROM jobs WHERE status = ?", (STATUS_RUNNING,)).fetchall()
+            for row in rows:
+                host, _, pid = (row['owner'] or '').rpartition(':')
+                if host == hostname and pid.isdigit() and _pid_alive(int(pid)) and int(pid) != os.getpid():
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE job_id = ?",
+                    (STATUS_QUEUED, _now(), row['job_id'])
+                )
+                recovered.append(row['job_id'])
+            conn.execute("COMMIT")
+        return recovered
+
+    def active_count(self) -> int:
+        """대기 중이거나 실행 중인 작업 수를 반환합니다."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_RUNNING)
+            ).fetchone()
+        return row[0]
+
+    def has_capacity(self) -> bool:
+        """새 작업을 받을 수 있는지 확인합니다."""
+        return self.active_count() < self.max_pending
+
+    def submit(self, job_id: str, payload: Dict[str, Any]):
+        """작업을 대기열에 추가합니다.
+
+        Raises:
+            QueueFullError: 대기 + 실행 중인 작업이 max_pending개 이상일 때
+        """
+        now = _now()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_RUNNING)
+            ).fetchone()[0]
+            if active >= self.max_pending:
+                conn.execute("ROLLBACK")
+                raise QueueFullError(f"대기 중인 작업이 너무 많습니다 ({active}/{self.max_pending})")
+            conn.execute(
+                "INSERT INTO jobs (job_id, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, json.dumps(payload, ensure_ascii=False), STATUS_QUEUED, now, now)
+            )
+            conn.execute("COMMIT")
+        self._wakeup.set()
+
+    def requeue(self, job_id: str) -> bool:
+        """실패한 작업을 다시 대기열에 넣습니다.
+
+        Returns:
+            다시 대기열에 들어갔으면 True, 작업이 없거나 실패 상태가 아니면 False
+
+        Raises:
+            QueueFullError: 대기 + 실행 중인 작업이 max_pending개 이상일 때
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (STATUS_QUEUED, STATUS_RUNNING)
+            ).fetchone()[0]
+            if active >= self.max_pending:
+                conn.execute("ROLLBACK")
+                raise QueueFullError(f"대기 중인 작업이 너무 많습니다 ({active}/{self.max_pending})")
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated_at = ? WHERE job_id = ? AND status = ?",
+                (STATUS_QUEUED, _now(), job_id, STATUS_FAILED)
+            )
+            conn.execute("COMMIT")
+        if cursor.rowcount:
+            self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 정보를 조회합니다."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        return job
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """가장 오래된 대기 작업 하나를 이 워커의 실행 중 작업으로 가져옵니다."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (STATUS_QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (STATUS_RUNNING, self.owner, _now(), row['job_id'])
+            )
+            conn.execute("COMMIT")
+        return row
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, error = ?, updated_at = ? WHERE job_id = ?",
+                (status, error, _now(), job_id)
+            )
+
+    def _worker_loop(self):
+        while not self._stopped.is_set():
+            try:
+                row = self._claim()
+            except sqlite3.Error as e:
+                print(f"작업 큐 조회 오류: {e}")
+                row = None
+
+            if row is None:
+                self._wakeup.wait(POLL_INTERVAL_SEC)
+                self._wakeup.clear()
+                continue
+
+            job_id = row['job_id']
+            started = time.monotonic()
+            try:
+                success = self.handler(job_id, json.loads(row['payload']))
+                self._finish(job_id, STATUS_COMPLETED if success else STATUS_FAILED)
+            except Exception as e:
+                print(f"작업 처리 오류 (job_id={job_id}): {e}")
+                self._finish(job_id, STATUS_FAILED, str(e))
+            print(f"작업 종료 (job_id={job_id}, {time.monotonic() - started:.1f}초)")
@@ -0,0 +1,304 @@
+"""
+작업 상태/결과 저장소
+비실시간 처리 작업의 진행 상태와 결과를 저장하는 모듈
+
+- MemoryJobStore: 프로세스 메모리에 저장 (개발용, 항목 수 제한 + TTL)
+- SQLiteJobStore: SQLite 파일에 저장 (gunicorn 워커 여러 개가 같은 상태를 공유, TTL)
+
+JOB_STORE_BACKEND 환경 변수로 선택하며, 오래된 항목은 TTL이 지나면 삭제됩니다.
+SQLite 저장소는 스레드마다 연결을 하나씩 재사용하고, 진행률만 바뀐 상태 갱신은
+JOB_STATUS_PROGRESS_INTERVAL_SEC 간격으로 모아서 마지막 값만 씁니다.
+
+상태에는 갱신될 때마다 1씩 증가하는 version이 붙으며, wait_for_status로
+상태가 바뀔 때까지 기다릴 수 있습니다 (long-poll, SSE 진행률 스트림용).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+# 저장소 설정
+JOB_STORE_BACKEND = os.getenv('JOB_STORE_BACKEND', 'sqlite')  # sqlite 또는 memory
+JOB_STORE_TTL_SEC = int(os.getenv('JOB_STORE_TTL_SEC', str(24 * 60 * 60)))
+JOB_STORE_MAX_ENTRIES = int(os.getenv('JOB_STORE_MAX_ENTRIES', '1000'))
+# 진행률만 바뀐 상태를 SQLite에 쓰는 최소 간격(초) (0이면 매번 씀)
+JOB_STATUS_PROGRESS_INTERVAL_SEC = float(os.getenv('JOB_STATUS_PROGRESS_INTERVAL_SEC', '0.5'))
+
+# SQLite 저장소에서 만료 항목을 정리하는 최소 간격
+PURGE_INTERVAL_SEC = 60.0
+# 다른 프로세스의 상태 변경을 확인하는 간격 (같은 프로세스의 변경은 즉시 알림)
+STATUS_POLL_INTERVAL_SEC = 0.5
+
+KIND_STATUS = 'status'
+KIND_RESULT = 'result'
+
+
+class JobStoreBase(ABC):
+    """저장소 공통 기능: 상태 변경 알림과 대기 (백엔드는 아래 추상 메서드를 모두 구현해야 함)"""
+
+    # 다른 프로세스에서 상태가 바뀔 수 있으면 주기적으로 다시 조회
+    poll_interval: Optional[float] = None
+
+    def __init__(self):
+        self._changed = threading.Condition()
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    @abstractmethod
+    def set_status(self, job_id: str, status: Dict[str, Any]):
+        """작업 상태를 저장하고 version을 올립니다."""
+
+    @abstractmethod
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태를 반환합니다. 없거나 만료되었으면 None"""
+
+    @abstractmethod
+    def set_result(self, job_id: str, result: Any):
+        """작업 결과를 저장합니다."""
+
+    @abstractmethod
+    def get_result(self, job_id: str) -> Any:
+        """작업 결과를 반환합니다. 없거나 만료되었으면 None"""
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        """작업 상태와 결과를 삭제합니다."""
+
+    def wait_for_status(self, job_id: str, known_version: Optional[int], timeout: float) -> Optional[Dict[str, Any]]:
+        """상태의 version이 known_version과 달라질 때까지 최대 timeout초 기다립니다.
+
+        Args:
+            job_id: 작업 ID
+            known_version: 클라이언트가 마지막으로 받은 version (None이면 바로 반환)
+            timeout: 최대 대기 시간(초)
+
+        Returns:
+            현재 상태 (시간이 지나도 바뀌지 않았으면 같은 version의 상태, 작업이 없으면 None)
+        """
+        deadline = time.monotonic() + timeout
+        # 확인과 대기 사이에 온 알림을 놓치지 않도록 조건 변수를 잡은 채로 확인
+        with self._changed:
+            while True:
+                status = self.get_status(job_id)
+                if status is None or known_version is None or status.get('version') != known_version:
+                    return status
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return status
+                wait = remaining if self.poll_interval is None else min(remaining, self.poll_interval)
+                self._changed.wait(wait)
+
+
+class MemoryJobStore(JobStoreBase):
+    """프로세스 메모리 기반 저장소 (LRU + TTL)"""
+
+    def __init__(self, ttl: int = JOB_STORE_TTL_SEC, max_entries: int = JOB_STORE_MAX_ENTRIES):
+        """초기화 함수
+
+        Args:
+            ttl: 항목 유지 시간(초)
+            max_entries: 상태/결과 각각의 최대 항목 수
+        """
+        super().__init__()
+        self._lock = threading.Lock()
+        self._status = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._results = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    def set_status(self, job_id: str, status: Dict[str, Any]):
+        with self._lock:
+            previous = self._status.get(job_id)
+            version = previous['version'] + 1 if previous else 1
+            self._status[job_id] = dict(status, version=version)
+        self._notify()
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._status.get(job_id)
+
+    def set_result(self, job_id: str, result: Any):
+        with self._lock:
+            self._results[job_id] = result
+
+    def get_result(self, job_id: str) -> Any:
+        with self._lock:
+            return self._results.get(job_id)
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._status.pop(job_id, None)
+            self._results.pop(job_id, None)
+
+
+class SQLiteJobStore(JobStoreBase):
+    """SQLite 파일 기반 저장소 (여러 프로세스에서 공유, TTL)"""
+
+    poll_interval = STATUS_POLL_INTERVAL_SEC
+
+    def __init__(self,
+                 db_path: str,
+                 ttl: int = JOB_STORE_TTL_SEC,
+                 progress_interval: float = JOB_STATUS_PROGRESS_INTERVAL_SEC):
+        """초기화 함수
+
+        Args:
+            db_path: SQLite 파일 경로
+            ttl: 항목 유지 시간(초)
+            progress_interval: 진행률만 바뀐 상태를 쓰는 최소 간격(초)
+        """
+        super().__init__()
+        self.db_path = db_path
+        self.ttl = ttl
+        self.progress_interval = progress_interval
+        self._last_purge = 0.0
+        self._purge_lock = threading.Lock()
+        self._local = threading.local()
+
+        # 진행률 갱신 모으기: 작업별 마지막으로 쓴 (시각, 상태)와 아직 쓰지 않은 마지막 상태
+        # (항목은 간격이 지나면 만료되어, 그 다음 갱신은 바로 씀)
+        self._status_lock = threading.Lock()
+        self._last_written: TTLCache = TTLCache(maxsize=JOB_STORE_MAX_ENTRIES, ttl=max(progress_interval, 0.001))
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_store (
+                    job_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, kind)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_job_store_expires ON job_store (expires_at)")
+
+    @contextmanager
+    def _connect(self):
+        """이 스레드의 연결을 반환합니다. (sqlite3 연결은 스레드 간 공유 불가, 스레드가 끝나면 함께 정리됨)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        try:
+            yield conn
+        except Exception:
+            # 오류로 끝난 트랜잭션이 다음 요청에 남지 않도록 정리
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    def _purge_expired(self, conn: sqlite3.Connection, now: float):
+        """만료된 항목을 삭제합니다. 쓰기마다 실행하지 않도록 간격을 둡니다."""
+        with self._purge_lock:
+            if now - self._last_purge < PURGE_INTERVAL_SEC:
+                return
+            self._last_purge = now
+        conn.execute("DELETE FROM job_store WHERE expires_at < ?", (now,))
+
+    def _set(self, job_id: str, kind: str, value: Any):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_store (job_id, kind, data, expires_at) VALUES (?, ?, ?, ?)",
+                (job_id, kind, json.dumps(value, ensure_ascii=False), now + self.ttl)
+            )
+            self._purge_expired(conn, now)
+
+    def _get(self, job_id: str, kind: str) -> Any:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM job_store WHERE job_id = ? AND kind = ? AND expires_at >= ?",
+                (job_id, kind, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_status(self, job_id: str, status: Dict[str, Any]):
+        with self._status_lock:
+            last = self._last_written.get(job_id)
+            if last is not None and _progress_only(last[1], status):
+                # 간격 안에 들어온 진행률 갱신은 마지막 값만 남겨 두었다가 간격이 끝날 때 씀
+                if job_id not in self._pending:
+                    delay = last[0] + self.progress_interval - time.monotonic()
+                    timer = threading.Timer(max(delay, 0), self._flush_pending, args=(job_id,))
+                    timer.daemon = True
+                    timer.start()
+                self._pending[job_id] = status
+                return
+            self._pending.pop(job_id, None)
+            self._write_status(job_id, status)
+
+    def _flush_pending(self, job_id: str):
+        with self._status_lock:
+            status = self._pending.pop(job_id, None)
+            if status is not None:
+                self._write_status(job_id, status)
+
+    def _write_status(self, job_id: str, status: Dict[str, Any]):
+        """상태를 쓰고 version을 올립니다. (순서가 바뀌지 않도록 _status_lock 안에서 호출)"""
+        if self.progress_interval > 0:
+            self._last_written[job_id] = (time.monotonic(), status)
+        now = time.time()
+        with self._connect() as conn:
+            # 여러 프로세스가 동시에 갱신해도 version이 겹치지 않도록 쓰기 잠금 안에서 증가
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT data FROM job_store WHERE job_id = ? AND kind = ? AND expires_at >= ?",
+                (job_id, KIND_STATUS, now)
+            ).fetchone()
+            version = json.loads(row[0]).get('version', 0) + 1 if row else 1
+            conn.execute(
+                "INSERT OR REPLACE INTO job_store (job_id, kind, data, expires_at) VALUES (?, ?, ?, ?)",
+                (job_id, KIND_STATUS, json.dumps(dict(status, version=version), ensure_ascii=False), now + self.ttl)
+            )
+            self._purge_expired(conn, now)
+            conn.execute("COMMIT")
+        self._notify()
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._get(job_id, KIND_STATUS)
+
+    def set_result(self, job_id: str, result: Any):
+        self._set(job_id, KIND_RESULT, result)
+
+    def get_result(self, job_id: str) -> Any:
+        return self._get(job_id, KIND_RESULT)
+
+    def delete(self, job_id: str):
+        with self._status_lock:
+            self._pending.pop(job_id, None)
+            self._last_written.pop(job_id, None)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_store WHERE job_id = ?", (job_id,))
+
+
+def _progress_only(previous: Dict[str, Any], status: Dict[str, Any]) -> bool:
+    """두 상태가 진행률(progress)만 다른지 확인합니다."""
+    keys = (previous.keys() | status.keys()) - {'progress'}
+    return all(previous.get(key) == status.get(key) for key in keys)
+
+
+def create_job_store(data_dir: str):
+    """JOB_STORE_BACKEND 설정에 맞는 저장소를 만듭니다.
+
+    Args:
+        data_dir: SQLite 저장소 기본 경로의 상위 디렉토리
+
+    Returns:
+        MemoryJobStore 또는 SQLiteJobStore
+    """
+    if JOB_STORE_BACKEND == 'memory':
+        return MemoryJobStore()
+    if JOB_STORE_BACKEND == 'sqlite':
+        db_path = os.getenv('JOB_STORE_PATH', os.path.join(data_dir, 'job_store.sqlite3'))
+        return SQLiteJobStore(db_path)
+    raise ValueError(f"지원하지 않는 JOB_STORE_BACKEND입니다: {JOB_STORE_BACKEND}")
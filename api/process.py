@@ -5,15 +5,16 @@ PDF와 오디오 파일을 받아 STT, 이미지 캡셔닝, 세그먼트 매핑,
 
 import os
 import json
+import shutil
 import uuid
-import threading
+import time
 from contextlib import nullcontext
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
 import jwt
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
 
@@ -21,11 +22,18 @@ from werkzeug.utils import secure_filename
 load_dotenv()
 
 # 기존 모듈 import
-from src.convert_audio import transcribe_audio
+from src.convert_audio import transcribe_audio, lookup_cached_transcript
 from src.image_captioning import image_captioning
 from src.segment_mapping import segment_mapping
 from src.segment_splitter import segment_split
 from src.summary import create_summary
+from src.pipeline import Stage, run_pipeline
+from src.checkpoint import CheckpointStore, input_signature
+from .job_queue import JobQueue, QueueFullError
+from .job_store import create_job_store
+from . import auth_cache
+from .result_cache import raw_json_response, read_result_bytes
+from .search_index import index_result_file
 
 # Blueprint 생성
 process_bp = Blueprint('process', __name__)
@@ -70,6 +78,10 @@ def init_db(app_db, user_model, conversion_history_model, flask_app=None):
     User = user_model
     ConversionHistory = conversion_history_model
     app = flask_app
+    
+    # 작업을 처리할 Flask 앱이 준비된 경우에만 워커 시작
+    if flask_app is not None:
+        init_job_queue()
 
 def verify_jwt_token(token):
     """JWT 토큰 검증"""
@@ -92,7 +104,20 @@ def get_current_user():
     if not user_id:
         return None
     
-    return db.session.get(User, user_id) if db else None
+    if not db:
+        return None
+    # 상태 조회 polling마다 사용자 조회 쿼리가 실행되지 않도록 짧은 시간 캐시
+    return auth_cache.get_user(user_id, lambda uid: db.session.get(User, uid))
+
+def user_owns_job(user, job_id):
+    """작업 소유자 확인 (캐시 사용)"""
+    if not db:
+        return True
+    return auth_cache.is_job_owner(
+        job_id,
+        user.id,
+        lambda jid, uid: ConversionHistory.query.filter_by(job_id=jid, user_id=uid).first() is not None
+    )
 
 def require_auth(f):
     """인증 데코레이터"""
@@ -110,10 +135,51 @@ def require_auth(f):
 UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'file')
 DATA_DIR = os.getenv('DATA_DIR', 'data')
 
-# 작업 상태 저장소
-job_status = {}
-job_results = {}
-job_lock = threading.Lock()
+# 작업 상태/결과 저장소 (JOB_STORE_BACKEND: sqlite는 여러 워커가 공유, memory는 개발용)
+job_store = create_job_store(DATA_DIR)
+
+# 진행률 long-poll / SSE 설정
+STATUS_LONG_POLL_MAX_SEC = 30  # wait 파라미터 최대값
+STATUS_EVENTS_MAX_SEC = int(os.getenv('STATUS_EVENTS_MAX_SEC', '300'))  # SSE 연결 유지 시간 (이후 클라이언트가 재연결)
+STATUS_EVENTS_HEARTBEAT_SEC = 15  # 프록시가 연결을 끊지 않도록 보내는 주석 간격
+FINISHED_STATUSES = ('completed', 'failed')
+
+# 작업 큐 설정 (서버 전체에서 동시에 실행할 파이프라인 수, 대기 + 실행 중인 작업의 최대 개수)
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join(DATA_DIR, 'job_queue.sqlite3'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_QUEUE_MAX_PENDING = int(os.getenv('JOB_QUEUE_MAX_PENDING', '20'))
+job_queue = None
+
+def init_job_queue():
+    """작업 큐를 만들고 워커를 시작합니다. 중단되었던 작업은 다시 대기열에 들어갑니다.
+
+    여러 프로세스로 실행해도 워커는 한 프로세스에서만 실행되므로 JOB_WORKERS는 서버 전체의 동시 처리 수입니다.
+    """
+    global job_queue
+    if job_queue is not None:
+        return
+    job_queue = JobQueue(
+        JOB_QUEUE_PATH,
+        run_queued_job,
+        num_workers=JOB_WORKERS,
+        max_pending=JOB_QUEUE_MAX_PENDING,
+        on_recover=notify_recovered_job
+    )
+    job_queue.start()
+
+def notify_recovered_job(job_id):
+    """중단되었다가 다시 대기열에 들어간 작업의 상태를 갱신합니다."""
+    update_job_status(job_id, 0, "서버 재시작으로 중단된 작업을 다시 대기 중...", 'queued')
+
+def run_queued_job(job_id, payload):
+    """작업 큐 워커에서 호출되는 핸들러 (재개/재시도 시 완료된 단계는 체크포인트에서 읽어옴)"""
+    return process_files_background(
+        job_id,
+        payload['audio_path'],
+        payload['doc_path'],
+        payload.get('user_id'),
+        payload.get('skip_transcription', False)
+    )
 
 def generate_job_id():
     """고유한 job_id 생성"""
@@ -122,28 +188,24 @@ def generate_job_id():
 
 def update_job_status(job_id, progress, message, status='processing'):
     """작업 상태 업데이트"""
-    with job_lock:
-        job_status[job_id] = {
-            'job_id': job_id,
-            'progress': progress,
-            'message': message,
-            'status': status
-        }
+    job_store.set_status(job_id, {
+        'job_id': job_id,
+        'progress': progress,
+        'message': message,
+        'status': status
+    })
 
 def get_job_status(job_id):
     """작업 상태 조회"""
-    with job_lock:
-        return job_status.get(job_id)
+    return job_store.get_status(job_id)
 
 def set_job_result(job_id, result):
     """작업 결과 저장"""
-    with job_lock:
-        job_results[job_id] = result
+    job_store.set_result(job_id, result)
 
 def get_job_result(job_id):
     """작업 결과 조회"""
-    with job_lock:
-        return job_results.get(job_id)
+    return job_store.get_result(job_id)
 
 @process_bp.route('/start-process-v2', methods=['POST'])
 @require_auth
@@ -163,6 +225,12 @@ def start_process_v2(user):
         # skip_transcription 플래그 확인
         skip_transcription = request.form.get('skip_transcription') == 'true'
         
+        # 대기열이 가득 찼으면 파일을 저장하기 전에 거절
+        if job_queue is None:
+            init_job_queue()
+        if not job_queue.has_capacity():
+            return jsonify({"error": "Too many jobs in progress, please retry later"}), 503, {"Retry-After": "60"}
+        
         # job_id 생성
         job_id = generate_job_id()
         
@@ -195,11 +263,29 @@ def start_process_v2(user):
                 print(f"데이터베이스 저장 오류: {db_error}")
                 db.session.rollback()
         
-        # 백그라운드에서 처리 시작
-        threading.Thread(
-            target=process_files_background,
-            args=(job_id, audio_path, doc_path, user.id if user else None, skip_transcription)
-        ).start()
+        # 작업 큐에 추가 (워커 풀에서 순서대로 처리)
+        try:
+            job_queue.submit(job_id, {
+                "audio_path": audio_path,
+                "doc_path": doc_path,
+                "user_id": user.id if user else None,
+                "skip_transcription": skip_transcription
+            })
+        except QueueFullError:
+            # 시작하지 못한 작업의 이력은 실패로 남기고 업로드한 파일은 삭제
+            update_job_status(job_id, 0, "대기열이 가득 차 작업을 시작하지 못했습니다.", 'failed')
+            if db:
+                try:
+                    history = ConversionHistory.query.filter_by(job_id=job_id, user_id=user.id).first()
+                    if history:
+                        history.status = 'failed'
+                        db.session.commit()
+                except Exception as db_error:
+                    print(f"데이터베이스 업데이트 오류: {db_error}")
+                    db.session.rollback()
+            shutil.rmtree(job_dir, ignore_errors=True)
+            return jsonify({"error": "Too many jobs in progress, please retry later"}), 503, {"Retry-After": "60"}
+        update_job_status(job_id, 0, "대기 중...", 'queued')
         
         return jsonify({"job_id": job_id}), 200
         
@@ -212,19 +298,86 @@ def process_status_v2(user, job_id):
     """처리 상태 조회"""
     try:
         # 권한 확인
-        if db:
-            history = ConversionHistory.query.filter_by(job_id=job_id, user_id=user.id).first()
-            if not history:
-                return jsonify({"error": "Job not found"}), 404
+        if not user_owns_job(user, job_id):
+            return jsonify({"error": "Job not found"}), 404
         
-        status = get_job_status(job_id)
+        # If-None-Match로 마지막으로 받은 version을 보내면, 상태가 바뀔 때까지 최대 wait초 기다림 (long-poll)
+        known_version = parse_status_etag(request.headers.get('If-None-Match'))
+        wait = min(max(request.args.get('wait', 0, type=float), 0), STATUS_LONG_POLL_MAX_SEC)
+        if known_version is not None and wait > 0:
+            status = job_store.wait_for_status(job_id, known_version, wait)
+        else:
+            status = get_job_status(job_id)
         if not status:
             return jsonify({"error": "Job not found"}), 404
         
-        return jsonify(status), 200
+        etag = status_etag(status)
+        if known_version is not None and status.get('version') == known_version:
+            return Response(status=304, headers={"ETag": etag})
+        
+        return jsonify(status), 200, {"ETag": etag, "Cache-Control": "no-cache"}
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def status_etag(status):
+    """상태 version으로 ETag 값을 만듭니다."""
+    return f'"{status.get("version", 0)}"'
+
+def parse_status_etag(value):
+    """If-None-Match 헤더에서 version을 읽습니다. 없거나 형식이 다르면 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith('W/'):
+        value = value[2:]
+    value = value.strip('"')
+    return int(value) if value.isdigit() else None
+
+@process_bp.route('/process-events-v2/<job_id>', methods=['GET'])
+@require_auth
+def process_events_v2(user, job_id):
+    """처리 상태 스트림 (Server-Sent Events)
+    
+    상태가 바뀔 때마다 `event: status` 이벤트로 전체 상태(JSON)를 보내고, 작업이 끝나면 연결을 닫습니다.
+    STATUS_EVENTS_MAX_SEC가 지나면 연결을 닫으며, 클라이언트는 Last-Event-ID(version)로 재연결하면 됩니다.
+    """
+    try:
+        # 권한 확인 (연결 시작 시 한 번만)
+        if not user_owns_job(user, job_id):
+            return jsonify({"error": "Job not found"}), 404
+        
+        if not get_job_status(job_id):
+            return jsonify({"error": "Job not found"}), 404
+        
+        last_event_id = request.headers.get('Last-Event-ID')
+        known_version = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    
+    def generate(known_version):
+        deadline = time.monotonic() + STATUS_EVENTS_MAX_SEC
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            timeout = min(STATUS_EVENTS_HEARTBEAT_SEC, deadline - time.monotonic())
+            status = job_store.wait_for_status(job_id, known_version, timeout)
+            if status is None:
+                yield "event: error\ndata: {\"error\": \"Job not found\"}\n\n"
+                return
+            if status.get('version') == known_version:
+                yield ": keep-alive\n\n"
+                continue
+            known_version = status.get('version')
+            yield f"id: {known_version}\nevent: status\ndata: {json.dumps(status, ensure_ascii=False)}\n\n"
+            if status.get('status') in FINISHED_STATUSES:
+                return
+    
+    return Response(
+        stream_with_context(generate(known_version)),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @process_bp.route('/process-result-v2/<job_id>', methods=['GET'])
 @require_auth
@@ -232,17 +385,14 @@ def process_result_v2(user, job_id):
     """처리 결과 조회"""
     try:
         # 권한 확인
-        if db:
-            history = ConversionHistory.query.filter_by(job_id=job_id, user_id=user.id).first()
-            if not history:
-                return jsonify({"error": "Job not found"}), 404
+        if not user_owns_job(user, job_id):
+            return jsonify({"error": "Job not found"}), 404
         
         # 파일에서 결과 조회
         result_path = os.path.join(UPLOAD_FOLDER, job_id, "result.json")
         if os.path.exists(result_path):
-            with open(result_path, 'r', encoding='utf-8') as f:
-                result_data = json.load(f)
-            return jsonify({"result": result_data}), 200
+            # 파일 내용을 다시 파싱/직렬화하지 않고 그대로 응답
+            return raw_json_response({}, "result", read_result_bytes(result_path))
         else:
             # 파일이 없으면 메모리에서 조회
             result = get_job_result(job_id)
@@ -253,6 +403,48 @@ def process_result_v2(user, job_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@process_bp.route('/retry-process-v2/<job_id>', methods=['POST'])
+@require_auth
+def retry_process_v2(user, job_id):
+    """실패한 작업 재시도 (완료된 단계는 체크포인트에서 이어서 진행)"""
+    try:
+        # 권한 확인
+        if db:
+            history = ConversionHistory.query.filter_by(job_id=job_id, user_id=user.id).first()
+            if not history:
+                return jsonify({"error": "Job not found"}), 404
+        
+        if job_queue is None:
+            init_job_queue()
+        
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        if job['status'] != 'failed':
+            return jsonify({"error": f"Only failed jobs can be retried (current status: {job['status']})"}), 409
+        
+        try:
+            requeued = job_queue.requeue(job_id)
+        except QueueFullError:
+            return jsonify({"error": "Too many jobs in progress, please retry later"}), 503, {"Retry-After": "60"}
+        if not requeued:
+            # 상태 확인 후 다른 요청이 먼저 재시도한 경우
+            return jsonify({"error": "Job is no longer in failed status"}), 409
+        
+        if db:
+            try:
+                history.status = 'processing'
+                db.session.commit()
+            except Exception as db_error:
+                print(f"데이터베이스 업데이트 오류: {db_error}")
+                db.session.rollback()
+        
+        update_job_status(job_id, 0, "재시도 대기 중...", 'queued')
+        return jsonify({"job_id": job_id}), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 def process_files_background(job_id, audio_path, doc_path, user_id=None, skip_transcription=False):
     """백그라운드에서 파일 처리"""
     # Flask 애플리케이션 컨텍스트 설정
@@ -263,60 +455,92 @@ def process_files_background(job_id, audio_path, doc_path, user_id=None, skip_tr
             # job 디렉토리 경로
             job_dir = os.path.join(UPLOAD_FOLDER, job_id)
             
-            # 1. STT 처리 (0-30%)
-            if not skip_transcription:
-                update_job_status(job_id, 5, "강의 스크립트 생성 중...")
-                stt_result = transcribe_audio(audio_path)
-                update_job_status(job_id, 15, "음성 변환 완료, 텍스트 세그먼트 분리 중...")
+            # 오디오 처리(STT → 세그먼트 분리)와 PDF 처리(이미지 캡셔닝)는
+            # 세그먼트 매핑 전까지 서로 독립적이므로 동시에 실행 (0-90%)
+            def run_stt(inputs, report):
+                if skip_transcription:
+                    # STT 건너뛰기: 같은 오디오의 캐시된 STT 결과만 사용
+                    report(1, 1, "강의 듣는 중")
+                    stt_result = lookup_cached_transcript(audio_path)
+                    if stt_result is None:
+                        print(f"캐시된 STT 결과가 없어 빈 세그먼트로 진행합니다: {audio_path}")
+                    return stt_result  # 캐시가 없으면 빈 세그먼트 데이터
                 
-                # 세그먼트 분리
-                segments_data = segment_split(stt_result)
-                total_segments = len(segments_data)
-                update_job_status(job_id, 30, f"세그먼트 분리 완료 (총 {total_segments}개 세그먼트)")
-            else:
-                # STT 건너뛰기
-                update_job_status(job_id, 30, "강의 듣는 중")
-                # .env에서 기본 STT 결과 경로 가져오기
-                stt_result_path = os.getenv('STT_RESULT_PATH', "data/stt_result/stt_result.json")
-                if os.path.exists(stt_result_path):
-                    with open(stt_result_path, 'r', encoding='utf-8') as f:
-                        stt_result = json.load(f)
-                    segments_data = segment_split(stt_result)
-                    total_segments = len(segments_data)
-                else:
-                    segments_data = []  # 파일이 없으면 빈 세그먼트 데이터
-                    total_segments = 0
+                report(0, 1, "강의 스크립트 생성 중...")
+                stt_result = transcribe_audio(audio_path)
+                if stt_result is None:
+                    raise Exception("음성 변환에 실패했습니다.")
+                report(1, 1, "음성 변환 완료, 텍스트 세그먼트 분리 중...")
+                return stt_result
             
-            # 2. 이미지 캡셔닝 (30-60%) - 진행률 실시간 업데이트
-            update_job_status(job_id, 30, "슬라이드 이미지 분석 시작...")
+            def run_segment_split(inputs, report):
+                stt_result = inputs["stt"]
+                if stt_result is None:
+                    return []
+                segments_data = segment_split(stt_result)
+                if isinstance(segments_data, dict) and "error" in segments_data:
+                    raise Exception(f"세그먼트 분리 실패: {segments_data['error']}")
+                report(1, 1, f"세그먼트 분리 완료 (총 {len(segments_data)}개 세그먼트)")
+                return segments_data
             
-            # image_captioning 함수에 progress callback 전달하여 실시간 업데이트
-            def image_progress_callback(current_slide, total_slides):
-                progress = 30 + int((current_slide / total_slides) * 30)
-                update_job_status(job_id, progress, f"슬라이드 {current_slide}/{total_slides} 이미지 분석 중...")
+            def run_image_captioning(inputs, report):
+                report(0, 1, "슬라이드 이미지 분석 시작...")
+                
+                # image_captioning 함수에 progress callback 전달하여 실시간 업데이트
+                def image_progress_callback(current_slide, total_slides):
+                    report(current_slide, total_slides, f"슬라이드 {current_slide}/{total_slides} 이미지 분석 중...")
+                
+                image_captions = image_captioning(doc_path, progress_callback=image_progress_callback)
+                report(1, 1, f"이미지 분석 완료 (총 {len(image_captions)}개 슬라이드)")
+                return image_captions
             
-            image_captions = image_captioning(doc_path, progress_callback=image_progress_callback)
-            total_slides = len(image_captions)
-            update_job_status(job_id, 60, f"이미지 분석 완료 (총 {total_slides}개 슬라이드), 세그먼트 매핑 시작...")
+            def run_segment_mapping(inputs, report):
+                report(0, 1, "세그먼트 매핑 시작...")
+                
+                def mapping_progress_callback(current_batch, total_batches):
+                    report(current_batch, total_batches, f"음성-슬라이드 매핑 {current_batch}/{total_batches} 배치 진행 중...")
+                
+                mapped_segments = segment_mapping(inputs["captions"], inputs["segments"], progress_callback=mapping_progress_callback)
+                mapped_count = sum(len(slide_data.get("Segments", {})) for slide_data in mapped_segments.values())
+                report(1, 1, f"매핑 완료 (총 {mapped_count}개 매핑), 필기 생성 시작...")
+                return mapped_segments
             
-            # 3. 세그먼트 매핑 (60-70%)
-            def mapping_progress_callback(current_batch, total_batches):
-                progress = 60 + int((current_batch / total_batches) * 10)
-                update_job_status(job_id, progress, f"음성-슬라이드 매핑 {current_batch}/{total_batches} 배치 진행 중...")
+            def run_summary(inputs, report):
+                report(0, 1, "필기 요약 생성 중...")
+                
+                # 요약 생성 진행률 업데이트를 위한 콜백 함수
+                def summary_progress_callback(current_slide, total_slides):
+                    report(current_slide, total_slides, f"슬라이드 {current_slide}/{total_slides} 요약 생성 중...")
+                
+                summary_notes = create_summary(inputs["captions"], inputs["mapping"], progress_callback=summary_progress_callback)
+                report(1, 1, "요약 생성 완료, 최종 결과 구조화 중...")
+                return summary_notes
             
-            mapped_segments = segment_mapping(image_captions, segments_data, progress_callback=mapping_progress_callback)
-            mapped_count = sum(len(slide_data.get("Segments", {})) for slide_data in mapped_segments.values())
-            update_job_status(job_id, 70, f"매핑 완료 (총 {mapped_count}개 매핑), 필기 생성 시작...")
+            # 단계 결과를 작업 디렉토리에 저장해 재시도/재개 시 완료된 단계는 건너뜀
+            checkpoints = CheckpointStore(
+                job_dir,
+                signature=input_signature(audio_path, doc_path, skip_transcription=skip_transcription)
+            )
             
-            # 4. 요약 필기 생성 (70-100%)
-            update_job_status(job_id, 70, "필기 요약 생성 중...")
+            # 가중치는 기존 단계별 진행률 구간(STT 15, 분리 15, 캡셔닝 30, 매핑 10, 요약 20)을 따름
+            stages = [
+                Stage("stt", checkpoints.wrap("stt", run_stt), weight=15),
+                Stage("segments", checkpoints.wrap("segments", run_segment_split), depends_on=("stt",), weight=15),
+                Stage("captions", checkpoints.wrap("captions", run_image_captioning), weight=30),
+                Stage("mapping", checkpoints.wrap("mapping", run_segment_mapping), depends_on=("captions", "segments"), weight=10),
+                Stage("summary", checkpoints.wrap("summary", run_summary), depends_on=("captions", "mapping"), weight=20),
+            ]
             
-            # 요약 생성 진행률 업데이트를 위한 콜백 함수
-            def summary_progress_callback(current_slide, total_slides):
-                progress = 70 + int((current_slide / total_slides) * 20)
-                update_job_status(job_id, progress, f"슬라이드 {current_slide}/{total_slides} 요약 생성 중...")
+            last_message = ["처리 시작..."]
+            def pipeline_progress_callback(fraction, message):
+                if message:
+                    last_message[0] = message
+                update_job_status(job_id, int(fraction * 90), last_message[0])
             
-            summary_notes = create_summary(image_captions, mapped_segments, progress_callback=summary_progress_callback)
+            stage_results = run_pipeline(stages, progress_callback=pipeline_progress_callback)
+            image_captions = stage_results["captions"]
+            mapped_segments = stage_results["mapping"]
+            summary_notes = stage_results["summary"]
             update_job_status(job_id, 90, "요약 생성 완료, 최종 결과 구조화 중...")
             
             # main.py와 동일한 방식으로 최종 결과 생성
@@ -371,18 +595,25 @@ def process_files_background(job_id, audio_path, doc_path, user_id=None, skip_tr
             set_job_result(job_id, final_result)
             
             # 데이터베이스 업데이트 (처리 완료 전에 실행)
+            created_at = None
             if db and user_id:
                 try:
                     history = ConversionHistory.query.filter_by(job_id=job_id, user_id=user_id).first()
                     if history:
                         history.notes_json = final_result
                         history.status = 'completed'
+                        created_at = history.created_at
                         db.session.commit()
                 except Exception as db_error:
                     print(f"데이터베이스 업데이트 오류: {db_error}")
                     db.session.rollback()
             
+            # 검색 인덱스 업데이트
+            index_result_file(job_id, user_id, os.path.basename(doc_path), result_path,
+                              created_at=created_at, result=final_result)
+            
             update_job_status(job_id, 100, "처리 완료!", 'completed')
+            return True
             
         except Exception as e:
             update_job_status(job_id, 0, f"처리 중 오류 발생: {str(e)}", 'failed')
@@ -397,4 +628,4 @@ def process_files_background(job_id, audio_path, doc_path, user_id=None, skip_tr
                 except Exception as db_error:
                     print(f"데이터베이스 업데이트 오류: {db_error}")
                     db.session.rollback()
-
+            return False
@@ -16,11 +16,15 @@ from werkzeug.utils import secure_filename
 load_dotenv()
 
 # 기존 모듈 import
-from src.image_captioning import image_captioning, convert_pdf_to_images
+from src.image_captioning import image_captioning
+from src.page_store import PageImageStore
 from src.realtime_convert_audio import transcribe_audio_with_timestamps
 from src.segment_splitter import segment_split
 from src.post_process import post_process
 from src.summary import create_summary
+from src.llm_client import PRIORITY_REALTIME
+from .result_cache import raw_json_response, read_result_bytes
+from .search_index import index_result_file
 
 # Blueprint 생성
 realtime_bp = Blueprint('realtime', __name__)
@@ -109,7 +113,13 @@ def start_realtime(user):
                 
                 # 이미지 캡셔닝 수행
                 try:
-                    captioning_results = image_captioning(pdf_path)
+                    # 캡셔닝용 이미지를 렌더링하면서 stop-realtime에서 보여줄 이미지도 함께 저장
+                    captioning_results = image_captioning(
+                        pdf_path,
+                        priority=PRIORITY_REALTIME,
+                        page_store=PageImageStore(job_dir),
+                        extra_variants=("display",)
+                    )
                     result_path = os.path.join(job_dir, "captioning_results.json")
                     with open(result_path, 'w', encoding='utf-8') as f:
                         json.dump(captioning_results, f, ensure_ascii=False, indent=2)
@@ -174,66 +184,24 @@ def stop_realtime():
         
         pdf_path = os.path.join(job_dir, pdf_files[0])  # 첫 번째 PDF 파일 사용
         
-        # 이미지 저장 디렉토리 생성
-        image_dir = os.path.join(job_dir, 'image')
-        os.makedirs(image_dir, exist_ok=True)
-        print(f"[DEBUG] Image directory created: {image_dir}")
-        
-        # PDF를 이미지로 변환
+        # 슬라이드 이미지 준비 (start-realtime에서 이미 렌더링했거나 이전 호출에서 만든 이미지는 재사용)
         try:
-            from pdf2image import convert_from_path
-            print(f"[DEBUG] Converting PDF: {pdf_path}")
-            
-            # PDF를 이미지로 변환
-            images = convert_from_path(pdf_path, dpi=200, fmt='PNG')
-            print(f"[DEBUG] Converted {len(images)} pages from PDF")
-            
-            image_urls = []
-            successful_saves = 0
-            
-            # 모든 이미지를 저장하고 확인
-            for i, image in enumerate(images, 1):
-                # 이미지 파일명 생성 (1.png, 2.png, ...)
-                image_filename = f"{i}.png"
-                image_path = os.path.join(image_dir, image_filename)
-                
-                try:
-                    # 이미지를 PNG로 저장
-                    image.save(image_path, 'PNG', quality=95, optimize=True)
-                    print(f"[DEBUG] Saved image: {image_path}")
-                    
-                    # 파일이 실제로 생성되고 크기가 0이 아닌지 확인
-                    if os.path.exists(image_path) and os.path.getsize(image_path) > 0:
-                        file_size = os.path.getsize(image_path)
-                        print(f"[DEBUG] Image file verified, size: {file_size} bytes")
-                        
-                        # 이미지 URL 생성 (성공한 경우만)
-                        image_url = f"/file/{job_id}/image/{image_filename}"
-                        image_urls.append(image_url)
-                        successful_saves += 1
-                    else:
-                        print(f"[ERROR] Image file not created or empty: {image_path}")
-                        
-                except Exception as save_error:
-                    print(f"[ERROR] Failed to save image {i}: {save_error}")
-            
-            print(f"[DEBUG] Successfully saved {successful_saves}/{len(images)} images")
+            print(f"[DEBUG] Preparing slide images: {pdf_path}")
+            image_paths = PageImageStore(job_dir).ensure(pdf_path, "display")
+            print(f"[DEBUG] {len(image_paths)} slide images ready")
             
-            # 최소 하나 이상의 이미지가 성공적으로 저장된 경우에만 성공 응답
-            if successful_saves > 0:
+            # 최소 하나 이상의 이미지가 있는 경우에만 성공 응답
+            if image_paths:
+                image_urls = [f"/file/{job_id}/{path}" for path in image_paths]
                 print(f"[DEBUG] Returning {len(image_urls)} image URLs")
                 
-                # JSON 결과 파일 읽기
-                result_json = None
+                # JSON 결과 파일 읽기 (파싱하지 않고 원본 그대로 응답에 포함)
+                result_raw = None
                 result_path = os.path.join(UPLOAD_FOLDER, job_id, "result.json")
                 if os.path.exists(result_path):
-                    with open(result_path, 'r', encoding='utf-8') as f:
-                        result_json = json.load(f)
+                    result_raw = read_result_bytes(result_path)
                 
-                return jsonify({
-                    "image_urls": image_urls,
-                    "result_json": result_json
-                }), 200
+                return raw_json_response({"image_urls": image_urls}, "result_json", result_raw)
             else:
                 raise Exception("No images were successfully saved")
                 
@@ -359,7 +327,8 @@ def post_process_endpoint():
                 summary_notes = create_summary(
                     captioning_data, 
                     mapped_segments_for_summary, 
-                    progress_callback=summary_progress_callback
+                    progress_callback=summary_progress_callback,
+                    priority=PRIORITY_REALTIME
                 )
                 print("요약 생성 완료")
                 
@@ -450,6 +419,8 @@ def post_process_endpoint():
                             history.notes_json = result_data
                             history.status = 'completed'
                             db.session.commit()
+                            index_result_file(job_id, user.id, history.filename, result_path,
+                                              created_at=history.created_at, result=result_data)
                             print(f"히스토리 업데이트 완료: job_id={job_id}, user_id={user.id}")
                     except Exception as db_error:
                         print(f"데이터베이스 업데이트 오류: {db_error}")
@@ -647,7 +618,8 @@ def post_process_endpoint():
             summary_notes = create_summary(
                 captioning_data, 
                 mapped_segments_for_summary, 
-                progress_callback=summary_progress_callback
+                progress_callback=summary_progress_callback,
+                priority=PRIORITY_REALTIME
             )
             print("요약 생성 완료")
             
@@ -760,6 +732,8 @@ def post_process_endpoint():
                     history.notes_json = result_data
                     history.status = 'completed'
                     db.session.commit()
+                    index_result_file(job_id, user.id, history.filename, result_path,
+                                      created_at=history.created_at, result=result_data)
                     print(f"히스토리 업데이트 완료: job_id={job_id}, user_id={user.id}")
                 else:
                     print(f"히스토리를 찾을 수 없음: job_id={job_id}, user_id={user.id}")
@@ -931,6 +905,8 @@ def move_segment_endpoint():
                     history.notes_json = result_data
                     history.status = 'completed'
                     db.session.commit()
+                    index_result_file(job_id, user.id, history.filename, result_path,
+                                      created_at=history.created_at, result=result_data)
                     print(f"히스토리 업데이트 완료: job_id={job_id}, user_id={user.id}")
                 else:
                     print(f"히스토리를 찾을 수 없음: job_id={job_id}, user_id={user.id}")
@@ -0,0 +1,85 @@
+"""
+result.json 읽기 캐시
+결과 조회 API마다 수 MB의 result.json을 다시 읽고 파싱하지 않도록,
+파일의 수정 시각(mtime)과 크기가 같으면 메모리에 있는 원본 바이트를 재사용하는 모듈
+
+- 캐시에는 원본 바이트만 보관하므로 RESULT_CACHE_MAX_MB가 실제 사용 메모리와 같습니다.
+- read_result_bytes + raw_json_response: 파일 내용을 파싱/직렬화 없이 그대로 응답 본문에 넣음
+"""
+
+import json
+import os
+import threading
+from collections import namedtuple
+from typing import Any, Dict, Optional
+
+from cachetools import LRUCache
+from flask import Response
+
+# 캐시에 보관할 result.json 전체 크기 (파일 크기 기준)
+RESULT_CACHE_MAX_MB = int(os.getenv('RESULT_CACHE_MAX_MB', '64'))
+
+_Entry = namedtuple('_Entry', ['mtime_ns', 'size', 'raw'])
+
+_lock = threading.Lock()
+_cache = LRUCache(maxsize=RESULT_CACHE_MAX_MB * 1024 * 1024, getsizeof=lambda entry: max(entry.size, 1))
+
+
+def _load_entry(path: str) -> _Entry:
+    """파일이 바뀌지 않았으면 캐시된 항목을, 바뀌었으면 새로 읽은 항목을 반환합니다.
+
+    Raises:
+        FileNotFoundError: 파일이 없을 때
+        json.JSONDecodeError: 파일이 올바른 JSON이 아닐 때 (쓰는 도중인 파일 등)
+    """
+    stat = os.stat(path)
+    with _lock:
+        entry = _cache.get(path)
+    if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+        return entry
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+    # 잘린 파일을 그대로 내보내지 않도록 한 번은 파싱해서 확인 (파싱 결과는 보관하지 않음)
+    json.loads(raw)
+    entry = _Entry(stat.st_mtime_ns, stat.st_size, raw)
+    if stat.st_size <= _cache.maxsize:
+        with _lock:
+            _cache[path] = entry
+    return entry
+
+
+def read_result_bytes(path: str) -> bytes:
+    """result.json의 원본 바이트를 반환합니다."""
+    return _load_entry(path).raw
+
+
+def raw_json_response(fields: Dict[str, Any], raw_key: str, raw: Optional[bytes], status: int = 200) -> Response:
+    """fields에 raw_key: raw(이미 직렬화된 JSON)를 더한 JSON 응답을 만듭니다.
+
+    Args:
+        fields: 함께 보낼 일반 필드
+        raw_key: 원본 JSON을 넣을 키
+        raw: 직렬화된 JSON 바이트 (None이면 null)
+        status: HTTP 상태 코드
+
+    Returns:
+        application/json 응답
+    """
+    head = json.dumps(fields, ensure_ascii=False)[:-1]
+    separator = ", " if fields else ""
+    body = b"".join([
+        head.encode('utf-8'),
+        separator.encode('utf-8'),
+        json.dumps(raw_key).encode('utf-8'),
+        b": ",
+        raw if raw is not None else b"null",
+        b"}",
+    ])
+    return Response(body, status=status, mimetype='application/json')
+
+
+def invalidate(path: str):
+    """캐시에서 항목을 제거합니다. (mtime/크기로 변경을 감지하므로 보통은 필요 없음)"""
+    with _lock:
+        _cache.pop(path, None)
@@ -0,0 +1,432 @@
+"""
+노트 검색 인덱스
+result.json의 노트 내용을 SQLite FTS5 전문 검색 인덱스에 저장해,
+/api/history/search가 모든 결과 파일을 읽지 않고 사용자별로 순위가 매겨진 결과를 돌려주도록 하는 모듈
+
+- 결과가 저장되면 index_result_file이 백그라운드 인덱서에 작업을 넘기고,
+  인덱서는 쌓인 작업을 모아 형태소 분석 후 해당 작업의 항목을 교체합니다.
+- 서버 시작 시 sync_index가 인덱스에 없거나 변경된 result.json을 찾아 반영합니다.
+- 슬라이드마다 한 행을 저장하므로 검색 결과는 슬라이드 단위이며, 일치 부분의 snippet을 함께 반환합니다.
+  snippet은 HTML 이스케이프한 텍스트에 일치 부분만 <mark>로 감싼 문자열입니다.
+  형태소(terms/parts)로만 일치해 FTS5 snippet에 표시가 없으면, 원문에서 검색어 형태소가 나오는 부분을 찾아 표시합니다.
+- 파일명은 작업마다 한 행(slide 없음)으로 따로 저장합니다.
+- 소유자는 인덱싱되는 owner 열에 토큰("u{user_id}")으로 저장하고 MATCH 식에 포함하므로,
+  검색은 다른 사용자의 행을 읽지 않고 해당 사용자의 행 안에서만 이루어집니다.
+
+각 행은 원문(content), MeCab-ko로 추출한 명사/어간(terms), 복합 명사의 구성 명사(parts)를 함께 저장합니다.
+검색어의 각 단어는 다음 중 하나와 일치하면 됩니다.
+    - 원문 접두어: "스케줄링"* ("스케줄링은", "스케줄링을")
+    - 단어의 형태소마다 (여러 개면 모두 일치해야 함)
+        - 같은 형태소: terms : "스케줄링"
+        - 문서의 복합 명사에 포함된 경우: parts : "스케줄" (검색어 "스케줄러" → 문서의 "스케줄링")
+        - 검색어가 복합 명사면 첫 구성 명사가 단독으로 쓰인 경우: terms : "스케줄"
+          (검색어 "스케줄링" → 문서의 "스케줄러"(스케줄+러))
+    복합 명사끼리는 구성 명사가 겹쳐도 일치하지 않습니다. ("사용자"로 "사용량"을 찾지 않음)
+"""
+
+import html
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.korean_tokenizer import Morpheme, analyze_batch, analyze_morphemes
+
+SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', os.path.join(os.getenv('DATA_DIR', 'data'), 'search_index.sqlite3'))
+# 인덱스 구조가 바뀌면 올림 (다르면 인덱스를 새로 만들고 sync_index로 다시 채움)
+SCHEMA_VERSION = 4
+
+# 인덱싱할 노트 필드
+NOTE_FIELDS = ("Concise Summary Notes", "Bullet Point Notes", "Keyword Notes")
+
+# snippet 설정 (일치 부분 표시, 주변 토큰 수)
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_TOKENS = 16
+# FTS5가 일치 부분에 붙이는 임시 표시 (HTML 이스케이프 후 SNIPPET_OPEN/CLOSE로 바꿈, 본문에서는 제거)
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
+# 형태소로만 일치한 결과의 snippet 길이(글자 수)
+SNIPPET_FALLBACK_CHARS = 80
+
+# bm25 열 가중치 (job_id, owner, slide, content, terms, parts): 소유자 토큰은 순위에 반영하지 않고
+# 구성 명사 일치는 형태소 일치보다 낮게 반영
+BM25_WEIGHTS = "0.0, 0.0, 0.0, 1.0, 1.0, 0.5"
+
+
+def _flatten_text(value: Any) -> Iterable[str]:
+    """딕셔너리/리스트 안의 문자열 값만 꺼냅니다. (JSON 키는 제외)"""
+    if isinstance(value, str):
+        if value:
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten_text(item)
+
+
+def extract_slide_texts(result: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """result.json에서 슬라이드별 검색 대상 텍스트를 추출합니다.
+
+    Args:
+        result: result.json 내용 (slide 키 → 노트/세그먼트)
+
+    Returns:
+        (슬라이드 키, 텍스트) 리스트
+    """
+    slides = []
+    for slide_key, slide in result.items():
+        if not isinstance(slide, dict):
+            continue
+        parts = [slide.get(field, "") for field in NOTE_FIELDS]
+        parts.extend(_flatten_text(slide.get("Chart/Table Summary", {})))
+        for segment in (slide.get("Segments") or {}).values():
+            if isinstance(segment, dict):
+                parts.append(segment.get("text", ""))
+        text = "\n".join(part for part in parts if isinstance(part, str) and part.strip())
+        if text:
+            slides.append((slide_key, text))
+    return slides
+
+
+def _quote(term: str) -> str:
+    # FTS5 문법 문자가 연산자로 해석되지 않도록 큰따옴표로 감쌈
+    return '"' + term.replace('"', '""') + '"'
+
+
+def owner_token(user_id: Optional[int]) -> str:
+    """owner 열에 저장할 소유자 토큰"""
+    return "uanon" if user_id is None else f"u{int(user_id)}"
+
+
+def render_snippet(snippet: Optional[str]) -> Optional[str]:
+    """FTS5 snippet을 HTML 이스케이프하고 일치 부분만 <mark>로 감쌉니다."""
+    if snippet is None:
+        return None
+    escaped = html.escape(snippet)
+    return escaped.replace(_MARK_OPEN, SNIPPET_OPEN).replace(_MARK_CLOSE, SNIPPET_CLOSE)
+
+
+def _strip_marks(text: str) -> str:
+    return text.replace(_MARK_OPEN, "").replace(_MARK_CLOSE, "")
+
+
+def highlight_terms(text: str, terms: Iterable[str], width: int = SNIPPET_FALLBACK_CHARS) -> Optional[str]:
+    """원문에서 검색어 형태소가 처음 나오는 부분 주변을 잘라 일치 부분을 표시합니다.
+
+    형태소(terms/parts)로만 일치한 행은 FTS5 snippet에 표시가 없으므로 대신 사용합니다.
+    (예: 검색어 "스케줄러"의 형태소 "스케줄"을 원문 "스케줄링은"에서 찾아 표시)
+
+    Args:
+        text: 원문 (content 열)
+        terms: 표시할 형태소
+        width: snippet 길이(글자 수)
+
+    Returns:
+        일치 부분을 임시 표시로 감싼 snippet (render_snippet으로 변환), 원문에 없으면 None
+    """
+    terms = sorted({term for term in terms if term}, key=len, reverse=True)
+    if not terms:
+        return None
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(text)
+    if first is None:
+        return None
+
+    start = max(0, first.start() - width // 4)
+    end = min(len(text), start + width)
+    window = pattern.sub(lambda m: _MARK_OPEN + m.group() + _MARK_CLOSE, text[start:end])
+    return ("…" if start > 0 else "") + window + ("…" if end < len(text) else "")
+
+
+def _highlight_terms_for(query: str) -> List[str]:
+    """검색어에서 원문 표시에 쓸 형태소 (_morpheme_match의 일치 조건과 같은 형태소)"""
+    terms = []
+    for word in query.split():
+        for morpheme in analyze_morphemes(word):
+            terms.append(morpheme.term)
+            if morpheme.parts:
+                terms.append(morpheme.parts[0])
+    return terms
+
+
+def _morpheme_match(morpheme: Morpheme) -> str:
+    """검색어 형태소 하나에 대한 MATCH 식"""
+    alternatives = ["terms : " + _quote(morpheme.term), "parts : " + _quote(morpheme.term)]
+    if morpheme.parts and morpheme.parts[0] != morpheme.term:
+        alternatives.append("terms : " + _quote(morpheme.parts[0]))
+    return "(" + " OR ".join(alternatives) + ")"
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """사용자 검색어를 FTS5 MATCH 식으로 변환합니다. 모든 단어를 포함하는(AND) 검색입니다."""
+    groups = []
+    for word in query.split():
+        alternatives = ["{content terms} : " + _quote(word) + "*"]
+        morphemes = analyze_morphemes(word)
+        if morphemes:
+            alternatives.append("(" + " AND ".join(_morpheme_match(morpheme) for morpheme in morphemes) + ")")
+        groups.append("(" + " OR ".join(alternatives) + ")")
+    return " AND ".join(groups) if groups else None
+
+
+class SearchIndex:
+    """SQLite FTS5 기반 노트 검색 인덱스"""
+
+    def __init__(self, db_path: str):
+        """초기화 함수
+
+        Args:
+            db_path: 인덱스를 저장할 SQLite 파일 경로
+        """
+        self.db_path = db_path
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        """요청마다 새 연결을 열고 닫습니다. (sqlite3 연결은 스레드 간 공유 불가)"""
+        self._init_schema()
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._init_lock:
+            if self._initialized:
+                return
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            try:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version != SCHEMA_VERSION:
+                    conn.execute("DROP TABLE IF EXISTS notes_fts")
+                    conn.execute("DROP TABLE IF EXISTS documents")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS documents (
+                        job_id TEXT PRIMARY KEY,
+                        user_id INTEGER,
+                        filename TEXT,
+                        created_at TEXT,
+                        mtime_ns INTEGER
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_documents_user ON documents (user_id)")
+                conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+                        job_id UNINDEXED,
+                        owner,
+                        slide UNINDEXED,
+                        content,
+                        terms,
+                        parts,
+                        tokenize = 'unicode61'
+                    )
+                """)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            finally:
+                conn.close()
+            self._initialized = True
+
+    def index_result(self,
+                     job_id: str,
+                     user_id: Optional[int],
+                     filename: str,
+                     result: Dict[str, Any],
+                     created_at: Optional[datetime] = None,
+                     mtime_ns: Optional[int] = None):
+        """작업의 검색 항목을 새 결과로 교체합니다.
+
+        Args:
+            job_id: 작업 ID
+            user_id: 작업 소유자 ID
+            filename: 강의 자료 파일명
+            result: result.json 내용
+            created_at: 작업 생성 시각
+            mtime_ns: 인덱싱한 result.json의 수정 시각 (sync_index에서 변경 여부 확인용)
+        """
+        # 파일명 행(slide 없음) + 슬라이드별 행, 형태소 분석은 한 번에 처리
+        entries = [(None, _strip_marks(filename or ""))]
+        entries += [(slide_key, _strip_marks(text)) for slide_key, text in extract_slide_texts(result)]
+        morphemes_list = analyze_batch([text for _, text in entries])
+        owner = owner_token(user_id)
+        rows = [
+            (
+                job_id, owner, slide_key, text,
+                " ".join(morpheme.term for morpheme in morphemes),
+                " ".join(part for morpheme in morphemes for part in morpheme.parts)
+            )
+            for (slide_key, text), morphemes in zip(entries, morphemes_list)
+        ]
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM notes_fts WHERE job_id = ?", (job_id,))
+            conn.executemany(
+                "INSERT INTO notes_fts (job_id, owner, slide, content, terms, parts) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (job_id, user_id, filename, created_at, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                (job_id, user_id, filename, created_at.isoformat() if created_at else None, mtime_ns)
+            )
+            conn.execute("COMMIT")
+
+    def remove(self, job_id: str):
+        """작업을 인덱스에서 제거합니다."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM notes_fts WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM documents WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+
+    def indexed_mtimes(self) -> Dict[str, Optional[int]]:
+        """인덱스에 있는 작업 ID → 인덱싱한 result.json 수정 시각"""
+        with self._connect() as conn:
+            return {row['job_id']: row['mtime_ns'] for row in conn.execute("SELECT job_id, mtime_ns FROM documents")}
+
+    def search(self, user_id: Optional[int], query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """사용자의 노트에서 검색합니다. (bm25 순위)
+
+        Args:
+            user_id: 검색할 사용자 ID
+            query: 검색어
+            limit: 페이지 크기
+            offset: 건너뛸 결과 수
+
+        Returns:
+            (검색 결과 리스트, 전체 결과 수)
+        """
+        match = build_match_query(query)
+        if not match:
+            return [], 0
+        # 소유자 토큰을 MATCH 식에 넣어 인덱스에서 바로 사용자 행만 고름
+        match = f"owner : {_quote(owner_token(user_id))} AND ({match})"
+
+        with self._connect() as conn:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM notes_fts WHERE notes_fts MATCH ?",
+                (match,)
+            ).fetchone()[0]
+            rows = conn.execute(
+                f"""
+                SELECT f.job_id, f.slide, f.content, d.filename, d.created_at,
+                       snippet(notes_fts, 3, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet,
+                       bm25(notes_fts, {BM25_WEIGHTS}) AS score
+                FROM notes_fts AS f
+                JOIN documents AS d ON d.job_id = f.job_id
+                WHERE notes_fts MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+                """,
+                (_MARK_OPEN, _MARK_CLOSE, match, limit, offset)
+            ).fetchall()
+
+        hits = []
+        highlight = None
+        for row in rows:
+            snippet = row['snippet']
+            if snippet is not None and _MARK_OPEN not in snippet:
+                # 원문에는 일치 부분이 없고 형태소로만 일치한 경우
+                if highlight is None:
+                    highlight = _highlight_terms_for(query)
+                snippet = highlight_terms(row['content'], highlight) or snippet
+            hits.append({
+                "job_id": row['job_id'],
+                "filename": row['filename'],
+                "created_at": row['created_at'] + "Z" if row['created_at'] else None,
+                "slide": row['slide'],
+                "match_type": "filename" if row['slide'] is None else "content",
+                "snippet": render_snippet(snippet),
+                # bm25는 작을수록 관련도가 높으므로 부호를 바꿔 반환
+                "score": -row['score']
+            })
+        return hits, total
+
+
+# 프로세스 전체에서 공유하는 인덱스
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+
+
+def _index_now(job_id: str, user_id: Optional[int], filename: str, result_path: str,
+               created_at: Optional[datetime] = None, result: Optional[Dict[str, Any]] = None):
+    """result.json을 바로 인덱스에 반영합니다. 오류는 출력만 합니다."""
+    try:
+        mtime_ns = os.stat(result_path).st_mtime_ns
+        if result is None:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        search_index.index_result(job_id, user_id, filename, result, created_at=created_at, mtime_ns=mtime_ns)
+    except Exception as e:
+        print(f"검색 인덱스 업데이트 오류 (job_id={job_id}): {e}")
+
+
+# 백그라운드 인덱서: 같은 작업이 여러 번 저장되면 마지막 결과만 인덱싱
+_pending: Dict[str, Tuple] = {}
+_pending_lock = threading.Lock()
+_wakeup: "queue.Queue[None]" = queue.Queue()
+_indexer: Optional[threading.Thread] = None
+
+
+def _indexer_loop():
+    while True:
+        _wakeup.get()
+        with _pending_lock:
+            batch = list(_pending.values())
+            _pending.clear()
+        for args in batch:
+            _index_now(*args)
+
+
+def index_result_file(job_id: str, user_id: Optional[int], filename: str, result_path: str,
+                      created_at: Optional[datetime] = None, result: Optional[Dict[str, Any]] = None):
+    """저장된 result.json의 인덱싱을 백그라운드 인덱서에 맡깁니다.
+
+    형태소 분석이 요청 처리 시간에 포함되지 않도록 바로 반환하며, 인덱싱 실패는 요청에 영향을 주지 않습니다.
+
+    Args:
+        result: 방금 저장한 결과 (주어지면 파일을 다시 읽지 않음)
+    """
+    global _indexer
+    with _pending_lock:
+        _pending[job_id] = (job_id, user_id, filename, result_path, created_at, result)
+        if _indexer is None:
+            _indexer = threading.Thread(target=_indexer_loop, name="search-indexer", daemon=True)
+            _indexer.start()
+    _wakeup.put(None)
+
+
+def sync_index(upload_folder: str, histories: Iterable[Tuple[str, int, str, Optional[datetime]]]):
+    """인덱스에 없거나 인덱싱 이후 변경된 result.json을 반영합니다.
+
+    Args:
+        upload_folder: 작업 디렉토리들이 있는 폴더
+        histories: (job_id, user_id, filename, created_at) 목록
+
+    Returns:
+        새로 인덱싱한 작업 수
+    """
+    indexed = search_index.indexed_mtimes()
+    count = 0
+    for job_id, user_id, filename, created_at in histories:
+        result_path = os.path.join(upload_folder, job_id, "result.json")
+        try:
+            mtime_ns = os.stat(result_path).st_mtime_ns
+        except FileNotFoundError:
+            continue
+        if indexed.get(job_id) == mtime_ns:
+            continue
+        _index_now(job_id, user_id, filename, result_path, created_at)
+        count += 1
+    return count
@@ -3,6 +3,7 @@
 리팩토링된 API 모듈들을 사용하는 메인 서버
 """
 
+import multiprocessing
 import os
 from datetime import datetime, timedelta, timezone
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -36,6 +37,9 @@ DATA_DIR = os.getenv('DATA_DIR', 'data')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# debug 모드 (werkzeug 리로더 사용 여부)
+FLASK_DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+
 # JWT 설정
 JWT_SECRET = app.config['SECRET_KEY']
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
@@ -66,6 +70,11 @@ class ConversionHistory(db.Model):
     notes_json = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     status = db.Column(db.String(50), default='pending')  # pending, processing, completed, failed
+    
+    # 사용자별 이력 목록 조회 (최신순 페이지네이션)용 인덱스
+    __table_args__ = (
+        db.Index('ix_conversion_history_user_created', 'user_id', 'created_at'),
+    )
 
 # === JWT 헬퍼 함수 ===
 
@@ -249,6 +258,9 @@ def create_tables():
     try:
         with app.app_context():
             db.create_all()
+            # 이미 있는 테이블에는 create_all이 인덱스를 추가하지 않으므로 따로 생성
+            for index in ConversionHistory.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
             print("✅ 데이터베이스 테이블이 생성되었습니다")
     except Exception as e:
         print(f"❌ 데이터베이스 테이블 생성 오류: {e}")
@@ -289,8 +301,25 @@ from api.process import process_bp
 from api.history import history_bp  
 from api.realtime import realtime_bp
 
+def is_serving_process():
+    """작업 큐 워커와 색인 스레드를 시작할 프로세스(실제로 요청을 처리하는 프로세스)인지 확인합니다.
+
+    - PDF 렌더링 프로세스(spawn)가 이 모듈을 다시 import한 경우는 제외합니다.
+    - debug 모드로 직접 실행하면 werkzeug 리로더가 파일 감시용 부모 프로세스와
+      요청을 처리하는 자식 프로세스(WERKZEUG_RUN_MAIN=true)로 나뉘므로 부모 프로세스는 제외합니다.
+    """
+    if multiprocessing.parent_process() is not None:
+        return False
+    if __name__ == '__main__' and FLASK_DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        return False
+    return True
+
 # 데이터베이스 초기화 (API 모듈들에 db 인스턴스와 모델들, Flask 앱 전달)
-init_databases(db, User, ConversionHistory, app)
+# 요청을 처리하지 않는 프로세스에는 Flask 앱을 넘기지 않아 작업 큐/색인 스레드가 시작되지 않도록 함
+if is_serving_process():
+    init_databases(db, User, ConversionHistory, app)
+else:
+    init_databases(db, User, ConversionHistory, None)
 
 # 기존 API 경로로 등록
 app.register_blueprint(process_bp, url_prefix='/api/process2')
@@ -306,7 +335,6 @@ if __name__ == '__main__':
     # .env에서 설정 가져오기
     host = os.getenv('FLASK_HOST', '0.0.0.0')
     port = int(os.getenv('FLASK_PORT', '8000'))
-    debug = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
     
     print("=" * 60)
     print("🎓 Smart Lecture Note API 서버")
@@ -314,4 +342,4 @@ if __name__ == '__main__':
     print(f"📡 서버 주소: http://{host}:{port}")
     print("=" * 60)
     
-    app.run(debug=debug, host=host, port=port)
\ No newline at end of file
+    app.run(debug=FLASK_DEBUG, host=host, port=port)
\ No newline at end of file
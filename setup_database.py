@@ -47,6 +47,11 @@ class ConversionHistory(db.Model):
     notes_json = db.Column(db.JSON, nullable=True)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     status = db.Column(db.String(50), default='pending')  # pending, processing, completed, failed
+    
+    # 사용자별 이력 목록 조회 (최신순 페이지네이션)용 인덱스
+    __table_args__ = (
+        db.Index('ix_conversion_history_user_created', 'user_id', 'created_at'),
+    )
 
 def create_database():
     """데이터베이스 테이블 초기화"""
@@ -0,0 +1,205 @@
+"""
+디스크 기반 결과 캐시
+
+이미지 캡셔닝, STT처럼 비용이 큰 API 호출 결과를 입력 내용의 해시를 키로 저장해
+같은 입력이 다시 들어오면 API를 호출하지 않고 바로 결과를 돌려줍니다.
+
+키마다 하나의 JSON 파일을 저장하고 파일 수정 시각을 마지막 사용 시각으로 사용하여,
+전체 크기(max_bytes) 또는 항목 수(max_entries)를 넘으면 오래 사용하지 않은 항목부터 삭제합니다(LRU).
+
+사용법:
+    cache = DiskCache("data/cache/image_captioning", max_bytes=200 * 1024 * 1024)
+    key = make_key("caption", PROMPT_VERSION, hash_bytes(image_bytes))
+    result = cache.get(key)
+    if result is None:
+        result = call_api(...)
+        cache.set(key, result)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+# 캐시 용량 초과 시 이 비율까지 줄어들도록 삭제 (잦은 정리 방지)
+EVICTION_LOW_WATERMARK = 0.9
+
+
+def hash_bytes(data: bytes) -> str:
+    """바이트 데이터의 SHA-256 해시(16진수 문자열)를 반환합니다."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """파일 전체를 메모리에 올리지 않고 SHA-256 해시를 계산합니다."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(*parts: Any) -> str:
+    """여러 구성 요소(버전, 모델명, 내용 해시 등)를 하나의 캐시 키로 만듭니다."""
+    joined = "\x1f".join(str(part) for part in parts)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """디렉토리 기반 JSON 캐시 (LRU 크기 제한, 적중/미적중 통계)"""
+
+    def __init__(self,
+                 directory: str,
+                 max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """초기화 함수
+
+        Args:
+            directory: 캐시 파일을 저장할 디렉토리
+            max_entries: 최대 항목 수 (None이면 제한 없음)
+            max_bytes: 최대 전체 크기 (None이면 제한 없음)
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # 현재 항목 수와 크기 (처음 필요할 때 디렉토리를 훑어 계산)
+        self._entries: Optional[int] = None
+        self._bytes: Optional[int] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan(self):
+        """디렉토리의 모든 캐시 파일을 (수정 시각, 크기, 경로) 리스트로 반환합니다."""
+        files = []
+        if not os.path.isdir(self.directory):
+            return files
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _ensure_totals(self):
+        if self._entries is None:
+            files = self._scan()
+            self._entries = len(files)
+            self._bytes = sum(size for _, size, _ in files)
+
+    def _over_limit(self, ratio: float = 1.0) -> bool:
+        if self.max_entries is not None and self._entries > self.max_entries * ratio:
+            return True
+        if self.max_bytes is not None and self._bytes > self.max_bytes * ratio:
+            return True
+        return False
+
+    def _evict(self):
+        """용량을 넘었으면 오래 사용하지 않은 항목부터 삭제합니다. (잠금 안에서 호출)"""
+        if not self._over_limit():
+            return
+        files = sorted(self._scan())
+        self._entries = len(files)
+        self._bytes = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if not self._over_limit(EVICTION_LOW_WATERMARK):
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._entries -= 1
+            self._bytes -= size
+            self._evictions += 1
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """캐시된 값을 반환합니다. 없으면 default를 반환합니다."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self._misses += 1
+            return default
+
+        # 마지막 사용 시각 갱신 (LRU)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """값을 캐시에 저장합니다. 쓰기 도중 실패해도 깨진 파일이 남지 않도록 원자적으로 교체합니다."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            # 새 파일이 중복 집계되지 않도록 쓰기 전에 현재 크기 계산
+            self._ensure_totals()
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            new_size = os.path.getsize(tmp_path)
+
+            # 같은 키를 동시에 쓰거나 삭제해도 크기가 어긋나지 않도록 기존 크기 확인, 교체, 집계를 한 잠금 안에서 처리
+            with self._lock:
+                try:
+                    old_size = os.path.getsize(path)
+                except FileNotFoundError:
+                    old_size = None
+                os.replace(tmp_path, path)
+
+                if old_size is None:
+                    self._entries += 1
+                    self._bytes += new_size
+                else:
+                    self._bytes += new_size - old_size
+                self._evict()
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, key: str):
+        """캐시 항목을 삭제합니다."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            if self._entries is not None:
+                self._entries -= 1
+                self._bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/미적중 횟수와 현재 캐시 크기를 반환합니다."""
+        with self._lock:
+            self._ensure_totals()
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": self._entries,
+                "bytes": self._bytes,
+            }
@@ -0,0 +1,158 @@
+"""
+작업 단계 체크포인트
+파이프라인 각 단계의 결과를 작업 디렉토리에 저장해, 실패한 작업을 다시 실행하거나
+서버 재시작 후 재개할 때 이미 끝난 단계(STT, 세그먼트 분리, 캡셔닝, 매핑 등)를 건너뛰는 모듈
+
+작업 디렉토리 구조:
+    {job_dir}/checkpoints/manifest.json   완료된 단계 목록과 입력 파일 정보
+    {job_dir}/checkpoints/{stage}.json    단계 결과
+
+입력 파일(오디오, PDF)이나 처리 옵션이 바뀌면 signature가 달라지므로 기존 체크포인트를 모두 무시합니다.
+
+사용법:
+    store = CheckpointStore(job_dir, signature=input_signature(audio_path, doc_path))
+    stages = [Stage(name, store.wrap(name, func), ...) for ...]
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+CHECKPOINT_DIR_NAME = "checkpoints"
+MANIFEST_FILENAME = "manifest.json"
+# 저장 형식이 바뀌면 버전을 올려 이전 체크포인트를 무효화
+CHECKPOINT_VERSION = 1
+
+
+def input_signature(*paths: str, **options: Any) -> Dict[str, Any]:
+    """입력 파일의 크기/수정 시각과 처리 옵션으로 체크포인트 유효성 확인용 정보를 만듭니다.
+
+    Args:
+        *paths: 입력 파일 경로
+        **options: 결과에 영향을 주는 처리 옵션 (예: skip_transcription)
+
+    Returns:
+        manifest에 저장할 signature 딕셔너리
+    """
+    files = []
+    for path in paths:
+        stat = os.stat(path)
+        files.append({
+            "name": os.path.basename(path),
+            "size": stat.st_size,
+            "mtime": int(stat.st_mtime)
+        })
+    return {"version": CHECKPOINT_VERSION, "files": files, "options": options}
+
+
+def _write_json_atomic(path: str, data: Any):
+    """임시 파일에 쓴 뒤 교체하여, 쓰기 도중 중단되어도 깨진 파일이 남지 않도록 합니다."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointStore:
+    """작업 디렉토리 단위의 단계 결과 저장소"""
+
+    def __init__(self, job_dir: str, signature: Optional[Dict[str, Any]] = None):
+        """초기화 함수
+
+        Args:
+            job_dir: 작업 디렉토리 경로
+            signature: 입력 정보 (input_signature 결과). 저장된 값과 다르면 기존 체크포인트를 버립니다.
+        """
+        self.directory = os.path.join(job_dir, CHECKPOINT_DIR_NAME)
+        self.manifest_path = os.path.join(self.directory, MANIFEST_FILENAME)
+        self.signature = signature or {}
+
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        empty = {"signature": self.signature, "stages": {}}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return empty
+
+        if manifest.get("signature") != self.signature:
+            print(f"입력이 변경되어 기존 체크포인트를 무시합니다: {self.directory}")
+            return empty
+        return manifest
+
+    def _stage_path(self, stage: str) -> str:
+        return os.path.join(self.directory, f"{stage}.json")
+
+    def completed_stages(self) -> List[str]:
+        """체크포인트가 저장된 단계 이름 목록을 반환합니다."""
+        with self._lock:
+            return list(self._manifest["stages"])
+
+    def has(self, stage: str) -> bool:
+        """단계 결과가 저장되어 있는지 확인합니다."""
+        with self._lock:
+            return stage in self._manifest["stages"] and os.path.exists(self._stage_path(stage))
+
+    def load(self, stage: str) -> Any:
+        """저장된 단계 결과를 읽습니다.
+
+        Raises:
+            KeyError: 해당 단계의 체크포인트가 없거나 읽을 수 없을 때
+        """
+        if not self.has(stage):
+            raise KeyError(stage)
+        try:
+            with open(self._stage_path(stage), "r", encoding="utf-8") as f:
+                return json.load(f)["result"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            raise KeyError(stage)
+
+    def save(self, stage: str, result: Any):
+        """단계 결과를 저장하고 manifest에 완료로 기록합니다.
+
+        결과 파일을 먼저 쓰고 manifest를 나중에 갱신하므로, 중간에 중단되어도
+        manifest에 기록된 단계는 항상 결과 파일이 온전합니다.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # 결과가 None인 단계(예: 캐시된 STT 결과 없음)도 구분할 수 있도록 감싸서 저장
+        _write_json_atomic(self._stage_path(stage), {"result": result})
+
+        with self._lock:
+            self._manifest["signature"] = self.signature
+            self._manifest["stages"][stage] = {
+                "file": os.path.basename(self._stage_path(stage)),
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }
+            _write_json_atomic(self.manifest_path, self._manifest)
+
+    def wrap(self, stage: str, func: Callable[[Dict[str, Any], Callable], Any]) -> Callable:
+        """파이프라인 단계 함수를 체크포인트를 사용하도록 감쌉니다.
+
+        저장된 결과가 있으면 함수를 실행하지 않고 그 결과를 반환하고,
+        없으면 함수를 실행한 뒤 결과를 저장합니다.
+        """
+        def run(inputs: Dict[str, Any], report: Callable):
+            try:
+                result = self.load(stage)
+            except KeyError:
+                pass
+            else:
+                print(f"체크포인트 사용, '{stage}' 단계 건너뜀: {self.directory}")
+                report(1, 1, None)
+                return result
+
+            result = func(inputs, report)
+            self.save(stage, result)
+            return result
+        return run
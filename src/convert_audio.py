@@ -1,16 +1,114 @@
 import os
-from openai import OpenAI
+import re
+import subprocess
+import tempfile
 from dotenv import load_dotenv
 import json
 from datetime import datetime
-from pydub import AudioSegment
-import math
+from concurrent.futures import ThreadPoolExecutor
+from src.cache import DiskCache, hash_file, make_key
+from src.llm_client import PRIORITY_BATCH, transcription
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
-def split_audio_file(input_file, max_size_mb=24):
-    """오디오 파일을 최대 크기 제한에 맞게 분할합니다."""
+# 동시에 업로드할 오디오 조각 수
+WHISPER_MAX_WORKERS = int(os.getenv('WHISPER_MAX_WORKERS', '4'))
+
+# STT 모델과 언어 (캐시 키에 포함)
+WHISPER_MODEL = "whisper-1"
+WHISPER_LANGUAGE = "ko"
+
+# 오디오 조각 내용 해시 → STT 결과 캐시
+transcript_cache = DiskCache(
+    os.getenv('TRANSCRIPT_CACHE_DIR', 'data/cache/stt'),
+    max_bytes=int(os.getenv('TRANSCRIPT_CACHE_MAX_MB', '100')) * 1024 * 1024
+)
+
+# 조각 하나의 최대 길이 (초)
+SEGMENT_LENGTH_SEC = 10 * 60
+# 분할 지점 앞쪽으로 무음 구간을 탐색할 범위 (초)
+SILENCE_SEARCH_WINDOW_SEC = 30
+# 분할 지점으로 인정할 최소 무음 길이 (초)
+MIN_SILENCE_LEN_SEC = 0.5
+# 이 음량(dB) 이하를 무음으로 판단
+SILENCE_NOISE_DB = -35
+
+def run_ffmpeg(command):
+    """ffmpeg/ffprobe 명령을 실행하고 (stdout, stderr)를 반환합니다."""
+    try:
+        completed = subprocess.run(command, check=True, capture_output=True, text=True)
+        return completed.stdout, completed.stderr
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"ffmpeg 실행 실패: {e.stderr.strip()[-500:] if e.stderr else e}")
+
+def probe_duration(input_file):
+    """ffprobe로 오디오 길이(초)를 가져옵니다. 파일 전체를 디코딩하지 않습니다."""
+    stdout, _ = run_ffmpeg([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        input_file
+    ])
+    return float(stdout.strip())
+
+def find_split_point(input_file, target_sec, window_sec=SILENCE_SEARCH_WINDOW_SEC):
+    """target_sec 직전 window_sec 범위에서 가장 가까운 무음 구간의 중간 지점을 찾습니다.
+    
+    단어가 중간에 잘리지 않도록 무음 구간에서 분할하며,
+    조각 길이가 늘어나지 않도록 target_sec 이후는 탐색하지 않습니다.
+    해당 범위만 seek하여 디코딩하므로 파일 전체를 메모리에 올리지 않습니다.
+    무음 구간이 없으면 target_sec를 그대로 반환합니다.
+    """
+    start = max(0.0, target_sec - window_sec)
+    _, stderr = run_ffmpeg([
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-ss", f"{start:.3f}", "-t", f"{target_sec - start:.3f}",
+        "-i", input_file,
+        "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={MIN_SILENCE_LEN_SEC}",
+        "-f", "null", "-"
+    ])
+    silence_starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", stderr)]
+    silence_ends = [float(v) for v in re.findall(r"silence_end: (-?[\d.]+)", stderr)]
+    if not silence_starts:
+        return target_sec
+    
+    # 목표 지점에 가장 가까운(가장 뒤쪽) 무음 구간의 중간에서 분할
+    # 구간 끝까지 무음이 이어지면 silence_end가 출력되지 않음
+    silence_start = max(0.0, silence_starts[-1])
+    silence_end = silence_ends[-1] if len(silence_ends) == len(silence_starts) else target_sec - start
+    return start + (silence_start + silence_end) / 2
+
+def export_segment(input_file, output_file, start_sec, duration_sec):
+    """입력 파일의 일부 구간만 seek하여 AAC(m4a) 조각으로 저장합니다.
+    
+    같은 구간은 항상 같은 바이트로 저장되도록 메타데이터를 제거하고 bitexact 모드로 인코딩합니다.
+    (조각 내용 해시를 STT 캐시 키로 사용)
+    """
+    run_ffmpeg([
+        "ffmpeg", "-y", "-hide_banner", "-nostats",
+        "-ss", f"{start_sec:.3f}", "-t", f"{duration_sec:.3f}",
+        "-i", input_file,
+        "-vn", "-ac", "1",
+        "-c:a", "aac", "-b:a", "64k",
+        "-map_metadata", "-1",
+        "-fflags", "+bitexact", "-flags:a", "+bitexact",
+        output_file
+    ])
+
+def split_audio_file(input_file, output_dir, max_size_mb=24):
+    """오디오 파일을 최대 크기 제한에 맞게 분할합니다.
+    
+    ffmpeg로 필요한 구간만 seek하여 잘라내므로 파일 전체를 디코딩하거나 메모리에 올리지 않습니다.
+    
+    Args:
+        input_file: 원본 오디오 파일 경로
+        output_dir: 분할된 조각을 저장할 디렉토리 (작업별 임시 디렉토리)
+        max_size_mb: 분할 없이 그대로 사용할 최대 파일 크기
+        
+    Returns:
+        순서대로 정렬된 오디오 파일 경로 리스트 (분할이 필요 없으면 [input_file])
+    """
     # 파일 크기 확인
     file_size = os.path.getsize(input_file)
     max_size_bytes = max_size_mb * 1024 * 1024  # MB를 bytes로 변환
@@ -18,28 +116,84 @@ def split_audio_file(input_file, max_size_mb=24):
     if file_size <= max_size_bytes:
         return [input_file]
     
-    # 오디오 파일 로드
-    audio = AudioSegment.from_file(input_file)
+    total_duration = probe_duration(input_file)
     
     # 분할된 파일들을 저장할 리스트
     split_files = []
     
-    # 10분 단위로 분할 (약 24MB)
-    segment_length = 10 * 60 * 1000  # 10분을 밀리초로 변환
-    num_segments = math.ceil(len(audio) / segment_length)
-    
-    for i in range(num_segments):
-        start = i * segment_length
-        end = min((i + 1) * segment_length, len(audio))
-        segment = audio[start:end]
+    # 약 10분 단위로 분할, 경계는 직전 무음 구간으로 조정
+    start = 0.0
+    i = 0
+    while start < total_duration:
+        end = total_duration
+        if end - start > SEGMENT_LENGTH_SEC:
+            end = find_split_point(input_file, start + SEGMENT_LENGTH_SEC)
         
-        # 임시 파일로 저장
-        temp_file = f"temp_segment_{i}.mp4"
-        segment.export(temp_file, format="mp4")
-        split_files.append(temp_file)
+        segment_file = os.path.join(output_dir, f"segment_{i:03d}.m4a")
+        export_segment(input_file, segment_file, start, end - start)
+        split_files.append(segment_file)
+        
+        start = end
+        i += 1
     
     return split_files
 
+def transcript_cache_key(file_path):
+    """오디오 조각 내용, 모델, 언어로 STT 캐시 키를 만듭니다."""
+    return make_key("transcript", WHISPER_MODEL, WHISPER_LANGUAGE, hash_file(file_path))
+
+def transcribe_chunks(audio_file_path, transcribe_chunk=None):
+    """오디오를 분할하여 조각별로 캐시를 조회하고, 없는 조각만 transcribe_chunk로 변환합니다.
+    
+    조각 단위로 캐시하므로 앞부분이 같은 녹음을 다시 올려도 같은 조각은 캐시에서 가져옵니다.
+    
+    Args:
+        audio_file_path: 원본 오디오 파일 경로
+        transcribe_chunk: 조각 파일 경로를 받아 텍스트를 반환하는 함수 (None이면 캐시만 조회)
+        
+    Returns:
+        조각 순서대로 정렬된 텍스트 리스트 (캐시만 조회할 때 하나라도 없으면 None)
+    """
+    # 작업별 임시 디렉토리에 오디오 파일 분할 (동시 작업 간 파일명 충돌 방지, 종료 시 자동 삭제)
+    with tempfile.TemporaryDirectory(prefix="stt_chunks_") as chunk_dir:
+        split_files = split_audio_file(audio_file_path, chunk_dir)
+        cache_keys = [transcript_cache_key(file_path) for file_path in split_files]
+        texts = [transcript_cache.get(key) for key in cache_keys]
+        
+        missing = [i for i, text in enumerate(texts) if text is None]
+        print(f"STT 캐시: 전체 {len(split_files)}개 조각 중 {len(split_files) - len(missing)}개 적중")
+        if missing and transcribe_chunk is None:
+            return None
+        
+        def transcribe_and_cache(i):
+            text = transcribe_chunk(split_files[i])
+            transcript_cache.set(cache_keys[i], text)
+            return text
+        
+        # 캐시에 없는 조각들을 동시에 변환하고 원래 순서대로 이어붙임
+        if missing:
+            max_workers = max(1, min(WHISPER_MAX_WORKERS, len(missing)))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for i, text in zip(missing, executor.map(transcribe_and_cache, missing)):
+                    texts[i] = text
+    
+    return texts
+
+def lookup_cached_transcript(audio_file_path: str):
+    """API를 호출하지 않고 캐시된 STT 결과만 조회합니다.
+    
+    Returns:
+        모든 조각이 캐시에 있으면 {"text": ...}, 하나라도 없으면 None
+    """
+    try:
+        texts = transcribe_chunks(audio_file_path)
+    except Exception as e:
+        print(f"STT 캐시 조회 중 오류가 발생했습니다: {str(e)}")
+        return None
+    if texts is None:
+        return None
+    return {"text": "\n".join(texts)}
+
 def transcribe_audio(audio_file_path: str = "assets/os_35.m4a"):
     # API 키 확인
     api_key = os.getenv('OPENAI_API_KEY')
@@ -48,32 +202,23 @@ def transcribe_audio(audio_file_path: str = "assets/os_35.m4a"):
     
     print(f"API 키가 로드되었습니다: {api_key[:8]}...")
     
-    # OpenAI 클라이언트 초기화
-    client = OpenAI(api_key=api_key)
-    
     # 출력 디렉토리 생성
     output_dir = "data/stt_result"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
+    def transcribe_chunk(file_path):
+        with open(file_path, "rb") as audio_file:
+            return transcription(
+                priority=PRIORITY_BATCH,
+                model=WHISPER_MODEL,
+                file=audio_file,
+                response_format="text",
+                language=WHISPER_LANGUAGE
+            )
+    
     try:
-        # 오디오 파일 분할
-        split_files = split_audio_file(audio_file_path)
-        full_transcript = []
-        
-        for file_path in split_files:
-            with open(file_path, "rb") as audio_file:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text",
-                    language="ko"
-                )
-                full_transcript.append(transcript)
-            
-            # 임시 파일 삭제
-            if file_path != audio_file_path:
-                os.remove(file_path)
+        full_transcript = transcribe_chunks(audio_file_path, transcribe_chunk)
         
         # 전체 텍스트 합치기
         complete_transcript = "\n".join(full_transcript)
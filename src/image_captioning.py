@@ -1,61 +1,62 @@
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import base64
-from pdf2image import convert_from_path
 import json
-import io
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from src.cache import DiskCache, hash_bytes, make_key
+from src.llm_client import PRIORITY_BATCH, chat_completion
+from src.image_encoder import encode_for_caption
+from src.pdf_renderer import encode_base64, iter_pages, page_count, render_pdf_base64
+from src.page_store import PageImageStore
+from src.slide_dedup import SlideGrouper
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    base_url="https://api.openai.com/v1"
+# 동시에 진행할 슬라이드 분석 요청 수
+IMAGE_CAPTIONING_MAX_WORKERS = int(os.getenv('IMAGE_CAPTIONING_MAX_WORKERS', '4'))
+
+# 캡셔닝 모델과 프롬프트 버전 (프롬프트나 함수 스키마를 바꾸면 버전을 올려 캐시를 무효화)
+CAPTION_MODEL = "gpt-4o"
+CAPTION_PROMPT_VERSION = "v1"
+
+# 렌더링된 슬라이드 이미지 해시 → 캡셔닝 결과 캐시
+caption_cache = DiskCache(
+    os.getenv('CAPTION_CACHE_DIR', 'data/cache/image_captioning'),
+    max_bytes=int(os.getenv('CAPTION_CACHE_MAX_MB', '200')) * 1024 * 1024
 )
 
 def convert_pdf_to_images(pdf_path: str) -> list:
     """PDF 파일을 이미지로 변환합니다.
     
+    모든 페이지를 메모리에 올리므로, 페이지를 순서대로 처리하는 경우에는 iter_pages를 사용하세요.
+    
     Args:
         pdf_path: PDF 파일 경로
         
     Returns:
-        base64로 인코딩된 이미지 리스트
+        base64로 인코딩된 JPEG 이미지 리스트
     """
     try:
-        # PDF를 이미지로 변환
-        images = convert_from_path(pdf_path)
-        encoded_images = []
-        
-        for image in images:
-            # 이미지를 JPEG로 변환
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='JPEG', quality=90)
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # base64로 인코딩
-            img_str = base64.b64encode(img_byte_arr).decode()
-            encoded_images.append(img_str)
-            
-        return encoded_images
+        return render_pdf_base64(pdf_path)
     except Exception as e:
         raise Exception(f"PDF 변환 중 오류 발생: {str(e)}")
 
-def analyze_image(image_url: str) -> dict:
+def analyze_image(image_url: str, priority: int = PRIORITY_BATCH, detail: str = "low") -> dict:
     """이미지를 분석하여 키워드와 슬라이드 타입을 추출합니다.
     
     Args:
         image_url: base64로 인코딩된 이미지 URL
+        priority: 요청 우선순위 (PRIORITY_REALTIME 또는 PRIORITY_BATCH)
+        detail: 비전 모델 detail 수준 (low 또는 high)
         
     Returns:
         추출된 키워드 정보와 슬라이드 타입
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
+        response = chat_completion(
+            priority=priority,
+            model=CAPTION_MODEL,
             messages=[
     {
         "role": "system",
@@ -68,7 +69,7 @@ def analyze_image(image_url: str) -> dict:
                 "type": "image_url",
                 "image_url": {
                     "url": image_url,
-                    "detail": "low"
+                    "detail": detail
                 }
             },
             {
@@ -144,44 +145,131 @@ Rules:
     except Exception as e:
         raise Exception(f"이미지 분석 중 오류 발생: {str(e)}")
 
-def image_captioning(pdf_path: str = "assets/os_35.pdf", progress_callback=None) -> list:
+def caption_slide(slide_number: int, image_data: bytes, priority: int = PRIORITY_BATCH) -> dict:
+    """단일 슬라이드 이미지를 분석하여 캡셔닝 결과를 만듭니다.
+    
+    이미지는 슬라이드 밀도에 맞는 크기와 detail 수준으로 다시 인코딩하여 전송합니다.
+    
+    Args:
+        slide_number: 슬라이드 번호 (1부터 시작)
+        image_data: 렌더링된 슬라이드 이미지 (JPEG 또는 PNG)
+        priority: 요청 우선순위 (PRIORITY_REALTIME 또는 PRIORITY_BATCH)
+        
+    Returns:
+        슬라이드 번호가 포함된 캡셔닝 결과
+    """
+    encoded = encode_for_caption(image_data)
+    
+    # 같은 이미지를 같은 프롬프트와 detail 수준으로 분석한 결과가 있으면 재사용
+    cache_key = make_key("caption", CAPTION_PROMPT_VERSION, CAPTION_MODEL, encoded.detail, hash_bytes(encoded.data))
+    analysis = caption_cache.get(cache_key)
+    
+    if analysis is None:
+        # 인코딩한 이미지를 URL로 변환
+        image_url = f"data:{encoded.mime_type};base64,{encode_base64(encoded.data)}"
+        
+        # 이미지 분석
+        analysis = analyze_image(image_url, priority=priority, detail=encoded.detail)
+        caption_cache.set(cache_key, analysis)
+    
+    # 결과에 페이지 번호 추가
+    return {
+        "slide_number": slide_number,
+        "type": analysis["type"],
+        "title_keywords": analysis["title_keywords"],
+        "secondary_keywords": analysis["secondary_keywords"],
+        "detail": analysis["detail"]
+    }
+
+def image_captioning(pdf_path: str = "assets/os_35.pdf", progress_callback=None, max_workers: int = None,
+                     priority: int = PRIORITY_BATCH, page_store: PageImageStore = None,
+                     extra_variants: tuple = (), dedup_similarity: float = None) -> list:
     """PDF 파일을 처리하여 각 페이지의 키워드와 타입을 추출합니다.
     
+    PDF는 한 페이지씩 렌더링되며, 렌더링된 페이지부터 바로 분석을 시작합니다.
+    슬라이드 분석 요청은 최대 max_workers개까지 동시에 진행되며,
+    결과는 완료 순서와 관계없이 슬라이드 순서대로 반환됩니다.
+    
+    애니메이션 빌드처럼 거의 같은 슬라이드가 연속되면 마지막 장만 분석하고,
+    나머지 슬라이드는 그 결과에 자기 slide_number를 넣어 사용합니다.
+    
     Args:
         pdf_path: PDF 파일 경로
-        progress_callback: 진행률 업데이트 콜백 함수 (current_page, total_pages)
+        progress_callback: 진행률 업데이트 콜백 함수 (completed_pages, total_pages)
+        max_workers: 동시에 진행할 분석 요청 수 (None이면 IMAGE_CAPTIONING_MAX_WORKERS, 1이면 순차 처리)
+        priority: 요청 우선순위 (실시간 세션은 PRIORITY_REALTIME)
+        page_store: 작업별 슬라이드 이미지 저장소 (주어지면 렌더링한 이미지를 저장하고 재사용)
+        extra_variants: 렌더링하는 김에 함께 저장할 다른 용도의 이미지 (예: ("display",))
+        dedup_similarity: 같은 슬라이드로 묶을 유사도 (None이면 CAPTION_DEDUP_SIMILARITY, 0 이하면 묶지 않음)
         
     Returns:
         각 페이지의 키워드 정보와 타입을 담은 JSON 리스트
     """
     try:
-        # PDF를 이미지로 변환
-        encoded_images = convert_pdf_to_images(pdf_path)
-        total_pages = len(encoded_images)
+        total_pages = page_count(pdf_path)
+        
+        if max_workers is None:
+            max_workers = IMAGE_CAPTIONING_MAX_WORKERS
+        max_workers = max(1, min(max_workers, total_pages or 1))
+        # 렌더링이 분석보다 너무 앞서 나가 메모리에 페이지가 쌓이지 않도록 제한
+        max_in_flight = max_workers * 2
         
-        # 각 이미지에 대해 키워드 추출
-        results = []
-        for i, img_str in enumerate(encoded_images, 1):
-            # 진행률 콜백 호출
-            if progress_callback:
-                progress_callback(i, total_pages)
+        # 각 이미지에 대해 키워드 추출 (완료되는 대로 슬라이드 위치에 저장)
+        results = [None] * total_pages
+        completed = 0
+        skipped = 0
+        grouper = SlideGrouper(dedup_similarity)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
             
-            print(f"[INFO] 슬라이드 {i}/{total_pages} 분석 중...")
-            # base64 이미지를 URL로 변환
-            image_url = f"data:image/jpeg;base64,{img_str}"
+            def collect(done):
+                nonlocal completed
+                for future in done:
+                    i, duplicates = futures.pop(future)
+                    result = future.result()
+                    results[i - 1] = result
+                    # 같은 묶음의 슬라이드는 대표 슬라이드 결과를 복사
+                    for number in duplicates:
+                        results[number - 1] = {
+                            **result,
+                            "slide_number": number,
+                            "title_keywords": list(result["title_keywords"]),
+                            "secondary_keywords": list(result["secondary_keywords"])
+                        }
+                    completed += 1 + len(duplicates)
+                    print(f"[INFO] 슬라이드 {i} 분석 완료 ({completed}/{total_pages})")
+                    
+                    # 진행률 콜백 호출
+                    if progress_callback:
+                        progress_callback(completed, total_pages)
             
-            # 이미지 분석
-            analysis = analyze_image(image_url)
+            def submit(group):
+                nonlocal skipped
+                if len(futures) >= max_in_flight:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done)
+                futures[executor.submit(caption_slide, group.representative, group.data, priority)] = \
+                    (group.representative, group.duplicates)
+                skipped += len(group.duplicates)
             
-            # 결과에 페이지 번호 추가
-            result = {
-                "slide_number": i,
-                "type": analysis["type"],
-                "title_keywords": analysis["title_keywords"],
-                "secondary_keywords": analysis["secondary_keywords"],
-                "detail": analysis["detail"]
-            }
-            results.append(result)
+            try:
+                pages = page_store.iter_pages(pdf_path, "api", also=extra_variants) if page_store else iter_pages(pdf_path)
+                for page in pages:
+                    group = grouper.add(page.number, page.data)
+                    if group:
+                        submit(group)
+                group = grouper.flush()
+                if group:
+                    submit(group)
+                
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done)
+            except Exception:
+                # 하나라도 실패하면 아직 시작하지 않은 요청은 취소
+                for pending in futures:
+                    pending.cancel()
+                raise
         
         # 결과 저장
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
@@ -192,6 +280,11 @@ def image_captioning(pdf_path: str = "assets/os_35.pdf", progress_callback=None)
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(results, f, ensure_ascii=False, indent=2)
         
+        if skipped:
+            print(f"[INFO] 비슷한 슬라이드 {skipped}장은 대표 슬라이드의 분석 결과를 사용했습니다.")
+        stats = caption_cache.stats()
+        print(f"[INFO] 캡셔닝 캐시: 적중 {stats['hits']}회, 미적중 {stats['misses']}회, {stats['entries']}개 항목")
+        
         return results
         
     except Exception as e:
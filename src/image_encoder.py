@@ -0,0 +1,112 @@
+"""
+캡셔닝 요청용 슬라이드 이미지 인코더
+슬라이드의 내용 밀도에 따라 해상도, JPEG 품질, 비전 모델의 detail 수준을 정해 이미지를 다시 인코딩하는 모듈
+
+대부분의 슬라이드는 글자가 크고 여백이 많아 detail="low"(모델이 512px로 축소해서 봄)로도 충분하므로,
+렌더링한 200 DPI 이미지를 그대로 보내지 않고 512px로 줄여 보냅니다.
+작은 글씨, 코드, 복잡한 도표처럼 윤곽선이 많은 슬라이드만 detail="high"로 짧은 변 768px까지 보냅니다.
+어떤 경우든 인코딩 결과가 CAPTION_IMAGE_MAX_BYTES를 넘지 않도록 품질과 크기를 낮춥니다.
+
+사용법:
+    encoded = encode_for_caption(page.data)
+    image_url = f"data:{encoded.mime_type};base64,{encode_base64(encoded.data)}"
+    analyze_image(image_url, detail=encoded.detail)
+"""
+
+import io
+import os
+from typing import NamedTuple, Tuple
+
+from PIL import Image, ImageFilter
+
+# 윤곽선 픽셀 비율이 이 값 이상이면 내용이 빽빽한 슬라이드로 보고 detail="high" 사용
+CAPTION_DENSE_EDGE_RATIO = float(os.getenv('CAPTION_DENSE_EDGE_RATIO', '0.12'))
+# 인코딩한 이미지의 최대 크기(바이트)
+CAPTION_IMAGE_MAX_BYTES = int(os.getenv('CAPTION_IMAGE_MAX_BYTES', str(300 * 1024)))
+
+# detail 수준별 크기 제한 (긴 변 최대, 짧은 변 최대)와 JPEG 품질
+#   low : 모델이 512x512 안으로 줄여서 보므로 더 크게 보낼 필요가 없음
+#   high: 모델이 짧은 변 768px로 맞춰서 보므로 그 이상은 전송량만 늘어남
+DETAIL_PROFILES = {
+    "low": ((512, 512), 80),
+    "high": ((2048, 768), 85),
+}
+
+# 밀도 측정용 축소 크기와 윤곽선 판단 기준값
+DENSITY_SAMPLE_SIZE = 512
+EDGE_THRESHOLD = 48
+
+# 크기 제한을 넘을 때 낮출 수 있는 최저 JPEG 품질과 한 번에 줄이는 비율
+MIN_JPEG_QUALITY = 50
+SCALE_STEP = 0.85
+
+
+class EncodedImage(NamedTuple):
+    """캡셔닝 요청용으로 인코딩된 이미지"""
+    data: bytes
+    mime_type: str
+    detail: str  # 비전 모델 detail 수준 (low 또는 high)
+    width: int
+    height: int
+
+
+def edge_ratio(image: Image.Image) -> float:
+    """이미지에서 윤곽선 픽셀의 비율(0~1)을 계산합니다. 글자/선이 많을수록 커집니다."""
+    gray = image.convert("L")
+    gray.thumbnail((DENSITY_SAMPLE_SIZE, DENSITY_SAMPLE_SIZE))
+    edges = gray.filter(ImageFilter.FIND_EDGES).point(lambda value: 255 if value >= EDGE_THRESHOLD else 0)
+    # FIND_EDGES는 가장자리 1픽셀을 0으로 채우므로 전체 픽셀 수 기준으로 계산해도 영향이 적음
+    return edges.histogram()[255] / (gray.width * gray.height)
+
+
+def choose_detail(image: Image.Image) -> str:
+    """슬라이드 밀도에 따라 detail 수준을 선택합니다."""
+    return "high" if edge_ratio(image) >= CAPTION_DENSE_EDGE_RATIO else "low"
+
+
+def _fit_size(width: int, height: int, limits: Tuple[int, int]) -> Tuple[int, int]:
+    long_limit, short_limit = limits
+    scale = min(1.0, long_limit / max(width, height), short_limit / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def encode_for_caption(image_data: bytes, max_bytes: int = CAPTION_IMAGE_MAX_BYTES) -> EncodedImage:
+    """렌더링된 슬라이드 이미지를 캡셔닝 요청에 맞게 다시 인코딩합니다.
+
+    Args:
+        image_data: 렌더링된 이미지 (JPEG 또는 PNG)
+        max_bytes: 인코딩 결과의 최대 크기
+
+    Returns:
+        EncodedImage
+    """
+    with Image.open(io.BytesIO(image_data)) as source:
+        image = source.convert("RGB")
+
+    detail = choose_detail(image)
+    limits, quality = DETAIL_PROFILES[detail]
+    width, height = _fit_size(image.width, image.height, limits)
+    if (width, height) != image.size:
+        image = image.resize((width, height), Image.LANCZOS)
+
+    data = _encode_jpeg(image, quality)
+    # 크기 제한을 넘으면 품질을 먼저 낮추고, 그래도 크면 해상도를 줄임
+    while len(data) > max_bytes:
+        if quality > MIN_JPEG_QUALITY:
+            quality = max(MIN_JPEG_QUALITY, quality - 10)
+        elif min(image.size) > 64:
+            image = image.resize(
+                (max(1, round(image.width * SCALE_STEP)), max(1, round(image.height * SCALE_STEP))),
+                Image.LANCZOS
+            )
+        else:
+            break
+        data = _encode_jpeg(image, quality)
+
+    return EncodedImage(data, "image/jpeg", detail, image.width, image.height)
@@ -0,0 +1,133 @@
+"""
+한국어 형태소 분석 도구
+MeCab-ko(python-mecab-ko)로 텍스트에서 검색에 쓸 단어(명사, 용언 어간, 외국어, 숫자)를 추출하는 모듈
+
+- 분석기는 스레드마다 한 번만 만들어 재사용합니다. (MeCab 객체는 스레드 간 공유하지 않음)
+- MeCab을 불러올 수 없는 환경에서는 공백/문장부호 기준 단어 분리로 대체합니다.
+- 복합 명사는 구성 명사(parts)를 함께 반환합니다. (예: 스케줄링 → 스케줄 + 링)
+  활용된 용언은 어간을 단어로 사용합니다. (예: 빠른 → 빠르)
+
+사용법:
+    terms = analyze("CPU 스케줄링은 프로세스를 선택한다")
+    # ['cpu', '스케줄링', '프로세스', '선택']
+    morphemes = analyze_morphemes("스케줄링은")
+    # [Morpheme(term='스케줄링', parts=['스케줄', '링'])]
+    morphemes_list = analyze_batch([slide1_text, slide2_text])
+"""
+
+import re
+import threading
+from typing import List, NamedTuple, Optional
+
+try:
+    from mecab import MeCab
+except ImportError:  # 네이티브 라이브러리가 없는 환경
+    MeCab = None
+
+# 검색어로 사용할 품사 태그 (세종 품사 태그 기준, 접두어로 비교)
+#   NNG/NNP: 일반/고유 명사 (의존 명사 NNB는 제외), XR: 어근, VV/VA: 동사/형용사 어간,
+#   SL: 외국어, SH: 한자, SN: 숫자
+INDEX_TAG_PREFIXES = ("NNG", "NNP", "XR", "VV", "VA", "SL", "SH", "SN")
+
+# MeCab이 없을 때 사용할 단어 분리 패턴
+_WORD_PATTERN = re.compile(r"[0-9A-Za-z가-힣]+")
+
+_local = threading.local()
+_warned = False
+
+
+def get_analyzer() -> Optional["MeCab"]:
+    """현재 스레드의 MeCab 분석기를 반환합니다. 사용할 수 없으면 None을 반환합니다."""
+    global _warned
+    if MeCab is None:
+        if not _warned:
+            print("[WARN] MeCab을 불러올 수 없어 단순 단어 분리로 검색어를 추출합니다.")
+            _warned = True
+        return None
+
+    analyzer = getattr(_local, "analyzer", None)
+    if analyzer is None:
+        analyzer = MeCab()
+        _local.analyzer = analyzer
+    return analyzer
+
+
+class Morpheme(NamedTuple):
+    """검색에 쓸 형태소"""
+    term: str  # 형태소 (활용된 용언은 어간)
+    parts: List[str]  # 복합 명사의 구성 명사 (복합 명사가 아니면 빈 리스트)
+
+
+def _index_tag(tag: str) -> bool:
+    # 복합 태그(예: "VV+EP")는 첫 형태소 기준
+    return tag.split("+")[0].startswith(INDEX_TAG_PREFIXES)
+
+
+def _expression_parts(expression: Optional[str]) -> List[tuple]:
+    """MeCab 기분석 표현("스케줄/NNG/*+링/NNG/*")을 (표층형, 품사) 목록으로 나눕니다."""
+    if not expression:
+        return []
+    parts = []
+    for item in expression.split("+"):
+        fields = item.split("/")
+        if len(fields) >= 2 and fields[0]:
+            parts.append((fields[0], fields[1]))
+    return parts
+
+
+def analyze_morphemes(text: str) -> List[Morpheme]:
+    """텍스트에서 검색에 쓸 형태소를 추출합니다. (영문은 소문자로 변환)
+
+    Args:
+        text: 분석할 텍스트
+
+    Returns:
+        Morpheme 리스트 (등장 순서, 중복 포함)
+    """
+    if not text:
+        return []
+
+    analyzer = get_analyzer()
+    if analyzer is None:
+        return [Morpheme(word.lower(), []) for word in _WORD_PATTERN.findall(text)]
+
+    morphemes = []
+    for token in analyzer.parse(text):
+        if not _index_tag(token.pos):
+            continue
+        feature_type = getattr(token.feature, "type", None)
+        expression = _expression_parts(getattr(token.feature, "expression", None))
+        term = token.surface
+        parts = []
+        if feature_type == "Compound":
+            parts = [surface.lower() for surface, tag in expression if _index_tag(tag)]
+        elif feature_type == "Inflect" and expression:
+            # 활용형(예: 빠른)은 어간(빠르)으로 저장
+            term = expression[0][0]
+        morphemes.append(Morpheme(term.lower(), parts))
+    return morphemes
+
+
+def analyze(text: str) -> List[str]:
+    """텍스트에서 검색에 쓸 단어를 추출합니다. (영문은 소문자로 변환)
+
+    Args:
+        text: 분석할 텍스트
+
+    Returns:
+        단어 리스트 (등장 순서, 중복 포함)
+    """
+    return [morpheme.term for morpheme in analyze_morphemes(text)]
+
+
+def analyze_batch(texts: List[str]) -> List[List[Morpheme]]:
+    """여러 텍스트를 같은 분석기로 한 번에 분석합니다.
+
+    Args:
+        texts: 분석할 텍스트 리스트
+
+    Returns:
+        텍스트별 Morpheme 리스트
+    """
+    get_analyzer()
+    return [analyze_morphemes(text) for text in texts]
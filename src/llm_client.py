@@ -0,0 +1,266 @@
+"""
+공유 OpenAI 클라이언트와 요청 스케줄러
+
+모든 모듈(이미지 캡셔닝, 세그먼트 매핑, 요약, 후처리, STT)이 하나의 OpenAI 클라이언트를 공유하고,
+프로세스 전체의 요청 수(RPM)와 토큰 수(TPM)를 토큰 버킷으로 조절합니다.
+여러 작업이 동시에 실행되어도 할당량을 넘지 않도록 요청을 대기시키며,
+실시간 요청(PRIORITY_REALTIME)은 배치 요청(PRIORITY_BATCH)보다 먼저 처리됩니다.
+429 응답을 받으면 Retry-After(없으면 지수 백오프)만큼 모든 요청을 잠시 멈춥니다.
+
+사용법:
+    response = chat_completion(
+        priority=PRIORITY_REALTIME,
+        model="gpt-4o",
+        messages=[...],
+    )
+    transcript = transcription(model="whisper-1", file=audio_file, response_format="text")
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import openai
+from dotenv import load_dotenv
+from openai import OpenAI
+
+# .env 파일에서 환경 변수 로드
+load_dotenv()
+
+# 요청 우선순위 (값이 작을수록 먼저 처리)
+PRIORITY_REALTIME = 0
+PRIORITY_BATCH = 1
+
+# 분당 요청/토큰 한도 (0이면 제한 없음)
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv('OPENAI_REQUESTS_PER_MINUTE', '500'))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv('OPENAI_TOKENS_PER_MINUTE', '300000'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '5'))
+
+# 재시도 대기 시간: BACKOFF_BASE * 2^시도횟수 (최대 BACKOFF_MAX초) 범위에서 무작위 (full jitter)
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# 응답 길이를 지정하지 않은 요청의 예상 출력 토큰 수
+DEFAULT_COMPLETION_TOKENS = 1024
+# 이미지 입력 1개의 예상 토큰 수 (detail: low / high)
+IMAGE_TOKENS = {"low": 85, "high": 765}
+
+# 재시도할 오류 (429, 연결 오류, 일시적인 서버 오류)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class RateLimitScheduler:
+    """분당 요청 수와 토큰 수를 제한하는 우선순위 토큰 버킷 스케줄러"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        """초기화 함수
+
+        Args:
+            requests_per_minute: 분당 최대 요청 수 (0 이하이면 제한 없음)
+            tokens_per_minute: 분당 최대 토큰 수 (0 이하이면 제한 없음)
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._cond = threading.Condition()
+        self._request_allowance = float(max(requests_per_minute, 0))
+        self._token_allowance = float(max(tokens_per_minute, 0))
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {PRIORITY_REALTIME: 0, PRIORITY_BATCH: 0}
+
+    def _refill(self, now: float):
+        """경과 시간만큼 버킷을 채웁니다. (잠금 안에서 호출)"""
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute > 0:
+            self._request_allowance = min(
+                float(self.requests_per_minute),
+                self._request_allowance + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute > 0:
+            self._token_allowance = min(
+                float(self.tokens_per_minute),
+                self._token_allowance + elapsed * self.tokens_per_minute / 60
+            )
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        """요청을 보낼 수 있을 때까지 예상 대기 시간(초)을 계산합니다. (잠금 안에서 호출)"""
+        wait = self._paused_until - now
+        if self.requests_per_minute > 0 and self._request_allowance < 1:
+            wait = max(wait, (1 - self._request_allowance) * 60 / self.requests_per_minute)
+        if self.tokens_per_minute > 0 and self._token_allowance < tokens:
+            wait = max(wait, (tokens - self._token_allowance) * 60 / self.tokens_per_minute)
+        return wait
+
+    def acquire(self, tokens: int = 0, priority: int = PRIORITY_BATCH):
+        """요청 1개와 예상 토큰 수만큼 할당량을 확보할 때까지 기다립니다.
+
+        더 높은 우선순위의 요청이 기다리고 있으면 그 요청이 먼저 할당량을 가져갑니다.
+
+        Raises:
+            ValueError: priority가 PRIORITY_REALTIME, PRIORITY_BATCH가 아닐 때
+        """
+        if priority not in self._waiting:
+            raise ValueError(f"알 수 없는 요청 우선순위입니다: {priority}")
+        if self.tokens_per_minute > 0:
+            # 한도보다 큰 요청도 언젠가는 실행될 수 있도록 제한
+            tokens = min(tokens, self.tokens_per_minute)
+
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    higher_waiting = any(
+                        count for p, count in self._waiting.items() if p < priority
+                    )
+                    wait = self._wait_time(now, tokens)
+                    if not higher_waiting and wait <= 0:
+                        if self.requests_per_minute > 0:
+                            self._request_allowance -= 1
+                        if self.tokens_per_minute > 0:
+                            self._token_allowance -= tokens
+                        return
+                    # 우선순위가 높은 요청이 끝나면 notify로 깨어남
+                    self._cond.wait(timeout=max(wait, 0.05) if not higher_waiting else 1.0)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def settle(self, reserved_tokens: int, actual_tokens: int):
+        """실제 사용한 토큰 수로 예상치와의 차이를 보정합니다. (요청이 실패했으면 actual_tokens=0으로 예약을 돌려줌)"""
+        if self.tokens_per_minute <= 0:
+            return
+        with self._cond:
+            self._token_allowance = min(
+                float(self.tokens_per_minute),
+                self._token_allowance + reserved_tokens - actual_tokens
+            )
+            self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """429 응답을 받았을 때 모든 요청을 seconds초 동안 멈춥니다."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+# 프로세스 전체에서 공유하는 스케줄러
+scheduler = RateLimitScheduler(OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """프로세스 전체에서 공유하는 OpenAI 클라이언트를 반환합니다.
+
+    재시도는 스케줄러가 할당량과 함께 관리하므로 SDK 자체 재시도는 끕니다.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise ValueError("OPENAI_API_KEY가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+            _client = OpenAI(
+                api_key=api_key,
+                base_url="https://api.openai.com/v1",
+                max_retries=0
+            )
+        return _client
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """메시지의 입력 토큰과 출력 토큰을 대략적으로 추정합니다.
+
+    한국어가 섞인 텍스트는 대략 2자당 1토큰으로 계산합니다. 실제 사용량은 응답 후 settle로 보정합니다.
+    """
+    tokens = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // 2
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    tokens += len(part.get("text", "")) // 2
+                elif part.get("type") == "image_url":
+                    detail = part.get("image_url", {}).get("detail", "high")
+                    tokens += IMAGE_TOKENS.get(detail, IMAGE_TOKENS["high"])
+    return tokens + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """재시도 전 대기 시간(초)을 계산합니다. 429 응답에 Retry-After가 있으면 그 값을 우선합니다."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _call_with_retry(func, tokens: int, priority: int, **kwargs):
+    """스케줄러로 할당량을 확보한 뒤 API를 호출하고, 일시적인 오류는 재시도합니다."""
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        scheduler.acquire(tokens, priority)
+        try:
+            response = func(**kwargs)
+        except Exception as e:
+            # 실패한 요청은 토큰을 쓰지 않았으므로 예약한 토큰을 돌려줌 (요청 수는 그대로 차감)
+            scheduler.settle(tokens, 0)
+            if not isinstance(e, RETRYABLE_ERRORS) or attempt >= OPENAI_MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt, e)
+            if isinstance(e, openai.RateLimitError):
+                # 다른 요청도 같은 한도를 쓰므로 전체 요청을 멈춤
+                scheduler.pause(delay)
+            print(f"[WARN] OpenAI 요청 재시도 {attempt + 1}/{OPENAI_MAX_RETRIES} ({type(e).__name__}, {delay:.1f}초 대기)")
+            time.sleep(delay)
+            continue
+
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            scheduler.settle(tokens, usage.total_tokens)
+        return response
+
+
+def chat_completion(priority: int = PRIORITY_BATCH, **kwargs):
+    """공유 클라이언트로 chat.completions.create를 호출합니다.
+
+    Args:
+        priority: 요청 우선순위 (PRIORITY_REALTIME 또는 PRIORITY_BATCH)
+        **kwargs: chat.completions.create에 그대로 전달할 인자
+
+    Returns:
+        OpenAI 응답 객체
+    """
+    tokens = estimate_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+    return _call_with_retry(get_client().chat.completions.create, tokens, priority, **kwargs)
+
+
+def transcription(priority: int = PRIORITY_BATCH, **kwargs):
+    """공유 클라이언트로 audio.transcriptions.create를 호출합니다.
+
+    Whisper는 토큰이 아닌 요청 수 한도만 적용합니다.
+    재시도할 때 같은 파일을 처음부터 다시 보내도록 파일 위치를 되돌립니다.
+    """
+    audio_file = kwargs.get("file")
+    client = get_client()
+
+    def create(**call_kwargs):
+        if hasattr(audio_file, "seek"):
+            audio_file.seek(0)
+        return client.audio.transcriptions.create(**call_kwargs)
+
+    return _call_with_retry(create, 0, priority, **kwargs)
@@ -0,0 +1,177 @@
+"""
+작업별 슬라이드 이미지 저장소
+PDF를 작업마다 한 번만 렌더링하고, 용도별 이미지를 작업 디렉토리에 저장해 재사용하는 모듈
+
+용도(variant):
+    api      이미지 캡셔닝 요청용 JPEG  ({job_dir}/pages/api/{n}.jpg)
+    display  화면 표시용 PNG           ({job_dir}/image/{n}.png, /file/{job_id}/image/{n}.png로 제공)
+
+한 번의 렌더링 패스에서 요청한 용도의 이미지를 모두 만들고, 완료된 용도는 manifest에 기록합니다.
+PDF 파일이 바뀌면(크기/수정 시각) 저장된 이미지를 다시 만듭니다.
+
+사용법:
+    store = PageImageStore(job_dir)
+    for page in store.iter_pages(pdf_path, "api", also=("display",)):
+        ...  # 캡셔닝 (화면 표시용 이미지도 함께 저장됨)
+    paths = store.ensure(pdf_path, "display")  # 이미 있으면 렌더링하지 않음
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from src.pdf_renderer import PDF_JPEG_QUALITY, PDF_RENDER_DPI, RenderedPage, RenderSpec, iter_page_variants
+
+# 화면 표시용 이미지 해상도
+PAGE_DISPLAY_DPI = int(os.getenv('PAGE_DISPLAY_DPI', '200'))
+
+MANIFEST_PATH = os.path.join("pages", "manifest.json")
+
+
+class VariantSpec(NamedTuple):
+    """용도별 이미지 설정"""
+    directory: str  # 작업 디렉토리 기준 경로
+    fmt: str
+    extension: str
+    dpi: int
+    quality: int
+
+
+VARIANTS: Dict[str, VariantSpec] = {
+    "api": VariantSpec(os.path.join("pages", "api"), "jpeg", "jpg", PDF_RENDER_DPI, PDF_JPEG_QUALITY),
+    "display": VariantSpec("image", "png", "png", PAGE_DISPLAY_DPI, 0),
+}
+
+# manifest 갱신을 직렬화하기 위한 잠금
+_manifest_lock = threading.Lock()
+
+
+def _write_atomic(path: str, data: bytes):
+    """임시 파일에 쓴 뒤 교체하여 다른 요청이 쓰다 만 파일을 읽지 않도록 합니다."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _pdf_signature(pdf_path: str) -> Dict[str, int]:
+    stat = os.stat(pdf_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class PageImageStore:
+    """작업 디렉토리의 슬라이드 이미지 저장소"""
+
+    def __init__(self, job_dir: str):
+        """초기화 함수
+
+        Args:
+            job_dir: 작업 디렉토리 경로
+        """
+        self.job_dir = job_dir
+        self.manifest_path = os.path.join(job_dir, MANIFEST_PATH)
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _mark_complete(self, variant: str, pdf_path: str, sizes: List[List[int]]):
+        spec = VARIANTS[variant]
+        with _manifest_lock:
+            manifest = self._read_manifest()
+            signature = _pdf_signature(pdf_path)
+            if manifest.get("source") != signature:
+                manifest = {"source": signature, "variants": {}}
+            manifest["variants"][variant] = {"dpi": spec.dpi, "fmt": spec.fmt, "quality": spec.quality, "sizes": sizes}
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            _write_atomic(self.manifest_path, json.dumps(manifest).encode("utf-8"))
+
+    def _complete_info(self, variant: str, pdf_path: str) -> Optional[Dict]:
+        """용도별 이미지가 현재 PDF와 설정으로 모두 저장되어 있으면 manifest 항목을 반환합니다."""
+        manifest = self._read_manifest()
+        if manifest.get("source") != _pdf_signature(pdf_path):
+            return None
+        info = manifest.get("variants", {}).get(variant)
+        spec = VARIANTS[variant]
+        if not info or (info["dpi"], info["fmt"], info["quality"]) != (spec.dpi, spec.fmt, spec.quality):
+            return None
+        return info
+
+    def page_path(self, variant: str, number: int) -> str:
+        """페이지 이미지 파일 경로"""
+        spec = VARIANTS[variant]
+        return os.path.join(self.job_dir, spec.directory, f"{number}.{spec.extension}")
+
+    def page_relpath(self, variant: str, number: int) -> str:
+        """작업 디렉토리 기준 페이지 이미지 경로 (URL 생성용, / 구분)"""
+        spec = VARIANTS[variant]
+        return "/".join(spec.directory.split(os.sep) + [f"{number}.{spec.extension}"])
+
+    def iter_pages(self, pdf_path: str, variant: str = "api", also: Iterable[str] = ()) -> Iterator[RenderedPage]:
+        """페이지 이미지를 순서대로 반환합니다. 저장된 이미지가 있으면 렌더링하지 않습니다.
+
+        Args:
+            pdf_path: PDF 파일 경로
+            variant: 반환할 이미지 용도
+            also: 렌더링이 필요할 때 함께 만들어 둘 다른 용도
+
+        Yields:
+            RenderedPage (variant 이미지)
+        """
+        info = self._complete_info(variant, pdf_path)
+        missing = [v for v in also if v != variant and self._complete_info(v, pdf_path) is None]
+        if info is not None and not missing:
+            for number, (width, height) in enumerate(info["sizes"], 1):
+                with open(self.page_path(variant, number), "rb") as f:
+                    yield RenderedPage(number, f.read(), width, height)
+            return
+
+        # 한 번의 패스로 없는 용도의 이미지를 모두 렌더링 (variant가 이미 있으면 저장된 이미지를 반환)
+        # 페이지가 많으면 iter_page_variants가 여러 프로세스로 나눠 렌더링
+        targets = ([] if info is not None else [variant]) + missing
+        for target in targets:
+            os.makedirs(os.path.join(self.job_dir, VARIANTS[target].directory), exist_ok=True)
+        sizes: Dict[str, List[List[int]]] = {target: [] for target in targets}
+        specs = [
+            RenderSpec(VARIANTS[target].dpi, VARIANTS[target].fmt, VARIANTS[target].quality or PDF_JPEG_QUALITY)
+            for target in targets
+        ]
+
+        for rendered_pages in iter_page_variants(pdf_path, specs):
+            primary = None
+            for target, rendered in zip(targets, rendered_pages):
+                _write_atomic(self.page_path(target, rendered.number), rendered.data)
+                sizes[target].append([rendered.width, rendered.height])
+                if target == variant:
+                    primary = rendered
+            if primary is None:
+                number = rendered_pages[0].number
+                width, height = info["sizes"][number - 1]
+                with open(self.page_path(variant, number), "rb") as f:
+                    primary = RenderedPage(number, f.read(), width, height)
+            yield primary
+
+        for target in targets:
+            self._mark_complete(target, pdf_path, sizes[target])
+
+    def ensure(self, pdf_path: str, variant: str) -> List[str]:
+        """용도별 이미지를 모두 저장해 두고 작업 디렉토리 기준 경로 목록을 반환합니다.
+
+        이미 저장되어 있으면 렌더링하지 않으므로 여러 번 호출해도 결과가 같습니다.
+        """
+        info = self._complete_info(variant, pdf_path)
+        if info is None:
+            for _ in self.iter_pages(pdf_path, variant):
+                pass
+            info = self._complete_info(variant, pdf_path)
+        return [self.page_relpath(variant, number) for number in range(1, len(info["sizes"]) + 1)]
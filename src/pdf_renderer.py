@@ -0,0 +1,220 @@
+"""
+PDF 페이지 렌더링 도구
+PyMuPDF로 PDF를 한 페이지씩 이미지로 렌더링하는 모듈
+
+pdf2image(poppler)처럼 모든 페이지를 한꺼번에 이미지로 만들지 않고 제너레이터로 한 장씩 넘겨주므로,
+첫 페이지 분석을 바로 시작할 수 있고 메모리에는 처리 중인 페이지만 남습니다.
+
+페이지가 많은 PDF(PDF_PARALLEL_MIN_PAGES 이상)는 페이지 구간을 나눠 여러 프로세스에서 렌더링하고,
+결과는 페이지 순서대로 넘겨줍니다. 프로세스 풀은 프로세스 전체에서 하나를 공유하며
+크기(PDF_RENDER_PROCESSES)를 CPU 코어 수의 절반으로 제한해 요청 처리 스레드가 CPU를 쓸 수 있도록 합니다.
+
+사용법:
+    for page in iter_pages(pdf_path, dpi=150, fmt="jpeg"):
+        img_str = encode_base64(page.data)
+"""
+
+import base64
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import pymupdf
+
+# 기본 렌더링 설정 (pdf2image 기본값과 같은 200 DPI)
+PDF_RENDER_DPI = int(os.getenv('PDF_RENDER_DPI', '200'))
+PDF_JPEG_QUALITY = int(os.getenv('PDF_JPEG_QUALITY', '90'))
+
+SUPPORTED_FORMATS = ("jpeg", "png")
+
+# 멀티 프로세스 렌더링 설정
+PDF_RENDER_PROCESSES = int(os.getenv('PDF_RENDER_PROCESSES', str(max(1, (os.cpu_count() or 2) // 2))))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '24'))
+# 프로세스 하나가 한 번에 렌더링하는 최대 페이지 수 (작을수록 첫 페이지가 빨리 나옴)
+PDF_PARALLEL_CHUNK_PAGES = 8
+
+
+class RenderSpec(NamedTuple):
+    """렌더링 설정"""
+    dpi: int = PDF_RENDER_DPI
+    fmt: str = "jpeg"
+    quality: int = PDF_JPEG_QUALITY
+
+
+class RenderedPage(NamedTuple):
+    """렌더링된 페이지 한 장"""
+    number: int  # 1부터 시작하는 페이지 번호
+    data: bytes  # 인코딩된 이미지 (JPEG 또는 PNG)
+    width: int
+    height: int
+
+
+def page_count(pdf_path: str) -> int:
+    """PDF의 페이지 수를 반환합니다."""
+    with pymupdf.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def render_page(page: "pymupdf.Page", dpi: int = PDF_RENDER_DPI, fmt: str = "jpeg",
+                quality: int = PDF_JPEG_QUALITY) -> RenderedPage:
+    """열려 있는 PDF 페이지 하나를 이미지로 렌더링합니다.
+
+    Args:
+        page: PyMuPDF 페이지
+        dpi: 렌더링 해상도
+        fmt: 이미지 형식 (jpeg 또는 png)
+        quality: JPEG 품질 (png는 무시)
+
+    Returns:
+        RenderedPage
+    """
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"지원하지 않는 이미지 형식입니다: {fmt}")
+
+    # JPEG은 알파 채널을 지원하지 않으므로 RGB로 렌더링
+    pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+    if fmt == "jpeg":
+        data = pixmap.tobytes(output="jpeg", jpg_quality=quality)
+    else:
+        data = pixmap.tobytes(output="png")
+    return RenderedPage(page.number + 1, data, pixmap.width, pixmap.height)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """렌더링 프로세스 풀을 반환합니다. (스레드가 있는 서버 프로세스를 fork하지 않도록 spawn 사용)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor):
+    """비정상 종료된 프로세스 풀을 정리해 다음 호출에서 새로 만들도록 합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_in_thread(pdf_path: str, specs: Sequence[RenderSpec],
+                    first_page: int, last_page: int) -> Iterator[Tuple[RenderedPage, ...]]:
+    """현재 스레드에서 페이지 구간을 렌더링합니다."""
+    with pymupdf.open(pdf_path) as doc:
+        for index in range(first_page - 1, last_page):
+            yield tuple(render_page(doc[index], dpi=spec.dpi, fmt=spec.fmt, quality=spec.quality) for spec in specs)
+
+
+def _render_range(pdf_path: str, first_page: int, last_page: int,
+                  specs: Sequence[RenderSpec]) -> List[Tuple[RenderedPage, ...]]:
+    """페이지 구간을 설정별로 렌더링합니다. (프로세스 풀에서 실행)"""
+    with pymupdf.open(pdf_path) as doc:
+        return [
+            tuple(render_page(doc[index], dpi=spec.dpi, fmt=spec.fmt, quality=spec.quality) for spec in specs)
+            for index in range(first_page - 1, last_page)
+        ]
+
+
+def iter_page_variants(pdf_path: str,
+                       specs: Sequence[RenderSpec],
+                       first_page: int = 1,
+                       last_page: Optional[int] = None,
+                       processes: Optional[int] = None) -> Iterator[Tuple[RenderedPage, ...]]:
+    """페이지마다 여러 설정의 이미지를 렌더링하여 페이지 순서대로 반환합니다.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        specs: 렌더링 설정 목록
+        first_page: 시작 페이지 (1부터)
+        last_page: 마지막 페이지 (포함, None이면 끝까지)
+        processes: 사용할 프로세스 수 (None이면 페이지 수에 따라 자동, 1이면 현재 스레드에서 렌더링)
+
+    Yields:
+        specs 순서의 RenderedPage 튜플
+    """
+    total = page_count(pdf_path)
+    last = total if last_page is None else min(last_page, total)
+    pages = last - first_page + 1
+    if pages <= 0:
+        return
+
+    if processes is None:
+        processes = PDF_RENDER_PROCESSES if pages >= PDF_PARALLEL_MIN_PAGES else 1
+    processes = min(processes, PDF_RENDER_PROCESSES)
+
+    if processes <= 1:
+        yield from _iter_in_thread(pdf_path, specs, first_page, last)
+        return
+
+    # 구간별로 프로세스에 나눠 맡기고, 렌더링이 소비보다 너무 앞서지 않도록 진행 중인 구간 수를 제한
+    chunk = max(1, min(PDF_PARALLEL_CHUNK_PAGES, -(-pages // processes)))
+    ranges = deque((start, min(start + chunk - 1, last)) for start in range(first_page, last + 1, chunk))
+    pool = _get_pool()
+    in_flight = deque()
+    next_page = first_page
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < processes * 2:
+                start, end = ranges.popleft()
+                in_flight.append(pool.submit(_render_range, pdf_path, start, end, tuple(specs)))
+            for rendered in in_flight.popleft().result():
+                next_page = rendered[0].number + 1
+                yield rendered
+    except BrokenProcessPool:
+        # 렌더링 프로세스가 죽으면(MuPDF 오류 등) 풀을 새로 만들도록 정리하고, 남은 페이지는 현재 스레드에서 렌더링
+        print(f"[WARN] PDF 렌더링 프로세스가 비정상 종료되어 {next_page}페이지부터 현재 스레드에서 렌더링합니다.")
+        in_flight.clear()
+        _reset_pool(pool)
+        yield from _iter_in_thread(pdf_path, specs, next_page, last)
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def iter_pages(pdf_path: str,
+               dpi: int = PDF_RENDER_DPI,
+               fmt: str = "jpeg",
+               quality: int = PDF_JPEG_QUALITY,
+               first_page: int = 1,
+               last_page: Optional[int] = None,
+               processes: Optional[int] = None) -> Iterator[RenderedPage]:
+    """PDF를 한 페이지씩 렌더링하여 반환합니다.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        dpi: 렌더링 해상도
+        fmt: 이미지 형식 (jpeg 또는 png)
+        quality: JPEG 품질
+        first_page: 시작 페이지 (1부터)
+        last_page: 마지막 페이지 (포함, None이면 끝까지)
+        processes: 사용할 프로세스 수 (None이면 페이지 수에 따라 자동)
+
+    Yields:
+        RenderedPage (페이지 순서대로)
+    """
+    spec = RenderSpec(dpi, fmt, quality)
+    for (page,) in iter_page_variants(pdf_path, [spec], first_page, last_page, processes):
+        yield page
+
+
+def encode_base64(data: bytes) -> str:
+    """이미지 바이트를 base64 문자열로 인코딩합니다."""
+    return base64.b64encode(data).decode()
+
+
+def render_pdf_base64(pdf_path: str, dpi: int = PDF_RENDER_DPI, fmt: str = "jpeg",
+                      quality: int = PDF_JPEG_QUALITY) -> List[str]:
+    """모든 페이지를 base64 문자열 리스트로 반환합니다. (전체 페이지가 필요한 경우에만 사용)"""
+    return [encode_base64(page.data) for page in iter_pages(pdf_path, dpi=dpi, fmt=fmt, quality=quality)]
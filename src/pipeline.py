@@ -0,0 +1,140 @@
+"""
+작업 파이프라인 실행 도구
+
+처리 단계 간의 의존 관계를 작은 DAG(Directed Acyclic Graph)로 선언하면,
+의존하는 단계가 모두 끝난 단계부터 스레드에서 동시에 실행합니다.
+예를 들어 오디오 처리(STT → 세그먼트 분리)와 PDF 처리(이미지 캡셔닝)는
+세그먼트 매핑 전까지 공유하는 데이터가 없으므로 병렬로 진행됩니다.
+
+사용법:
+    results = run_pipeline(
+        [
+            Stage("stt", run_stt, weight=15),
+            Stage("captions", run_captioning, weight=30),
+            Stage("mapping", run_mapping, depends_on=("stt", "captions"), weight=10),
+        ],
+        progress_callback=lambda fraction, message: ...,
+    )
+
+각 단계 함수는 ``func(inputs, report)`` 형태로 호출됩니다.
+    - inputs: 의존 단계 이름 → 해당 단계 결과
+    - report: ``report(current, total, message=None)`` 진행률 보고 함수
+
+전체 진행률은 단계별 진행 비율을 weight로 가중 평균한 값(0.0 ~ 1.0)입니다.
+"""
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class Stage:
+    """파이프라인의 한 단계"""
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[[Dict[str, Any], Callable], Any],
+                 depends_on: Iterable[str] = (),
+                 weight: float = 1.0):
+        """초기화 함수
+
+        Args:
+            name: 단계 이름 (결과 딕셔너리의 키로 사용)
+            func: 단계 실행 함수 ``func(inputs, report)``
+            depends_on: 먼저 완료되어야 하는 단계 이름 목록
+            weight: 전체 진행률 계산 시 이 단계가 차지하는 비중
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.weight = weight
+
+
+def _validate_stages(stages: List[Stage]) -> Dict[str, Stage]:
+    """단계 이름 중복, 존재하지 않는 의존 단계, 순환 의존을 검사합니다."""
+    stage_map: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in stage_map:
+            raise ValueError(f"중복된 단계 이름입니다: {stage.name}")
+        stage_map[stage.name] = stage
+
+    for stage in stages:
+        for dep in stage.depends_on:
+            if dep not in stage_map:
+                raise ValueError(f"'{stage.name}' 단계의 의존 단계 '{dep}'가 존재하지 않습니다.")
+
+    # 위상 정렬로 순환 의존 확인
+    remaining = {name: set(stage.depends_on) for name, stage in stage_map.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"단계 간 순환 의존이 있습니다: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return stage_map
+
+
+def run_pipeline(stages: List[Stage],
+                 progress_callback: Optional[Callable[[float, Optional[str]], None]] = None
+                 ) -> Dict[str, Any]:
+    """의존 관계에 따라 단계를 실행하고 모든 단계의 결과를 반환합니다.
+
+    Args:
+        stages: 실행할 단계 목록
+        progress_callback: 전체 진행률 콜백 함수 (fraction 0.0~1.0, message)
+
+    Returns:
+        단계 이름 → 단계 결과 딕셔너리
+
+    Raises:
+        단계 실행 중 발생한 첫 번째 예외. 아직 시작하지 않은 단계는 실행되지 않습니다.
+    """
+    stage_map = _validate_stages(stages)
+    total_weight = sum(stage.weight for stage in stages) or 1.0
+
+    results: Dict[str, Any] = {}
+    fractions = {name: 0.0 for name in stage_map}
+    progress_lock = threading.Lock()
+
+    def make_reporter(name: str) -> Callable:
+        def report(current: float, total: float, message: Optional[str] = None):
+            with progress_lock:
+                fraction = min(1.0, current / total) if total else 1.0
+                # 진행률이 뒤로 가지 않도록 최대값 유지
+                fractions[name] = max(fractions[name], fraction)
+                overall = sum(stage_map[n].weight * f for n, f in fractions.items()) / total_weight
+                # 콜백 순서가 진행률 순서와 일치하도록 잠금 안에서 호출
+                if progress_callback:
+                    progress_callback(overall, message)
+        return report
+
+    reporters = {name: make_reporter(name) for name in stage_map}
+    pending = dict(stage_map)
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, len(stage_map)))
+
+    try:
+        while pending or running:
+            # 의존 단계가 모두 끝난 단계 시작
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.depends_on):
+                    inputs = {dep: results[dep] for dep in stage.depends_on}
+                    future = executor.submit(stage.func, inputs, reporters[name])
+                    running[future] = name
+                    del pending[name]
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                reporters[name](1, 1)
+    except Exception:
+        # 실행 중인 단계는 중단할 수 없으므로 기다리지 않고, 대기 중인 단계만 취소
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    executor.shutdown(wait=True)
+    return results
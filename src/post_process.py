@@ -20,7 +20,8 @@ from datetime import datetime
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from src.llm_client import PRIORITY_REALTIME, chat_completion
 
 # ----------------------------------------------------------------------------
 # 환경변수 설정
@@ -28,11 +29,6 @@ from openai import OpenAI
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url="https://api.openai.com/v1",
-)
-
 # ----------------------------------------------------------------------------
 # 세그먼트 병합 (메세지 크기 조정)
 # ----------------------------------------------------------------------------
@@ -135,7 +131,9 @@ Respond with the JSON array ONLY, e.g.:
         }
     ]
 
-    response = client.chat.completions.create(
+    # 실시간 세션 후처리는 사용자가 기다리는 요청이므로 배치 작업보다 먼저 처리
+    response = chat_completion(
+        priority=PRIORITY_REALTIME,
         model="gpt-4",
         messages=messages,
         functions=functions,
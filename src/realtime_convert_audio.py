@@ -1,10 +1,11 @@
 import os
 import subprocess
-from openai import OpenAI
 from dotenv import load_dotenv
 import json
 from datetime import datetime
 
+from src.llm_client import PRIORITY_REALTIME, transcription
+
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
@@ -30,8 +31,6 @@ def transcribe_audio_with_timestamps(audio_file_path: str):
     
     print(f"API 키가 로드되었습니다: {api_key[:8]}...")
     
-    client = OpenAI(api_key=api_key)
-    
     output_dir = "data/realtime_convert_audio"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -42,7 +41,8 @@ def transcribe_audio_with_timestamps(audio_file_path: str):
 
     try:
         with open(converted_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
+            transcript = transcription(
+                priority=PRIORITY_REALTIME,
                 model="whisper-1",
                 file=audio_file,
                 response_format="text",
@@ -36,7 +36,8 @@ from datetime import datetime
 from typing import Any, Dict, List
 
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from src.llm_client import PRIORITY_BATCH, chat_completion
 
 # ----------------------------------------------------------------------------
 # 환경변수 설정
@@ -44,11 +45,6 @@ from openai import OpenAI
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url="https://api.openai.com/v1",
-)
-
 # ----------------------------------------------------------------------------
 # 세그먼트 병합 (메세지 크기 조정)
 # ----------------------------------------------------------------------------
@@ -183,7 +179,8 @@ Respond with the JSON array ONLY, e.g.:
         }
     ]
 
-    response = client.chat.completions.create(
+    response = chat_completion(
+        priority=PRIORITY_BATCH,
         model="gpt-4o",
         messages=messages,
         functions=functions,
@@ -10,22 +10,144 @@ CLOVA Studio 문단 나누기 API를 이용한 텍스트 세그먼트 분리 도
 
 import os
 import json
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Dict, Any, Optional, List
+from cachetools import LRUCache
 from dotenv import load_dotenv
 
+from src.cache import DiskCache, hash_bytes, make_key
+
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
+# 세그먼트 분리 결과 캐시 (텍스트 해시 + 분리 파라미터 기준)
+# 메모리 LRU 캐시를 먼저 조회하고, SEGMENT_CACHE_DIR이 설정된 경우 디스크에도 보관
+segment_cache = LRUCache(maxsize=int(os.getenv('SEGMENT_CACHE_SIZE', '256')))
+segment_cache_lock = threading.Lock()
+segment_disk_cache = (
+    DiskCache(
+        os.getenv('SEGMENT_CACHE_DIR'),
+        max_bytes=int(os.getenv('SEGMENT_CACHE_MAX_MB', '50')) * 1024 * 1024
+    )
+    if os.getenv('SEGMENT_CACHE_DIR') else None
+)
+
+def get_cached_segments(cache_key: str) -> Optional[List[Dict[str, Any]]]:
+    """메모리 → 디스크 순서로 캐시된 세그먼트 분리 결과를 조회합니다."""
+    with segment_cache_lock:
+        segments = segment_cache.get(cache_key)
+    if segments is None and segment_disk_cache is not None:
+        segments = segment_disk_cache.get(cache_key)
+        if segments is not None:
+            with segment_cache_lock:
+                segment_cache[cache_key] = segments
+    if segments is None:
+        return None
+    # 호출한 쪽에서 결과를 수정해도 캐시가 바뀌지 않도록 복사본 반환
+    return [dict(segment) for segment in segments]
+
+def set_cached_segments(cache_key: str, segments: List[Dict[str, Any]]):
+    """세그먼트 분리 결과를 메모리(및 디스크) 캐시에 저장합니다."""
+    segments = [dict(segment) for segment in segments]
+    with segment_cache_lock:
+        segment_cache[cache_key] = segments
+    if segment_disk_cache is not None:
+        segment_disk_cache.set(cache_key, segments)
+
+# CLOVA API 요청 설정
+CLOVA_CONNECT_TIMEOUT = float(os.getenv('CLOVA_CONNECT_TIMEOUT', '5'))
+CLOVA_READ_TIMEOUT = float(os.getenv('CLOVA_READ_TIMEOUT', '60'))
+CLOVA_MAX_RETRIES = int(os.getenv('CLOVA_MAX_RETRIES', '4'))
+CLOVA_POOL_SIZE = int(os.getenv('CLOVA_POOL_SIZE', '16'))
+# 재시도 대기 시간: BACKOFF_BASE * 2^시도횟수 (최대 BACKOFF_MAX초) 범위에서 무작위 (full jitter)
+CLOVA_BACKOFF_BASE = 0.5
+CLOVA_BACKOFF_MAX = 20.0
+# 재시도할 HTTP 상태 코드 (요청 한도 초과, 일시적인 서버 오류)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """프로세스 전체에서 공유하는 커넥션 풀 세션을 반환합니다. (매 요청 TLS 핸드셰이크 방지)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=CLOVA_POOL_SIZE)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """재시도 전 대기 시간(초)을 계산합니다. 서버가 Retry-After를 주면 그 값을 우선합니다."""
+    if retry_after:
+        try:
+            return min(CLOVA_BACKOFF_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(CLOVA_BACKOFF_MAX, CLOVA_BACKOFF_BASE * (2 ** attempt)))
+
+class ClovaMetrics:
+    """CLOVA API 호출 지연 시간과 재시도 통계"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+    
+    def record_request(self, latency: float, success: bool):
+        with self._lock:
+            self.requests += 1
+            if not success:
+                self.failures += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+    
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "avg_latency": self.total_latency / self.requests if self.requests else 0.0,
+                "max_latency": self.max_latency,
+            }
+
+# 모든 ClovaSegmenter 인스턴스가 공유하는 통계
+clova_metrics = ClovaMetrics()
+
+def get_clova_metrics() -> Dict[str, Any]:
+    """CLOVA API 호출 통계(요청/실패/재시도 횟수, 평균/최대 지연 시간)를 반환합니다."""
+    return clova_metrics.snapshot()
+
 class ClovaSegmenter:
     """CLOVA Studio API를 사용하여 텍스트를 세그먼트로 분리하는 클래스"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self,
+                 api_key: Optional[str] = None,
+                 session: Optional[requests.Session] = None,
+                 timeout: Optional[tuple] = None,
+                 max_retries: Optional[int] = None):
         """초기화 함수
         
         Args:
             api_key: CLOVA Studio API 키. None인 경우 환경 변수에서 로드
+            session: 사용할 HTTP 세션. None인 경우 공유 커넥션 풀 세션 사용
+            timeout: (연결, 응답 대기) 타임아웃 초. None인 경우 환경 변수 설정값 사용
+            max_retries: 429/5xx 및 연결 오류 시 최대 재시도 횟수
         """
         self.api_key = api_key or os.getenv('CLOVA_API_KEY')
         if not self.api_key:
@@ -36,6 +158,31 @@ class ClovaSegmenter:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        self.session = session or get_session()
+        self.timeout = timeout or (CLOVA_CONNECT_TIMEOUT, CLOVA_READ_TIMEOUT)
+        self.max_retries = CLOVA_MAX_RETRIES if max_retries is None else max_retries
+    
+    def _post(self, payload: Dict[str, Any]) -> requests.Response:
+        """429/5xx 응답이나 연결 오류가 나면 지수 백오프(jitter)로 재시도하며 요청합니다."""
+        for attempt in range(self.max_retries + 1):
+            started = time.monotonic()
+            try:
+                response = self.session.post(self.api_url, headers=self.headers, json=payload, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                clova_metrics.record_request(time.monotonic() - started, success=False)
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+            else:
+                retryable = response.status_code in RETRY_STATUS_CODES
+                clova_metrics.record_request(time.monotonic() - started, success=not retryable and response.ok)
+                if not retryable or attempt >= self.max_retries:
+                    return response
+                delay = backoff_delay(attempt, response.headers.get('Retry-After'))
+            
+            clova_metrics.record_retry()
+            print(f"[WARN] CLOVA API 요청 재시도 {attempt + 1}/{self.max_retries} ({delay:.1f}초 대기)")
+            time.sleep(delay)
     
     def segment_text(self, 
                     text: str, 
@@ -67,7 +214,7 @@ class ClovaSegmenter:
         }
         
         try:
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
+            response = self._post(payload)
             response.raise_for_status()
             
             result = response.json()
@@ -86,6 +233,17 @@ class ClovaSegmenter:
         except Exception as e:
             return {"error": f"알 수 없는 오류: {str(e)}"}
 
+_segmenter = None
+_segmenter_lock = threading.Lock()
+
+def get_segmenter() -> ClovaSegmenter:
+    """segment_split에서 공유하는 ClovaSegmenter 인스턴스를 반환합니다."""
+    global _segmenter
+    with _segmenter_lock:
+        if _segmenter is None:
+            _segmenter = ClovaSegmenter()
+        return _segmenter
+
 def segment_split(
     stt_data: Dict[str, Any],
     alpha: float = 0.5,
@@ -112,9 +270,19 @@ def segment_split(
         text = stt_data.get("text", "")
         if not text:
             raise ValueError("STT 결과에 텍스트가 없습니다.")
+        
+        # 같은 텍스트를 같은 파라미터로 분리한 결과가 있으면 재사용
+        cache_key = make_key(
+            "segment", hash_bytes(text.encode("utf-8")),
+            alpha, seg_cnt, post_process, max_size, min_size
+        )
+        cached_segments = get_cached_segments(cache_key)
+        if cached_segments is not None:
+            print(f"[INFO] 캐시된 세그먼트 분리 결과를 사용합니다 ({len(cached_segments)}개 세그먼트)")
+            return cached_segments
 
-        # CLOVA API 호출
-        segmenter = ClovaSegmenter()
+        # CLOVA API 호출 (공유 세션 사용)
+        segmenter = get_segmenter()
         response = segmenter.segment_text(
             text=text,
             alpha=alpha,
@@ -151,6 +319,7 @@ def segment_split(
             
             print(f"[INFO] 세그먼트 분리 결과가 {output_path}에 저장되었습니다")
             
+            set_cached_segments(cache_key, formatted_result)
             return formatted_result
         else:
             raise ValueError("세그먼테이션 결과를 가져오는데 실패했습니다.")
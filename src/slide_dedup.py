@@ -0,0 +1,134 @@
+"""
+비슷한 슬라이드 묶기
+애니메이션 빌드처럼 거의 같은 슬라이드가 연속될 때 지각 해시로 묶어서
+묶음마다 한 장만 캡셔닝하도록 돕는 모듈
+
+- 해시는 슬라이드를 HASH_SIZE x HASH_SIZE 흑백 이미지로 줄인 밝기 값입니다.
+- 연속한 두 슬라이드의 유사도는 다음 두 비율 중 작은 값이며, CAPTION_DEDUP_SIMILARITY 이상이면 같은 묶음으로 봅니다.
+    - 포함 비율: 앞 슬라이드의 내용 칸(배경과 밝기 차이가 큰 칸)이 다음 슬라이드에서도 내용 칸인 비율
+    - 유지 비율: 앞 슬라이드의 윤곽 칸(이웃 칸과 밝기 차이가 큰 칸: 글자, 선)의 밝기가 다음 슬라이드에서도 거의 같은 비율
+  빌드 슬라이드는 앞 장의 내용을 그대로 두고 내용을 추가하므로 두 비율 모두 1에 가깝습니다.
+  레이아웃이 같고 글자만 바뀐 슬라이드는 내용 칸 위치가 겹쳐 포함 비율은 높지만 글자 모양이 달라 유지 비율이 낮아집니다.
+  (전체 비트 일치율을 쓰는 dHash/aHash는 여백이 많은 슬라이드끼리 모두 비슷하게 나와 구분하지 못함)
+- 묶음의 대표는 빌드가 모두 적용된 마지막 장입니다.
+
+사용법:
+    grouper = SlideGrouper()
+    for page in pages:
+        closed = grouper.add(page.number, page.data)
+        if closed:
+            ...  # closed.representative만 캡셔닝, closed.duplicates는 결과 복사
+    closed = grouper.flush()
+"""
+
+import io
+import os
+from typing import List, NamedTuple, Optional
+
+from PIL import Image
+
+# 같은 슬라이드로 볼 유사도 (0~1, 0 이하면 묶지 않음)
+CAPTION_DEDUP_SIMILARITY = float(os.getenv('CAPTION_DEDUP_SIMILARITY', '0.95'))
+
+# 해시 크기 (HASH_SIZE * HASH_SIZE 칸)
+HASH_SIZE = 128
+# 내용/윤곽 칸으로 볼 밝기 차이와, 같은 칸으로 볼 두 슬라이드 사이의 밝기 차이
+CONTENT_DELTA = 32
+UNCHANGED_DELTA = 16
+
+
+def perceptual_hash(image_data: bytes) -> bytes:
+    """슬라이드의 해시(HASH_SIZE x HASH_SIZE 흑백 밝기 값)를 계산합니다.
+
+    Args:
+        image_data: 인코딩된 이미지 (JPEG 또는 PNG)
+
+    Returns:
+        HASH_SIZE * HASH_SIZE 바이트 (칸마다 0~255 밝기)
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        # JPEG은 축소 디코딩으로 전체 해상도를 풀지 않음
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        return image.convert("L").resize((HASH_SIZE, HASH_SIZE), Image.BOX).tobytes()
+
+
+def _content_cells(pixels: bytes) -> List[int]:
+    background = sorted(pixels)[len(pixels) // 2]
+    return [i for i, pixel in enumerate(pixels) if abs(pixel - background) > CONTENT_DELTA]
+
+
+def _detail_cells(pixels: bytes) -> List[int]:
+    cells = []
+    for i, pixel in enumerate(pixels):
+        right = i % HASH_SIZE < HASH_SIZE - 1 and abs(pixel - pixels[i + 1]) > CONTENT_DELTA
+        down = i + HASH_SIZE < len(pixels) and abs(pixel - pixels[i + HASH_SIZE]) > CONTENT_DELTA
+        if right or down:
+            cells.append(i)
+    return cells
+
+
+def hash_similarity(previous: bytes, current: bytes) -> float:
+    """앞 슬라이드 기준으로 두 슬라이드의 유사도(0~1)를 계산합니다. (포함 비율과 유지 비율 중 작은 값)"""
+    content = _content_cells(previous)
+    details = _detail_cells(previous)
+    if not content or not details:
+        # 빈 슬라이드는 다음 슬라이드도 비어 있을 때만 같은 슬라이드로 봄
+        return 1.0 if not _detail_cells(current) else 0.0
+
+    current_background = sorted(current)[len(current) // 2]
+    contained = sum(1 for i in content if abs(current[i] - current_background) > CONTENT_DELTA) / len(content)
+    unchanged = sum(1 for i in details if abs(previous[i] - current[i]) <= UNCHANGED_DELTA) / len(details)
+    return min(contained, unchanged)
+
+
+class SlideGroup(NamedTuple):
+    """비슷한 연속 슬라이드 묶음"""
+    representative: int  # 캡셔닝할 슬라이드 번호 (묶음의 마지막 장, 빌드가 모두 적용된 슬라이드)
+    data: bytes  # 대표 슬라이드 이미지
+    duplicates: List[int]  # 대표 슬라이드의 결과를 복사할 슬라이드 번호
+
+
+class SlideGrouper:
+    """순서대로 들어오는 슬라이드를 비슷한 연속 슬라이드끼리 묶습니다."""
+
+    def __init__(self, similarity: Optional[float] = None):
+        """초기화 함수
+
+        Args:
+            similarity: 같은 묶음으로 볼 해시 유사도 (None이면 CAPTION_DEDUP_SIMILARITY, 0 이하면 묶지 않음)
+        """
+        self.similarity = CAPTION_DEDUP_SIMILARITY if similarity is None else similarity
+        self._numbers: List[int] = []
+        self._data: Optional[bytes] = None
+        self._hash: Optional[bytes] = None
+
+    def add(self, number: int, image_data: bytes) -> Optional[SlideGroup]:
+        """슬라이드를 추가합니다.
+
+        Args:
+            number: 슬라이드 번호
+            image_data: 렌더링된 슬라이드 이미지
+
+        Returns:
+            이 슬라이드가 앞 묶음과 달라 닫힌 묶음이 있으면 그 묶음, 없으면 None
+        """
+        if self.similarity <= 0:
+            self._numbers, self._data = [number], image_data
+            return self.flush()
+
+        page_hash = perceptual_hash(image_data)
+        closed = None
+        if self._hash is not None and hash_similarity(self._hash, page_hash) < self.similarity:
+            closed = self.flush()
+        self._numbers.append(number)
+        self._data = image_data
+        self._hash = page_hash
+        return closed
+
+    def flush(self) -> Optional[SlideGroup]:
+        """진행 중인 묶음을 닫아 반환합니다. 없으면 None을 반환합니다."""
+        if not self._numbers:
+            return None
+        group = SlideGroup(self._numbers[-1], self._data, self._numbers[:-1])
+        self._numbers, self._data, self._hash = [], None, None
+        return group
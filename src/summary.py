@@ -1,49 +1,17 @@
 import os
 import json
-import base64
-import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Any
 from dotenv import load_dotenv
-from openai import OpenAI
-from pdf2image import convert_from_path
+
+from src.llm_client import PRIORITY_BATCH, chat_completion
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    base_url="https://api.openai.com/v1"
-)
-
-def convert_pdf_to_images(pdf_path: str) -> List[str]:
-    """PDF 파일을 이미지로 변환합니다.
-    
-    Args:
-        pdf_path: PDF 파일 경로
-        
-    Returns:
-        base64로 인코딩된 이미지 리스트
-    """
-    try:
-        # PDF를 이미지로 변환
-        images = convert_from_path(pdf_path)
-        encoded_images = []
-        
-        for image in images:
-            # 이미지를 JPEG로 변환
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='JPEG', quality=90)
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # base64로 인코딩
-            img_str = base64.b64encode(img_byte_arr).decode()
-            encoded_images.append(img_str)
-            
-        return encoded_images
-    except Exception as e:
-        raise Exception(f"PDF 변환 중 오류 발생: {str(e)}")
+# 동시에 진행할 요약 생성 요청 수
+SUMMARY_MAX_WORKERS = int(os.getenv('SUMMARY_MAX_WORKERS', '4'))
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
     """JSON 파일을 로드합니다."""
@@ -53,7 +21,7 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
     except Exception as e:
         raise Exception(f"JSON 파일 로드 중 오류 발생: {str(e)}")
 
-def generate_summary(slide_data: Dict[str, Any], merged_segments: str) -> Dict[str, Any]:
+def generate_summary(slide_data: Dict[str, Any], merged_segments: str, priority: int = PRIORITY_BATCH) -> Dict[str, Any]:
     """단일 슬라이드에 대한 요약을 생성합니다."""
     prompt = fprompt = f"""
 ### Slide Analysis
@@ -103,7 +71,8 @@ General rules (**FOLLOW EXACTLY**)
     print(f"[DEBUG] 병합된 세그먼트 길이: {len(merged_segments)} 문자")
     print("[DEBUG] ----- PROMPT END -----\n")
 
-    response = client.chat.completions.create(
+    response = chat_completion(
+        priority=priority,
         model="gpt-4o",
         messages=[
             {
@@ -144,24 +113,55 @@ General rules (**FOLLOW EXACTLY**)
 
     return json.loads(response.choices[0].message.function_call.arguments)
 
+def summarize_slide(slide_caption: Dict[str, Any], segments: Dict[str, Any], priority: int = PRIORITY_BATCH) -> Dict[str, Any]:
+    """단일 슬라이드의 세그먼트를 병합하여 필기 요약을 생성합니다.
+    
+    Args:
+        slide_caption: 해당 슬라이드의 캡셔닝 데이터
+        segments: 해당 슬라이드에 매핑된 세그먼트 딕셔너리
+        priority: 요청 우선순위 (PRIORITY_REALTIME 또는 PRIORITY_BATCH)
+        
+    Returns:
+        결과 JSON 형식의 슬라이드 필기
+    """
+    # 세그먼트 텍스트 병합
+    merged_segments = "\n".join(
+        f"Segment {seg_id}: {seg_data['text']}"
+        for seg_id, seg_data in segments.items()
+    )
+
+    # 요약 생성
+    summary = generate_summary(slide_caption, merged_segments, priority=priority)
+    
+    return {
+        "Concise Summary Notes": f"🧠Concise Summary Notes\n{summary['concise_summary']}",
+        "Bullet Point Notes": f"✅Bullet Point Notes\n{summary['bullet_points']}",
+        "Keyword Notes": f"🔑Keyword Notes\n{summary['keywords']}",
+        "Chart/Table Summary": "Ommitted"
+    }
+
 def create_summary(
     image_captioning_data: Dict[str, Any],
     segment_mapping_data: Dict[str, Any],
-    progress_callback=None
+    progress_callback=None,
+    max_workers: int = None,
+    priority: int = PRIORITY_BATCH
 ) -> Dict[str, Any]:
     """모든 슬라이드에 대한 요약을 생성합니다.
     
+    슬라이드별 요약 요청은 최대 max_workers개까지 동시에 진행되며,
+    결과는 segment_mapping_data의 슬라이드 순서대로 구성됩니다.
+    
     Args:
         image_captioning_data: 이미지 캡셔닝 결과 JSON 데이터
         segment_mapping_data: 세그먼트 매핑 결과 JSON 데이터
-        progress_callback: 진행률 업데이트를 위한 콜백 함수
+        progress_callback: 진행률 업데이트를 위한 콜백 함수 (completed_slides, total_slides)
+        max_workers: 동시에 진행할 요약 요청 수 (None이면 SUMMARY_MAX_WORKERS, 1이면 순차 처리)
+        priority: 요청 우선순위 (실시간 세션 후처리는 PRIORITY_REALTIME)
         
     Returns:
         생성된 요약 데이터
     """
-    # 결과 저장할 딕셔너리
-    summaries = {}
-
     # 처리할 슬라이드 목록 생성
     slides_to_process = []
     for slide_key in segment_mapping_data.keys():
@@ -176,32 +176,41 @@ def create_summary(
 
     total_slides = len(slides_to_process)
     
-    # 각 슬라이드에 대해 요약 생성
-    for i, (slide_key, slide_number) in enumerate(slides_to_process, 1):
-        # 진행률 콜백 호출
-        if progress_callback:
-            progress_callback(i, total_slides)
-            
-        # 해당 슬라이드의 캡셔닝 데이터
-        slide_caption = image_captioning_data[slide_number - 1]
-
-        # 세그먼트 텍스트 병합
-        segments = segment_mapping_data[slide_key].get("Segments", {})
-        merged_segments = "\n".join(
-            f"Segment {seg_id}: {seg_data['text']}"
-            for seg_id, seg_data in segments.items()
-        )
-
-        # 요약 생성
-        summary = generate_summary(slide_caption, merged_segments)
-        
-        # 결과 저장
-        summaries[slide_key] = {
-            "Concise Summary Notes": f"🧠Concise Summary Notes\n{summary['concise_summary']}",
-            "Bullet Point Notes": f"✅Bullet Point Notes\n{summary['bullet_points']}",
-            "Keyword Notes": f"🔑Keyword Notes\n{summary['keywords']}",
-            "Chart/Table Summary": "Ommitted"
+    if max_workers is None:
+        max_workers = SUMMARY_MAX_WORKERS
+    max_workers = max(1, min(max_workers, total_slides or 1))
+    
+    # 각 슬라이드에 대해 요약 생성 (완료되는 대로 수집)
+    completed_summaries = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                summarize_slide,
+                image_captioning_data[slide_number - 1],
+                segment_mapping_data[slide_key].get("Segments", {}),
+                priority
+            ): slide_key
+            for slide_key, slide_number in slides_to_process
         }
+        try:
+            for future in as_completed(futures):
+                slide_key = futures[future]
+                completed_summaries[slide_key] = future.result()
+                
+                # 진행률 콜백 호출
+                if progress_callback:
+                    progress_callback(len(completed_summaries), total_slides)
+        except Exception:
+            # 하나라도 실패하면 아직 시작하지 않은 요청은 취소
+            for pending in futures:
+                pending.cancel()
+            raise
+
+    # 결과를 슬라이드 순서대로 정리
+    summaries = {
+        slide_key: completed_summaries[slide_key]
+        for slide_key, _ in slides_to_process
+    }
 
     # 결과 저장
     output_dir = "data/summary"
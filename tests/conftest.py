@@ -0,0 +1,16 @@
+"""
+테스트 공통 설정
+api 모듈이 import될 때 만드는 데이터/업로드 디렉토리와 SQLite 파일이 저장소 안에 생기지 않도록
+환경 변수로 임시 디렉토리를 지정합니다. (모듈 상수는 import 시점에 읽으므로 가장 먼저 설정)
+"""
+
+import os
+import tempfile
+
+_TEST_ROOT = tempfile.mkdtemp(prefix="capstone-test-")
+
+os.environ.setdefault("DATA_DIR", os.path.join(_TEST_ROOT, "data"))
+os.environ.setdefault("UPLOAD_FOLDER", os.path.join(_TEST_ROOT, "file"))
+os.environ.setdefault("CAPTION_CACHE_DIR", os.path.join(_TEST_ROOT, "cache", "image_captioning"))
+os.environ.setdefault("TRANSCRIPT_CACHE_DIR", os.path.join(_TEST_ROOT, "cache", "stt"))
+os.environ.setdefault("JOB_STORE_BACKEND", "memory")
@@ -0,0 +1,67 @@
+"""
+src.cache 테스트
+DiskCache의 항목 수/크기 집계가 동시 쓰기와 삭제 후에도 실제 파일과 일치하는지 확인합니다.
+"""
+
+import os
+import threading
+import time
+
+from src.cache import DiskCache, make_key
+
+
+def actual_totals(cache):
+    files = cache._scan()
+    return len(files), sum(size for _, size, _ in files)
+
+
+def test_concurrent_sets_of_same_key_keep_totals_exact(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    key = make_key("caption", 1)
+    start = threading.Barrier(8)
+
+    def write(worker):
+        start.wait()
+        for i in range(50):
+            cache.set(key, {"text": "x" * (worker * 10 + i)})
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert (stats["entries"], stats["bytes"]) == actual_totals(cache)
+
+
+def test_set_and_delete_keep_totals_exact(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    keys = [make_key("stt", i) for i in range(5)]
+    for i, key in enumerate(keys):
+        cache.set(key, {"text": "a" * i})
+    cache.set(keys[0], {"text": "longer value"})
+    cache.delete(keys[1])
+    cache.delete(keys[1])
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == actual_totals(cache)
+    assert cache.get(keys[0]) == {"text": "longer value"}
+
+
+def test_eviction_removes_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_entries=3)
+    keys = [make_key("caption", i) for i in range(4)]
+    for key in keys[:3]:
+        cache.set(key, {"value": key})
+    # 저장 순서대로 사용 시각을 두고, 첫 항목을 다시 사용하면 두 번째 항목이 가장 오래된 항목이 됨
+    old = time.time() - 100
+    for age, key in enumerate(keys[:3]):
+        os.utime(cache._path(key), (old + age, old + age))
+    assert cache.get(keys[0]) == {"value": keys[0]}
+    cache.set(keys[3], {"value": keys[3]})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.stats()["entries"] == actual_totals(cache)[0]
@@ -0,0 +1,123 @@
+"""
+api.exporter 테스트
+내보내기 파일의 재사용과, 변환 중 result.json이 바뀌었을 때 오래된 파일이 최신으로 남지 않는지 확인합니다.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from api import exporter
+
+
+def write_result(job_dir, result, mtime_ns):
+    path = job_dir / "result.json"
+    path.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def job_dir(tmp_path):
+    write_result(tmp_path, {"slide1": {"Keyword Notes": "v1"}}, 1_000_000_000)
+    return tmp_path
+
+
+@pytest.fixture
+def build_calls(monkeypatch):
+    calls = []
+    original = exporter._BUILDERS["ndjson"]
+
+    def build(result_path, tmp_path):
+        calls.append(result_path)
+        original(result_path, tmp_path)
+
+    monkeypatch.setitem(exporter._BUILDERS, "ndjson", build)
+    return calls
+
+
+def test_export_is_reused_until_result_changes(job_dir, build_calls):
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    assert exporter.get_export_file(str(job_dir), "ndjson") == path
+    assert len(build_calls) == 1
+    assert read_ndjson(path) == [{"slide": "slide1", "Keyword Notes": "v1"}]
+
+    write_result(job_dir, {"slide1": {"Keyword Notes": "v2"}}, 2_000_000_000)
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    assert len(build_calls) == 2
+    assert read_ndjson(path) == [{"slide": "slide1", "Keyword Notes": "v2"}]
+
+
+def test_result_rewritten_during_export_is_rebuilt(job_dir, monkeypatch):
+    original = exporter._BUILDERS["ndjson"]
+    calls = []
+
+    def build(result_path, tmp_path):
+        original(result_path, tmp_path)
+        calls.append(result_path)
+        if len(calls) == 1:
+            # 변환을 마친 직후 작업이 result.json을 다시 씀
+            write_result(job_dir, {"slide1": {"Keyword Notes": "v2"}}, 2_000_000_000)
+
+    monkeypatch.setitem(exporter._BUILDERS, "ndjson", build)
+
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    assert len(calls) == 2
+    assert read_ndjson(path) == [{"slide": "slide1", "Keyword Notes": "v2"}]
+    assert os.stat(path).st_mtime_ns == 2_000_000_000
+
+
+def test_partially_written_result_is_retried(job_dir, monkeypatch):
+    original = exporter._BUILDERS["ndjson"]
+    calls = []
+
+    def build(result_path, tmp_path):
+        calls.append(result_path)
+        if len(calls) == 1:
+            # 다시 쓰는 중이라 JSON이 잘린 상태를 읽음
+            write_result(job_dir, {"slide1": {"Keyword Notes": "v2"}}, 2_000_000_000)
+            raise json.JSONDecodeError("Expecting value", "", 0)
+        original(result_path, tmp_path)
+
+    monkeypatch.setitem(exporter._BUILDERS, "ndjson", build)
+
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    assert len(calls) == 2
+    assert read_ndjson(path) == [{"slide": "slide1", "Keyword Notes": "v2"}]
+    assert os.listdir(job_dir / exporter.EXPORT_DIR_NAME) == ["result.ndjson"]
+
+
+def test_export_from_changed_source_is_not_reused(job_dir, monkeypatch):
+    original = exporter._BUILDERS["ndjson"]
+    versions = iter(range(2, 100))
+
+    def build(result_path, tmp_path):
+        original(result_path, tmp_path)
+        # 변환할 때마다 result.json이 바뀜
+        version = next(versions)
+        write_result(job_dir, {"slide1": {"Keyword Notes": f"v{version}"}}, version * 1_000_000_000)
+
+    monkeypatch.setitem(exporter._BUILDERS, "ndjson", build)
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    monkeypatch.setitem(exporter._BUILDERS, "ndjson", original)
+
+    # 마지막 변환 이후 result.json이 바뀌었으므로 다음 요청에서 다시 만듦
+    assert os.stat(path).st_mtime_ns != os.stat(job_dir / "result.json").st_mtime_ns
+    path = exporter.get_export_file(str(job_dir), "ndjson")
+    assert read_ndjson(path) == [{"slide": "slide1", "Keyword Notes": f"v{exporter._BUILD_ATTEMPTS + 1}"}]
+
+
+def test_gzip_export_is_deterministic(job_dir):
+    path = exporter.get_export_file(str(job_dir), "json.gz")
+    with open(path, "rb") as f:
+        first = f.read()
+    os.remove(path)
+    with open(exporter.get_export_file(str(job_dir), "json.gz"), "rb") as f:
+        assert f.read() == first
+    assert json.loads(gzip.decompress(first)) == {"slide1": {"Keyword Notes": "v1"}}
@@ -0,0 +1,149 @@
+"""
+api.history 테스트
+이력 목록의 커서 페이지네이션과 summary 보기를 데이터베이스 / 폴더 폴백 두 경우 모두 확인합니다.
+"""
+
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from api import history
+
+
+def list_history(app, user, query):
+    """인증 데코레이터를 거치지 않고 /my 핸들러를 호출합니다."""
+    with app.test_request_context(f"/my?{query}"):
+        response, status = history.get_my_history.__wrapped__(user)
+        return status, response.get_json()
+
+
+def collect_pages(app, user, query):
+    items, cursor, pages = [], None, 0
+    while True:
+        status, body = list_history(app, user, query + (f"&cursor={cursor}" if cursor else ""))
+        assert status == 200
+        items.extend(body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+@pytest.fixture
+def db_app(app, monkeypatch):
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db = SQLAlchemy(app)
+
+    class User(db.Model):
+        __tablename__ = 'users'
+        id = db.Column(db.Integer, primary_key=True)
+
+    class ConversionHistory(db.Model):
+        __tablename__ = 'conversion_history'
+        id = db.Column(db.Integer, primary_key=True)
+        user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+        job_id = db.Column(db.String(100), unique=True, nullable=False)
+        filename = db.Column(db.String(255), nullable=False)
+        notes_json = db.Column(db.JSON, nullable=True)
+        created_at = db.Column(db.DateTime)
+        status = db.Column(db.String(50))
+
+    monkeypatch.setattr(history, "db", db)
+    monkeypatch.setattr(history, "ConversionHistory", ConversionHistory)
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([User(id=1), User(id=2)])
+        created_at = datetime(2026, 1, 1)
+        # 같은 시각의 이력이 섞여 있어도 id로 순서가 정해지는지 확인
+        for i in range(5):
+            db.session.add(ConversionHistory(
+                user_id=1, job_id=f"job{i}", filename=f"{i}.pdf", notes_json={"n": i},
+                created_at=created_at + timedelta(minutes=i // 2), status="completed"
+            ))
+        db.session.add(ConversionHistory(
+            user_id=2, job_id="other", filename="other.pdf", created_at=created_at, status="completed"
+        ))
+        db.session.commit()
+        yield app
+
+
+def test_db_cursor_pagination_returns_each_item_once(db_app):
+    user = SimpleNamespace(id=1)
+    with db_app.app_context():
+        items, pages = collect_pages(db_app, user, "limit=2&view=summary")
+
+    assert pages == 3
+    assert [item["job_id"] for item in items] == ["job4", "job3", "job2", "job1", "job0"]
+    assert all("notes_json" not in item for item in items)
+
+
+def test_db_without_limit_returns_plain_list(db_app):
+    with db_app.app_context():
+        status, body = list_history(db_app, SimpleNamespace(id=1), "")
+
+    assert status == 200
+    assert isinstance(body, list) and len(body) == 5
+    assert body[0]["notes_json"] == {"n": 4}
+
+
+def test_invalid_cursor_is_rejected(db_app):
+    with db_app.app_context():
+        status, _ = list_history(db_app, SimpleNamespace(id=1), "cursor=not-a-cursor")
+        assert status == 400
+        # 폴더 이력용 커서(job_id 문자열)를 DB 이력에 넘긴 경우
+        folder_cursor = history.encode_history_cursor(datetime(2026, 1, 1), "job1")
+        status, _ = list_history(db_app, SimpleNamespace(id=1), f"cursor={folder_cursor}")
+        assert status == 400
+
+
+@pytest.fixture
+def upload_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(history, "db", None)
+    monkeypatch.setattr(history, "UPLOAD_FOLDER", str(tmp_path))
+    for i in range(5):
+        job_dir = tmp_path / f"job{i}"
+        job_dir.mkdir()
+        (job_dir / "lecture.pdf").write_bytes(b"%PDF")
+        (job_dir / "result.json").write_text(json.dumps({"n": i}), encoding="utf-8")
+    # 결과가 없는 폴더는 이력이 아님
+    (tmp_path / "pending").mkdir()
+    return tmp_path
+
+
+def test_folder_fallback_paginates_and_drops_notes_in_summary(app, upload_folder):
+    items, pages = collect_pages(app, SimpleNamespace(id=1), "limit=2&view=summary")
+
+    assert pages == 3
+    assert sorted(item["job_id"] for item in items) == [f"job{i}" for i in range(5)]
+    assert len({item["job_id"] for item in items}) == 5
+    assert all("notes_json" not in item for item in items)
+
+
+def test_folder_fallback_without_limit_returns_plain_list(app, upload_folder):
+    status, body = list_history(app, SimpleNamespace(id=1), "")
+
+    assert status == 200
+    assert isinstance(body, list) and len(body) == 5
+    assert {item["notes_json"]["n"] for item in body} == set(range(5))
+
+
+def test_detail_lists_only_regular_files(app, upload_folder):
+    for name in ("exports", "checkpoints", "pages"):
+        (upload_folder / "job0" / name).mkdir()
+
+    with app.test_request_context("/detail/job0"):
+        response = history.get_history_detail("job0")
+
+    body = json.loads(response.get_data())
+    assert sorted(body["files"]) == ["lecture.pdf", "result.json"]
+    assert body["notes_json"] == {"n": 0}
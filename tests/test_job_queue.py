@@ -0,0 +1,117 @@
+"""
+api.job_queue 테스트
+대기열 제한(QueueFullError), 워커의 작업 처리, 실패한 작업 재시도를 확인합니다.
+"""
+
+import time
+
+import pytest
+
+from api.job_queue import STATUS_COMPLETED, STATUS_FAILED, STATUS_QUEUED, JobQueue, QueueFullError
+
+
+def wait_until_finished(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job and job['status'] in (STATUS_COMPLETED, STATUS_FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"작업이 끝나지 않았습니다: {queue.get(job_id)}")
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(handler=lambda job_id, payload: True, **kwargs):
+        queue = JobQueue(str(tmp_path / "job_queue.sqlite3"), handler, **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.stop()
+
+
+def test_submit_rejects_when_queue_is_full(make_queue):
+    queue = make_queue(max_pending=2)
+    queue._init_schema()  # 워커 없이 대기열만 사용
+
+    queue.submit("a", {})
+    queue.submit("b", {})
+    assert not queue.has_capacity()
+    with pytest.raises(QueueFullError):
+        queue.submit("c", {})
+    assert queue.get("c") is None
+    assert queue.get("a")['status'] == STATUS_QUEUED
+
+
+def test_worker_runs_handler_with_payload(make_queue):
+    calls = []
+
+    def handler(job_id, payload):
+        calls.append((job_id, payload))
+        return True
+
+    queue = make_queue(handler, num_workers=1)
+    queue.start()
+    queue.submit("job", {"audio_path": "a.wav"})
+
+    job = wait_until_finished(queue, "job")
+    assert job['status'] == STATUS_COMPLETED
+    assert job['attempts'] == 1
+    assert calls == [("job", {"audio_path": "a.wav"})]
+
+
+def test_only_one_process_consumes_and_another_takes_over(make_queue):
+    calls = []
+
+    def handler(job_id, payload):
+        calls.append(job_id)
+        return True
+
+    first = make_queue(handler, num_workers=1)
+    second = make_queue(handler, num_workers=1)
+    assert first.start() is True
+    assert second.start() is False
+    assert second._workers == []
+
+    # 잠금을 가진 프로세스가 종료된 상황: 잠금 파일이 닫히면 대기하던 쪽이 워커를 시작
+    first.stop()
+    first._lock_file.close()
+    second.submit("job", {})
+
+    assert wait_until_finished(second, "job")['status'] == STATUS_COMPLETED
+    assert len(second._workers) == 1
+    assert calls == ["job"]
+
+
+def test_requeue_only_failed_jobs(make_queue):
+    queue = make_queue(max_pending=5)
+    queue._init_schema()
+    queue.submit("job", {})
+
+    # 대기 중인 작업은 재시도 대상이 아님
+    assert queue.requeue("job") is False
+    queue._finish("job", STATUS_FAILED, "error")
+
+    assert queue.requeue("job") is True
+    job = queue.get("job")
+    assert job['status'] == STATUS_QUEUED
+    assert job['error'] is None
+    # 같은 작업을 두 번 재시도하면 두 번째는 False
+    assert queue.requeue("job") is False
+    assert queue.requeue("missing") is False
+
+
+def test_requeue_rejects_when_queue_is_full(make_queue):
+    queue = make_queue(max_pending=1)
+    queue._init_schema()
+    queue.submit("failed", {})
+    queue._finish("failed", STATUS_FAILED)
+    queue.submit("waiting", {})
+
+    with pytest.raises(QueueFullError):
+        queue.requeue("failed")
+    assert queue.get("failed")['status'] == STATUS_FAILED
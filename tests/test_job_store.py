@@ -0,0 +1,127 @@
+"""
+api.job_store 테스트
+상태 version, wait_for_status(long-poll)의 알림 처리, SQLite 저장소의 연결 재사용과 진행률 갱신 모으기를 확인합니다.
+"""
+
+import threading
+import time
+
+import pytest
+
+from api.job_store import MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(ttl=60, max_entries=100)
+    return SQLiteJobStore(str(tmp_path / "job_store.sqlite3"), ttl=60)
+
+
+def test_set_status_increments_version(store):
+    store.set_status("job", {"progress": 0, "message": "시작"})
+    store.set_status("job", {"progress": 50, "message": "분석 중"})
+
+    status = store.get_status("job")
+    assert status["progress"] == 50
+    assert status["version"] == 2
+
+
+def test_wait_for_status_returns_immediately_when_version_differs(store):
+    store.set_status("job", {"progress": 0, "message": "시작"})
+    store.set_status("job", {"progress": 10, "message": "분석 중"})
+
+    started = time.monotonic()
+    status = store.wait_for_status("job", 1, timeout=5)
+    assert status["version"] == 2
+    assert time.monotonic() - started < 1
+
+
+def test_wait_for_status_times_out_with_same_version(store):
+    store.set_status("job", {"progress": 0})
+
+    status = store.wait_for_status("job", 1, timeout=0.2)
+    assert status["version"] == 1
+
+
+def test_wait_for_status_wakes_on_concurrent_change(store):
+    store.set_status("job", {"progress": 0})
+
+    def change():
+        time.sleep(0.1)
+        store.set_status("job", {"progress": 50})
+
+    threading.Thread(target=change).start()
+    started = time.monotonic()
+    status = store.wait_for_status("job", 1, timeout=10)
+    assert status["version"] == 2
+    assert time.monotonic() - started < 2
+
+
+def test_wait_for_status_does_not_lose_change_between_check_and_wait():
+    store = MemoryJobStore(ttl=60, max_entries=100)
+    store.set_status("job", {"progress": 0})
+
+    # 대기자가 version을 확인한 직후(대기 시작 전)에 다른 스레드가 상태를 바꿈
+    original_get_status = store.get_status
+    calls = []
+
+    def get_status(job_id):
+        status = original_get_status(job_id)
+        if not calls:
+            calls.append(job_id)
+            setter = threading.Thread(target=store.set_status, args=("job", {"progress": 50}))
+            setter.start()
+            setter.join(timeout=0.2)
+        return status
+
+    store.get_status = get_status
+
+    started = time.monotonic()
+    status = store.wait_for_status("job", 1, timeout=5)
+    assert status["version"] == 2
+    assert time.monotonic() - started < 2
+
+
+def test_sqlite_progress_only_updates_are_coalesced(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "job_store.sqlite3"), ttl=60, progress_interval=0.2)
+    store.set_status("job", {"progress": 0, "message": "분석 중"})
+    for progress in range(1, 11):
+        store.set_status("job", {"progress": progress, "message": "분석 중"})
+
+    # 간격 안의 진행률 갱신은 아직 쓰지 않음
+    assert store.get_status("job") == {"progress": 0, "message": "분석 중", "version": 1}
+
+    # 간격이 끝나면 마지막 값 하나만 씀
+    status = store.wait_for_status("job", 1, timeout=2)
+    assert status == {"progress": 10, "message": "분석 중", "version": 2}
+
+
+def test_sqlite_message_change_is_written_immediately(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "job_store.sqlite3"), ttl=60, progress_interval=10)
+    store.set_status("job", {"progress": 0, "message": "분석 중"})
+    store.set_status("job", {"progress": 5, "message": "분석 중"})
+    store.set_status("job", {"progress": 90, "message": "요약 중"})
+
+    assert store.get_status("job") == {"progress": 90, "message": "요약 중", "version": 2}
+    # 먼저 들어온 진행률 갱신이 나중에 덮어쓰지 않음
+    time.sleep(0.1)
+    store._flush_pending("job")
+    assert store.get_status("job")["version"] == 2
+
+
+def test_sqlite_reuses_connection_per_thread(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "job_store.sqlite3"), ttl=60)
+    with store._connect() as first, store._connect() as second:
+        assert first is second
+
+    connections = []
+
+    def connect():
+        with store._connect() as conn:
+            connections.append(conn)
+
+    thread = threading.Thread(target=connect)
+    thread.start()
+    thread.join()
+    assert connections[0] is not first
@@ -0,0 +1,64 @@
+"""
+src.llm_client 테스트
+요청 스케줄러의 우선순위 검증과, 실패한 요청의 토큰 예약 반환을 확인합니다.
+"""
+
+import httpx
+import openai
+import pytest
+
+from src import llm_client
+from src.llm_client import PRIORITY_BATCH, RateLimitScheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=1000)
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+    monkeypatch.setattr(llm_client, "OPENAI_MAX_RETRIES", 1)
+    monkeypatch.setattr(llm_client, "backoff_delay", lambda attempt, error=None: 0)
+    return scheduler
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+def test_unknown_priority_is_rejected(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.acquire(10, priority=5)
+    # 잘못된 요청이 대기 수를 남기지 않음
+    assert scheduler._waiting == {llm_client.PRIORITY_REALTIME: 0, PRIORITY_BATCH: 0}
+
+
+def test_failed_request_refunds_reserved_tokens(scheduler):
+    def fail(**kwargs):
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        llm_client._call_with_retry(fail, 400, PRIORITY_BATCH)
+    assert scheduler._token_allowance == pytest.approx(1000)
+
+
+def test_retried_request_refunds_each_failed_attempt(scheduler):
+    calls = []
+
+    def flaky(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise connection_error()
+        return "ok"
+
+    assert llm_client._call_with_retry(flaky, 400, PRIORITY_BATCH) == "ok"
+    assert len(calls) == 2
+    # 성공한 시도의 예약만 남음 (응답에 usage가 없으면 예상치 유지)
+    assert scheduler._token_allowance == pytest.approx(600, abs=1)
+
+
+def test_exhausted_retries_refund_all_attempts(scheduler):
+    def always_fail(**kwargs):
+        raise connection_error()
+
+    with pytest.raises(openai.APIConnectionError):
+        llm_client._call_with_retry(always_fail, 400, PRIORITY_BATCH)
+    assert scheduler._token_allowance == pytest.approx(1000)
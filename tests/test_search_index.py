@@ -0,0 +1,58 @@
+"""
+api.search_index 테스트
+사용자별 검색 범위, snippet의 HTML 이스케이프, 형태소로만 일치한 결과의 일치 부분 표시를 확인합니다.
+"""
+
+import pytest
+
+from api.search_index import SearchIndex, highlight_terms, render_snippet
+
+
+def slide(text):
+    return {"Concise Summary Notes": text}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search_index.sqlite3"))
+    index.index_result("job1", 1, "os.pdf", {"slide1": slide("CPU 스케줄링은 준비 큐에서 프로세스를 선택한다")})
+    index.index_result("job2", 2, "os2.pdf", {"slide1": slide("다른 사용자의 스케줄링 노트")})
+    return index
+
+
+def test_search_is_scoped_to_owner(index):
+    hits, total = index.search(1, "스케줄링")
+    assert total == 1
+    assert [hit["job_id"] for hit in hits] == ["job1"]
+
+    hits, total = index.search(2, "스케줄링")
+    assert [hit["job_id"] for hit in hits] == ["job2"]
+
+    assert index.search(3, "스케줄링") == ([], 0)
+    assert index.search(None, "스케줄링") == ([], 0)
+
+
+def test_snippet_escapes_html_and_marks_match(index):
+    index.index_result("job3", 1, "xss.pdf", {"slide1": slide('<script>alert("x")</script> 교착 상태')})
+
+    hits, _ = index.search(1, "교착")
+    snippet = hits[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>교착</mark>" in snippet
+
+
+def test_morpheme_only_match_is_highlighted_in_text(index):
+    # 검색어 "스케줄러"는 원문 접두어로는 일치하지 않고 구성 명사(스케줄)로만 일치
+    hits, total = index.search(1, "스케줄러")
+    assert total == 1
+    assert "<mark>스케줄</mark>링은" in hits[0]["snippet"]
+
+
+def test_highlight_terms_windows_long_text():
+    text = "가" * 100 + " 스케줄링 " + "나" * 100
+    snippet = highlight_terms(text, ["스케줄"], width=40)
+
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert render_snippet(snippet).count("<mark>스케줄</mark>") == 1
+    assert highlight_terms(text, ["페이징"]) is None
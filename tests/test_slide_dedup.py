@@ -0,0 +1,76 @@
+"""
+src.slide_dedup 테스트
+PyMuPDF로 만든 슬라이드를 렌더링해 빌드 슬라이드와 레이아웃만 같은 슬라이드를 구분하는지 확인합니다.
+"""
+
+import pymupdf
+import pytest
+
+from src.pdf_renderer import render_page
+from src.slide_dedup import SlideGrouper, hash_similarity, perceptual_hash
+
+WIDTH, HEIGHT = 720, 405
+
+
+def make_slide(doc, title, bullets):
+    """상단 제목 바와 글머리 기호가 있는 슬라이드를 추가합니다."""
+    page = doc.new_page(width=WIDTH, height=HEIGHT)
+    page.draw_rect(pymupdf.Rect(0, 0, WIDTH, 60), color=(0.1, 0.2, 0.5), fill=(0.1, 0.2, 0.5))
+    page.insert_text((30, 40), title, fontsize=24, color=(1, 1, 1))
+    for i, bullet in enumerate(bullets):
+        page.insert_text((50, 110 + i * 40), f"- {bullet}", fontsize=18)
+    return page
+
+
+def render_all(doc):
+    return [render_page(page).data for page in doc]
+
+
+@pytest.fixture
+def doc():
+    document = pymupdf.open()
+    yield document
+    document.close()
+
+
+def test_same_layout_different_text_is_not_grouped(doc):
+    make_slide(doc, "Intro", ["course overview", "grading policy", "office hours"])
+    make_slide(doc, "Process Scheduling Overview", [
+        "scheduling criteria", "FCFS and SJF", "priority scheduling", "round robin", "multilevel queues"
+    ])
+    first, second = render_all(doc)
+
+    assert hash_similarity(perceptual_hash(first), perceptual_hash(second)) < 0.95
+
+    grouper = SlideGrouper(0.95)
+    closed = grouper.add(1, first)
+    assert closed is None
+    closed = grouper.add(2, second)
+    assert closed.representative == 1
+    assert closed.duplicates == []
+    assert grouper.flush().representative == 2
+
+
+def test_animation_builds_are_grouped_into_last_slide(doc):
+    bullets = ["mutual exclusion", "hold and wait", "circular wait"]
+    for count in range(1, len(bullets) + 1):
+        make_slide(doc, "Deadlock", bullets[:count])
+    make_slide(doc, "Memory Paging", ["page table", "TLB lookup"])
+    pages = render_all(doc)
+
+    grouper = SlideGrouper(0.95)
+    groups = [group for number, data in enumerate(pages, 1) if (group := grouper.add(number, data))]
+    groups.append(grouper.flush())
+
+    assert [(group.representative, group.duplicates) for group in groups] == [(3, [1, 2]), (4, [])]
+
+
+def test_zero_similarity_disables_grouping(doc):
+    make_slide(doc, "Deadlock", ["mutual exclusion"])
+    make_slide(doc, "Deadlock", ["mutual exclusion", "hold and wait"])
+    first, second = render_all(doc)
+
+    grouper = SlideGrouper(0)
+    assert grouper.add(1, first).representative == 1
+    assert grouper.add(2, second).representative == 2
+    assert grouper.flush() is None